@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class AiAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_analysis'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from jobs.models import JobSkill
+        from .models import AIModel
+        from .registry import invalidate_model_registry
+        from .skill_matcher import invalidate_skill_matcher
+
+        # Reconstruire l'automate de compétences quand la taxonomie change
+        post_save.connect(invalidate_skill_matcher, sender=JobSkill, dispatch_uid='ai_analysis_jobskill_saved')
+        post_delete.connect(invalidate_skill_matcher, sender=JobSkill, dispatch_uid='ai_analysis_jobskill_deleted')
+
+        # Vérifier le modèle actif à la prochaine requête (remplacement à chaud)
+        post_save.connect(invalidate_model_registry, sender=AIModel, dispatch_uid='ai_analysis_aimodel_saved')
+        post_delete.connect(invalidate_model_registry, sender=AIModel, dispatch_uid='ai_analysis_aimodel_deleted')
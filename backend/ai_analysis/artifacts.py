@@ -0,0 +1,134 @@
+"""
+Format des artefacts de modèles
+Un bundle versionné par entraînement: un fichier joblib par modèle (tableaux numpy
+non compressés, projetables en mémoire en lecture seule) et un manifeste avec les
+empreintes SHA-256. Le fichier CURRENT du dossier des modèles désigne le bundle actif.
+
+    MODELS_DIR/
+        CURRENT                      -> 'a1b2c3d4e5f60718'
+        a1b2c3d4e5f60718/
+            manifest.json
+            vectorizer.joblib
+            domain_classifier.joblib
+            quality_classifier.joblib
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+CURRENT_FILENAME = 'CURRENT'
+MODEL_NAMES = ('vectorizer', 'domain_classifier', 'quality_classifier')
+# Ancien format: trois pickles à la racine du dossier
+LEGACY_FILENAMES = tuple(f'{name}.pkl' for name in MODEL_NAMES)
+
+
+class ArtifactError(Exception):
+    """Bundle de modèles absent, incomplet ou corrompu"""
+
+
+def _sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, content: str):
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(temporary_path, path)
+
+
+def save_bundle(models_dir: str, models: Dict[str, object], model_version: str,
+                metadata: Optional[Dict] = None, activate: bool = True) -> str:
+    """
+    Écrit un bundle versionné (écriture dans un dossier temporaire puis renommage)
+    et le désigne comme bundle actif; retourne le dossier du bundle
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    bundle_dir = os.path.join(models_dir, model_version)
+    temporary_dir = f'{bundle_dir}.tmp'
+    shutil.rmtree(temporary_dir, ignore_errors=True)
+    os.makedirs(temporary_dir)
+
+    files = {}
+    for name in MODEL_NAMES:
+        filename = f'{name}.joblib'
+        path = os.path.join(temporary_dir, filename)
+        # Sans compression: les tableaux restent projetables en mémoire (mmap_mode='r')
+        joblib.dump(models[name], path)
+        files[name] = {'filename': filename, 'sha256': _sha256(path), 'size': os.path.getsize(path)}
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': model_version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'files': files,
+        **(metadata or {}),
+    }
+    with open(os.path.join(temporary_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+
+    shutil.rmtree(bundle_dir, ignore_errors=True)
+    os.replace(temporary_dir, bundle_dir)
+    if activate:
+        _write_atomic(os.path.join(models_dir, CURRENT_FILENAME), model_version)
+    logger.info(f"Bundle de modèles {model_version} écrit dans {bundle_dir}")
+    return bundle_dir
+
+
+def resolve_bundle(path: str) -> str:
+    """Dossier du bundle: le chemin lui-même s'il contient un manifeste, sinon le bundle actif"""
+    if os.path.exists(os.path.join(path, MANIFEST_FILENAME)):
+        return path
+    current = os.path.join(path, CURRENT_FILENAME)
+    if os.path.exists(current):
+        with open(current, encoding='utf-8') as file:
+            return os.path.join(path, file.read().strip())
+    raise ArtifactError(f"Aucun bundle de modèles dans {path}")
+
+
+def has_legacy_models(path: str) -> bool:
+    return all(os.path.exists(os.path.join(path, filename)) for filename in LEGACY_FILENAMES)
+
+
+def load_bundle(path: str, mmap: bool = True, verify: bool = True) -> Tuple[Dict[str, object], Dict]:
+    """
+    Charge les modèles d'un bundle: retourne (modèles par nom, manifeste)
+    mmap: les tableaux numpy sont projetés en lecture seule au lieu d'être copiés
+    verify: contrôle les empreintes avant de charger
+    """
+    bundle_dir = resolve_bundle(path)
+    manifest_path = os.path.join(bundle_dir, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Manifeste illisible {manifest_path}: {e}")
+
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ArtifactError(f"Format de bundle non supporté: {manifest.get('format_version')}")
+
+    models = {}
+    for name in MODEL_NAMES:
+        entry = manifest['files'].get(name)
+        if entry is None:
+            raise ArtifactError(f"Modèle {name} absent du bundle {bundle_dir}")
+        file_path = os.path.join(bundle_dir, entry['filename'])
+        if verify and _sha256(file_path) != entry['sha256']:
+            raise ArtifactError(f"Empreinte invalide pour {file_path}")
+        models[name] = joblib.load(file_path, mmap_mode='r' if mmap else None)
+    return models, manifest
+
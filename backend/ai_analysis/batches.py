@@ -0,0 +1,285 @@
+"""
+Lots d'analyse asynchrones
+Les endpoints d'upload enregistrent les fichiers (AnalysisBatch, AnalysisBatchFile) et
+répondent 202 aussitôt; les processus de run_cv_workers traitent les fichiers comme une
+file (BatchFileQueue) et l'endpoint de statut lit la progression et les résultats partiels.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import scipy.sparse as sp
+
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .cache import hash_uploaded_file
+from .featurizer import featurize, vectorize
+from .models import AnalysisBatch, AnalysisBatchFile
+from .ranking import cosine_similarities
+from .work_queue import DEFAULT_PRIORITY, PermanentFailure, QueueSource
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'un fichier encore à traiter / traité
+OPEN_STATUSES = ('pending', 'processing', 'retrying')
+DONE_STATUSES = ('completed', 'failed')
+
+# Meilleurs CV par domaine dans la synthèse d'un lot 'bulk'
+SUMMARY_TOP_PER_DOMAIN = 10
+
+
+def ranking_score(batch: AnalysisBatch, result: Dict) -> Optional[float]:
+    """Score du classement de la synthèse pour un résultat (None: fichier non classé)"""
+    if result.get('status') != 'success':
+        return None
+    if batch.kind == 'job':
+        return result['similarity_score' if batch.parameters.get('ranking') == 'similarity' else 'job_match_score']
+    return result['quality_score']
+
+
+def create_batch(kind: str, cv_files, parameters: Dict, supported_extensions, user=None,
+                 priority: int = DEFAULT_PRIORITY) -> AnalysisBatch:
+    """
+    Enregistre les fichiers uploadés et les met en file
+    Un format non supporté est enregistré directement en échec (sans stocker le fichier)
+    """
+    with transaction.atomic():
+        batch = AnalysisBatch.objects.create(
+            kind=kind,
+            parameters=parameters,
+            total_files=len(cv_files),
+            created_by=user if user is not None and user.is_authenticated else None
+        )
+        rows = []
+        for position, cv_file in enumerate(cv_files):
+            row = AnalysisBatchFile(batch=batch, position=position, filename=cv_file.name[:255], priority=priority)
+            extension = cv_file.name.rsplit('.', 1)[-1].lower() if '.' in cv_file.name else ''
+            if f'.{extension}' not in supported_extensions:
+                row.status = 'failed'
+                row.error_message = 'Format de fichier non supporté'
+                row.completed_at = timezone.now()
+            else:
+                row.file_hash = hash_uploaded_file(cv_file)
+                row.file.save(cv_file.name, cv_file, save=False)
+            rows.append(row)
+        AnalysisBatchFile.objects.bulk_create(rows)
+        if not any(row.status == 'pending' for row in rows):
+            AnalysisBatch.objects.filter(pk=batch.pk).update(status='completed', completed_at=timezone.now())
+            batch.status = 'completed'
+    logger.info(f"Lot d'analyse {batch.id} créé ({kind}, {len(cv_files)} fichiers)")
+    return batch
+
+
+def _stored_source(field_file):
+    """Chemin du fichier stocké, ou son contenu si le stockage n'a pas de chemin local"""
+    try:
+        return field_file.path
+    except NotImplementedError:
+        with field_file.open('rb') as stored:
+            return stored.read()
+
+
+class BatchFileQueue(QueueSource):
+    """
+    Fichiers des lots d'analyse (AnalysisBatchFile)
+    Même cascade que l'analyse synchrone pour un poste: extraction, filtres d'expérience et
+    de compétences, classification des seuls fichiers retenus, score de correspondance
+    """
+
+    name = 'lots'
+    queue_model = AnalysisBatchFile
+    select_related = ('batch',)
+
+    def __init__(self, cache=None, job_profiles=None):
+        self.cache = cache
+        self.job_profiles = job_profiles
+
+    def describe(self, item):
+        return f"Lot {item.batch_id}, fichier {item.filename}"
+
+    def process(self, model, items):
+        AnalysisBatch.objects.filter(pk__in={item.batch_id for item in items}, started_at=None).update(
+            status='processing', started_at=timezone.now()
+        )
+        outcomes = {}
+        by_batch = {}
+        for item in items:
+            by_batch.setdefault(item.batch_id, []).append(item)
+        for batch_items in by_batch.values():
+            outcomes.update(self._process_batch(model, batch_items[0].batch, batch_items))
+        return outcomes
+
+    def _profile(self, batch: AnalysisBatch):
+        if batch.kind != 'job' or self.job_profiles is None:
+            return None
+        return self.job_profiles.for_fields(**batch.parameters['job'])
+
+    def _process_batch(self, model, batch: AnalysisBatch, items: List[AnalysisBatchFile]) -> Dict[int, Optional[str]]:
+        outcomes = {}
+        texts = {}
+        analyses = {}
+
+        # Étape 1: texte (et analyse) depuis le cache, sinon extraction
+        cache_version = model.cache_version
+        cached = self.cache.get_many([item.file_hash for item in items if item.file_hash], cache_version) if self.cache else {}
+        to_extract = []
+        for item in items:
+            if item.file_hash in cached:
+                texts[item.pk] = cached[item.file_hash]['text']
+                analyses[item.pk] = cached[item.file_hash]['analysis']
+            else:
+                to_extract.append(item)
+        extracted = model.pool.extract_files([(_stored_source(item.file), item.filename) for item in to_extract])
+        for item, result in zip(to_extract, extracted):
+            if result['status'] == 'success':
+                texts[item.pk] = result['text']
+            elif result.get('empty'):
+                # PDF illisible ou sans texte: une nouvelle tentative donnerait le même résultat
+                outcomes[item.pk] = PermanentFailure(result['error'])
+            else:
+                outcomes[item.pk] = result['error']
+
+        # Étape 2: filtres du poste
+        profile = self._profile(batch)
+        min_skills_match = batch.parameters.get('min_skills_match', 0)
+        results = {}
+        features = {}
+        matched = {}
+        for item in items:
+            if item.pk not in texts:
+                continue
+            features[item.pk] = feature = featurize(texts[item.pk])
+            if profile is None:
+                continue
+            if item.pk in analyses:
+                experience = analyses[item.pk]['experience_years']
+            else:
+                experience = int(model.analyzer.processor.extract_profile(feature.text, feature.text_lower)['experience_years'])
+            if not profile.accepts_experience(experience):
+                results[item.pk] = {'filename': item.filename, 'status': 'rejected', 'rejected': 'experience',
+                                    'experience_years': experience}
+                continue
+            matched[item.pk] = profile.match_skills(feature)
+            if not profile.accepts_skills(matched[item.pk], min_skills_match):
+                results[item.pk] = {'filename': item.filename, 'status': 'rejected', 'rejected': 'skills',
+                                    'experience_years': experience}
+
+        # Étape 3: classification des fichiers retenus qui n'ont pas d'analyse en cache
+        # (depuis les jetons de l'étape 2; la ligne TF-IDF de chaque CV est gardée pour la similarité)
+        to_classify = [item for item in items if item.pk in features and item.pk not in results and item.pk not in analyses]
+        new_entries = []
+        vectors = {}
+        for item, outcome in zip(to_classify, model.pool.analyze_features([features[item.pk] for item in to_classify])):
+            if outcome['status'] == 'error':
+                outcomes[item.pk] = outcome['error']
+                continue
+            analyses[item.pk] = outcome['analysis']
+            vectors[item.pk] = outcome['vector']
+            if item.file_hash:
+                new_entries.append((item.file_hash, texts[item.pk], outcome['analysis']))
+        if self.cache is not None:
+            self.cache.set_many(new_entries, cache_version)
+
+        # Étape 4: score de correspondance et similarité avec le poste
+        scored = [item for item in items if item.pk in analyses and item.pk not in results and item.pk in features]
+        similarities = [None] * len(scored)
+        if profile is not None and scored:
+            # Seuls les CV servis par le cache sont vectorisés ici
+            from_cache = [item for item in scored if item.pk not in vectors]
+            if from_cache:
+                cached_vectors = sp.csr_matrix(vectorize(model.analyzer.vectorizer, [features[item.pk] for item in from_cache]))
+                for row, item in enumerate(from_cache):
+                    vectors[item.pk] = cached_vectors[row]
+            cv_vectors = sp.vstack([vectors[item.pk] for item in scored], format='csr')
+            similarities = cosine_similarities(cv_vectors, profile.vector(model.analyzer))[:, 0]
+        for item, similarity in zip(scored, similarities):
+            result = dict(analyses[item.pk], filename=item.filename, status='success',
+                          confidence=analyses[item.pk]['domain_confidence'])
+            if profile is not None:
+                result['matched_skills'] = matched[item.pk]
+                result['job_match_score'] = profile.score(features[item.pk], result['experience_years'], matched[item.pk])
+                result['similarity_score'] = round(float(similarity) * 100, 2)
+            results[item.pk] = result
+
+        for item in items:
+            if item.pk in results:
+                result = results[item.pk]
+                AnalysisBatchFile.objects.filter(pk=item.pk).update(
+                    result=result, domain=result.get('domain', ''), score=ranking_score(batch, result)
+                )
+                outcomes[item.pk] = None
+        return outcomes
+
+    def finish(self, items):
+        # Fichiers traités: le résultat est enregistré, le fichier stocké n'est plus utile
+        for done in AnalysisBatchFile.objects.filter(pk__in=[item.pk for item in items], status__in=DONE_STATUSES).exclude(file=''):
+            done.file.delete(save=False)
+            AnalysisBatchFile.objects.filter(pk=done.pk).update(file='')
+
+        for batch_id in {item.batch_id for item in items}:
+            if not AnalysisBatchFile.objects.filter(batch_id=batch_id, status__in=OPEN_STATUSES).exists():
+                AnalysisBatch.objects.filter(pk=batch_id).exclude(status='completed').update(
+                    status='completed', completed_at=timezone.now()
+                )
+
+
+def batch_progress(batch: AnalysisBatch) -> Dict:
+    """Comptes par statut, pourcentage et estimation du temps restant (débit observé)"""
+    counts = dict(batch.files.values_list('status').annotate(count=Count('id')))
+    done = sum(counts.get(status, 0) for status in DONE_STATUSES)
+    remaining = batch.total_files - done
+
+    eta_seconds = None
+    if remaining == 0:
+        eta_seconds = 0
+    elif batch.started_at is not None:
+        processed = batch.files.filter(status__in=DONE_STATUSES, started_at__isnull=False).count()
+        elapsed = (timezone.now() - batch.started_at).total_seconds()
+        if processed and elapsed > 0:
+            eta_seconds = round(remaining * elapsed / processed, 1)
+
+    return {
+        'total': batch.total_files,
+        'pending': counts.get('pending', 0) + counts.get('retrying', 0),
+        'processing': counts.get('processing', 0),
+        'completed': counts.get('completed', 0),
+        'failed': counts.get('failed', 0),
+        'done': done,
+        'percent': round(done * 100 / batch.total_files, 1) if batch.total_files else 100.0,
+        'eta_seconds': eta_seconds,
+    }
+
+
+def file_result(row: Dict) -> Dict:
+    """Résultat d'un fichier de lot au format des réponses synchrones"""
+    if row['status'] == 'failed':
+        return {'filename': row['filename'], 'status': 'error', 'error': row['error_message']}
+    return row['result']
+
+
+def batch_summary(batch: AnalysisBatch) -> Dict:
+    """
+    Synthèse des résultats déjà disponibles
+    Lot 'job': top_n candidats selon le mode de classement; lot 'bulk': meilleurs CV par domaine
+    Le classement est fait par la base (colonne score): seuls les résultats affichés sont lus,
+    quelle que soit la taille du lot. À score égal, le premier fichier uploadé est devant.
+    """
+    ranked = batch.files.filter(status='completed', score__isnull=False)
+    if batch.kind == 'job':
+        top_n = batch.parameters.get('top_n', 10)
+        return {'ranked_candidates': list(
+            ranked.order_by('-score', 'position').values_list('result', flat=True)[:top_n]
+        )}
+
+    summary = {
+        domain: {'count': count, 'top_candidates': []}
+        for domain, count in ranked.values_list('domain').annotate(count=Count('id')).order_by('domain')
+    }
+    top_rows = ranked.annotate(
+        rank=Window(RowNumber(), partition_by=F('domain'), order_by=[F('score').desc(), F('position').asc()])
+    ).filter(rank__lte=SUMMARY_TOP_PER_DOMAIN).order_by('domain', 'rank').values_list('domain', 'result')
+    for domain, result in top_rows:
+        summary[domain]['top_candidates'].append(result)
+    return {'summary': summary}
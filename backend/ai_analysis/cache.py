@@ -0,0 +1,171 @@
+"""
+Cache adressé par contenu des extractions et analyses de CV
+Clé: (SHA-256 des octets du fichier, version du cache de l'analyseur: modèle, format,
+compétences et budgets d'extraction)
+"""
+import time
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import CVCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def hash_uploaded_file(uploaded_file) -> str:
+    """Calcule l'empreinte SHA-256 d'un fichier uploadé sans le copier"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+class CVResultCache:
+    """
+    Cache persistant (base de données) avec éviction LRU bornée en taille
+    La taille totale est suivie approximativement (écritures du processus) et recalculée
+    au plus toutes les evict_interval secondes, ou dès que l'estimation dépasse la borne;
+    la date de dernier accès d'une entrée n'est mise à jour qu'après touch_interval secondes
+    """
+
+    def __init__(self, max_bytes: int = 200 * 1024 * 1024, enabled: bool = True,
+                 evict_interval: float = 60.0, touch_interval: float = 300.0):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.evict_interval = evict_interval
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._approx_bytes = None
+        self._evicted_at = float('-inf')
+
+    def _record(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_many(self, file_hashes: Iterable[str], model_version: str) -> Dict[str, Dict]:
+        """
+        Retourne {empreinte: {'text', 'analysis'}} pour les entrées présentes
+        """
+        file_hashes = list(file_hashes)
+        if not self.enabled or not model_version or not file_hashes:
+            return {}
+
+        try:
+            entries = CVCacheEntry.objects.filter(
+                model_version=model_version,
+                file_hash__in=set(file_hashes)
+            ).values('id', 'file_hash', 'extracted_text', 'analysis', 'last_accessed_at')
+            found = {}
+            stale_ids = []
+            touch_before = timezone.now() - timedelta(seconds=self.touch_interval)
+            for entry in entries:
+                found[entry['file_hash']] = {'text': entry['extracted_text'], 'analysis': entry['analysis']}
+                if entry['last_accessed_at'] < touch_before:
+                    stale_ids.append(entry['id'])
+            # Ordre LRU à touch_interval près: pas d'écriture pour les entrées lues récemment
+            if stale_ids:
+                CVCacheEntry.objects.filter(id__in=stale_ids).update(
+                    last_accessed_at=timezone.now(), hit_count=F('hit_count') + 1
+                )
+        except Exception as e:
+            logger.error(f"Erreur de lecture du cache d'analyse: {e}")
+            found = {}
+
+        hits = sum(1 for file_hash in file_hashes if file_hash in found)
+        self._record(hits, len(file_hashes) - hits)
+        return found
+
+    def get(self, file_hash: str, model_version: str) -> Optional[Dict]:
+        return self.get_many([file_hash], model_version).get(file_hash)
+
+    def set_many(self, entries: List[Tuple[str, str, Dict]], model_version: str):
+        """
+        Enregistre une liste de (empreinte, texte, analyse) puis applique l'éviction
+        """
+        if not self.enabled or not model_version or not entries:
+            return
+
+        objects = {}
+        for file_hash, text, analysis in entries:
+            size_bytes = len(text.encode('utf-8')) + len(json.dumps(analysis, default=str))
+            objects[file_hash] = CVCacheEntry(
+                file_hash=file_hash,
+                model_version=model_version,
+                extracted_text=text,
+                analysis=analysis,
+                size_bytes=size_bytes
+            )
+
+        try:
+            with transaction.atomic():
+                CVCacheEntry.objects.bulk_create(objects.values(), ignore_conflicts=True)
+            if self._evict_due(sum(entry.size_bytes for entry in objects.values())):
+                self.evict()
+        except Exception as e:
+            logger.error(f"Erreur d'écriture du cache d'analyse: {e}")
+
+    def set(self, file_hash: str, text: str, analysis: Dict, model_version: str):
+        self.set_many([(file_hash, text, analysis)], model_version)
+
+    def _evict_due(self, added_bytes: int) -> bool:
+        """Ajoute les octets écrits à l'estimation; True si la taille réelle doit être vérifiée"""
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += added_bytes
+            return (
+                self._approx_bytes is None
+                or self._approx_bytes > self.max_bytes
+                or time.monotonic() - self._evicted_at >= self.evict_interval
+            )
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de la taille maximale"""
+        total = CVCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+        with self._lock:
+            self._approx_bytes = min(total, self.max_bytes)
+            self._evicted_at = time.monotonic()
+        if total <= self.max_bytes:
+            return
+
+        to_free = total - self.max_bytes
+        evicted_ids = []
+        for entry_id, size_bytes in CVCacheEntry.objects.order_by('last_accessed_at').values_list('id', 'size_bytes').iterator():
+            evicted_ids.append(entry_id)
+            to_free -= size_bytes
+            if to_free <= 0:
+                break
+
+        CVCacheEntry.objects.filter(id__in=evicted_ids).delete()
+        logger.info(f"Cache d'analyse: {len(evicted_ids)} entrées évincées")
+
+    def stats(self) -> Dict:
+        """Statistiques du cache (compteurs du processus courant)"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        stats = {
+            'enabled': self.enabled,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'max_bytes': self.max_bytes,
+        }
+        try:
+            totals = CVCacheEntry.objects.aggregate(size_bytes=Sum('size_bytes'))
+            stats['entries'] = CVCacheEntry.objects.count()
+            stats['size_bytes'] = totals['size_bytes'] or 0
+        except Exception as e:
+            logger.error(f"Erreur de lecture des statistiques du cache: {e}")
+        return stats
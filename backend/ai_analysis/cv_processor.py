@@ -3,139 +3,289 @@ CV Processor - Extraction et traitement de texte des CV
 Système d'IA pour l'analyse et le filtrage automatique des CV
 """
 import os
+import io
 import re
+import contextlib
+from datetime import date
 import PyPDF2
 import docx
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Union
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.svm import SVC
+from sklearn.linear_model import SGDClassifier
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.dummy import DummyClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 import nltk
 import pickle
+import hashlib
 import logging
+from .skill_matcher import SkillMatcher, default_skill_matcher
+from .featurizer import CVFeatures, compact_vectorizer, featurize, vectorize
+from .dataset import DatasetManifest, extract_dataset_texts, list_dataset_files
+from .parallel import CVWorkerPool
+from .artifacts import ArtifactError, has_legacy_models, load_bundle, save_bundle
+from .quality_models import (
+    AUTO_BACKEND, benchmark_quality_backends, make_quality_classifier, select_quality_backend
+)
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Version du format des résultats d'analyse (à incrémenter quand il change)
+ANALYSIS_FORMAT_VERSION = 3
+
+# Classes du classificateur de qualité
+QUALITY_CLASSES = np.array(['bon', 'moyen'])
+
+# Source d'un CV: chemin, octets en mémoire ou objet fichier binaire
+CVSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+# Motif unique de l'extracteur de profil (sections, expérience, périodes, diplômes)
+_YEAR = r'(?:19|20)\d{2}'
+_DEGREES = (
+    r"master|licence|bachelor|doctorat|ph\.?d|mba|bts|dut|baccalaur[ée]at|dipl[ôo]me"
+    r"|bac\s*\+\s*\d|associate\s+degree|high\s+school"
+)
+PROFILE_PATTERN = re.compile(
+    r"(?P<experience_section>^[ \t]*(?:exp[ée]riences?(?:\s+professionnelles?)?|work\s+experience"
+    r"|professional\s+experience|employment(?:\s+history)?)[ \t]*:?[ \t]*$)"
+    r"|(?P<education_section>^[ \t]*(?:formations?|education|[ée]tudes|dipl[ôo]mes)[ \t]*:?[ \t]*$)"
+    r"|(?<!\d)(?P<years>\d{1,2})\s*(?:ans?|ann[ée]es?|years?)\s*(?:d['’]?\s*|of\s+)?exp[ée]rience"
+    r"|exp[ée]rience\s*:\s*(?P<years_after>\d{1,2})\s*(?:ans?|ann[ée]es?|years?)"
+    r"|\b(?:\d{1,2}[/.])?(?P<start>" + _YEAR + r")\s*(?:-|–|—|à|au|to|until)\s*(?:\d{1,2}[/.])?"
+    r"(?P<end>" + _YEAR + r"|pr[ée]sent|aujourd['’]hui|actuel(?:lement)?|current|now|today)\b"
+    r"|\b(?P<degree>" + _DEGREES + r")\b",
+    re.MULTILINE
+)
+DEGREE_PATTERN = re.compile(r"\b(?P<degree>" + _DEGREES + r")\b")
+
+
+def upload_source(uploaded_file) -> CVSource:
+    """
+    Source de lecture d'un UploadedFile Django, sans copie:
+    chemin du fichier temporaire existant pour TemporaryUploadedFile,
+    tampon en mémoire pour InMemoryUploadedFile
+    """
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file.file
+
+
 class CVProcessor:
     """
     Processeur de CV pour extraction de texte et analyse
     """
     
-    def __init__(self):
+    def __init__(self, max_pdf_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                 skill_matcher_provider: Optional[Callable[[], SkillMatcher]] = None):
         self.supported_formats = ['.pdf', '.docx', '.doc', '.txt']
-        
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extrait le texte d'un fichier PDF"""
+        # Budget d'extraction PDF (None = pas de limite)
+        self.max_pdf_pages = max_pdf_pages
+        self.max_chars = max_chars
+        # Fournisseur de l'automate de compétences (liste intégrée par défaut)
+        self.skill_matcher_provider = skill_matcher_provider or default_skill_matcher
+    
+    @staticmethod
+    def _open_binary(source: CVSource):
+        """
+        Ouvre une source en lecture binaire sans copie supplémentaire:
+        chemin sur disque, octets en mémoire ou objet fichier déjà ouvert
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return open(source, 'rb')
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return io.BytesIO(source)
+        source.seek(0)
+        return contextlib.nullcontext(source)
+    
+    @staticmethod
+    def _describe(source: CVSource) -> str:
+        if isinstance(source, (str, os.PathLike)):
+            return str(source)
+        return getattr(source, 'name', None) or '<mémoire>'
+        
+    @staticmethod
+    def iter_pdf_pages(reader: PyPDF2.PdfReader, max_pages: Optional[int] = None) -> Iterator[str]:
+        """Génère le texte des pages une par une, les pages suivantes ne sont pas analysées"""
+        for index, page in enumerate(reader.pages):
+            if max_pages is not None and index >= max_pages:
+                break
+            yield page.extract_text() or ""
+    
+    def extract_text_from_pdf(self, source: CVSource, max_pages: Optional[int] = None,
+                              max_chars: Optional[int] = None) -> str:
+        """
+        Extrait le texte d'un fichier PDF page par page
+        S'arrête dès que le budget de pages ou de caractères est atteint
+        """
+        max_pages = self.max_pdf_pages if max_pages is None else max_pages
+        max_chars = self.max_chars if max_chars is None else max_chars
         try:
-            with open(file_path, 'rb') as file:
+            with self._open_binary(source) as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+                pages = []
+                collected = 0
+                for page_text in self.iter_pdf_pages(reader, max_pages):
+                    pages.append(page_text)
+                    collected += len(page_text) + 1
+                    if max_chars is not None and collected >= max_chars:
+                        break
+                return "\n".join(pages).strip()
         except Exception as e:
-            logger.error(f"Erreur lors de l'extraction PDF {file_path}: {e}")
+            logger.error(f"Erreur lors de l'extraction PDF {self._describe(source)}: {e}")
             return ""
     
-    def extract_text_from_docx(self, file_path: str) -> str:
+    def extract_text_from_docx(self, source: CVSource) -> str:
         """Extrait le texte d'un fichier DOCX"""
         try:
-            doc = docx.Document(file_path)
+            with self._open_binary(source) as file:
+                doc = docx.Document(file)
             text = ""
             for paragraph in doc.paragraphs:
                 text += paragraph.text + "\n"
             return text.strip()
         except Exception as e:
-            logger.error(f"Erreur lors de l'extraction DOCX {file_path}: {e}")
+            logger.error(f"Erreur lors de l'extraction DOCX {self._describe(source)}: {e}")
             return ""
     
-    def extract_text_from_txt(self, file_path: str) -> str:
+    def extract_text_from_txt(self, source: CVSource) -> str:
         """Extrait le texte d'un fichier TXT"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read().strip()
+            with self._open_binary(source) as file:
+                return file.read().decode('utf-8').strip()
         except Exception as e:
-            logger.error(f"Erreur lors de l'extraction TXT {file_path}: {e}")
+            logger.error(f"Erreur lors de l'extraction TXT {self._describe(source)}: {e}")
             return ""
     
-    def extract_text(self, file_path: str) -> str:
-        """Extrait le texte selon le format du fichier"""
-        _, ext = os.path.splitext(file_path.lower())
+    def extract_text(self, source: CVSource, filename: Optional[str] = None) -> str:
+        """
+        Extrait le texte selon le format du fichier
+        La source peut être un chemin, des octets ou un objet fichier;
+        le format est déterminé par filename, ou à défaut par le nom de la source
+        """
+        _, ext = os.path.splitext((filename or self._describe(source)).lower())
         
         if ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_text_from_pdf(source)
         elif ext in ['.docx', '.doc']:
-            return self.extract_text_from_docx(file_path)
+            return self.extract_text_from_docx(source)
         elif ext == '.txt':
-            return self.extract_text_from_txt(file_path)
+            return self.extract_text_from_txt(source)
         else:
             logger.warning(f"Format non supporté: {ext}")
             return ""
     
+    def extract_text_from_upload(self, uploaded_file) -> str:
+        """
+        Extrait le texte d'un UploadedFile Django sans fichier temporaire:
+        les fichiers en mémoire sont lus directement depuis leur tampon,
+        les gros fichiers depuis leur emplacement temporaire existant
+        """
+        return self.extract_text(upload_source(uploaded_file), filename=uploaded_file.name)
+    
     def clean_text(self, text: str) -> str:
-        """Nettoie et normalise le texte"""
-        # Supprimer les caractères spéciaux et normaliser
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.lower().strip()
+        """Nettoie et normalise le texte (mots en minuscules séparés par une espace)"""
+        return featurize(text).cleaned
     
     def extract_skills(self, text: str) -> List[str]:
-        """Extrait les compétences techniques du CV"""
-        # Liste des compétences techniques communes
-        technical_skills = [
-            # Programmation
-            'python', 'java', 'javascript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-            'html', 'css', 'sql', 'r', 'matlab', 'scala', 'kotlin', 'swift',
-            
-            # Frameworks et librairies
-            'django', 'flask', 'react', 'angular', 'vue', 'node.js', 'express',
-            'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy',
-            
-            # Bases de données
-            'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
-            
-            # Outils et technologies
-            'docker', 'kubernetes', 'aws', 'azure', 'git', 'jenkins', 'linux',
-            'apache', 'nginx', 'hadoop', 'spark',
-            
-            # Méthodologies
-            'agile', 'scrum', 'devops', 'ci/cd', 'machine learning', 'deep learning',
-            'data science', 'big data', 'intelligence artificielle'
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        
-        for skill in technical_skills:
-            if skill in text_lower:
-                found_skills.append(skill)
+        """Extrait les compétences techniques du CV en une seule passe"""
+        return self.skill_matcher_provider().find_all(text)
+    
+    def extract_skills_from_features(self, features: CVFeatures) -> List[str]:
+        """Compétences d'un CV déjà tokenisé (mêmes résultats que extract_skills)"""
+        return self.skill_matcher_provider().find_in_tokens(features.token_set, features.text_lower)
+    
+    def extract_profile(self, text: str, text_lower: Optional[str] = None) -> Dict:
+        """
+        Extrait l'expérience et la formation en un seul parcours du texte
+        Combine les mentions explicites ("5 ans d'expérience") et les périodes
+        datées ("2015 – 2020"), dont les chevauchements ne sont comptés qu'une fois
+        text_lower: texte déjà mis en minuscules (CVFeatures), évite une copie
+        """
+        if text_lower is None:
+            text_lower = text.lower()
+        # Le contexte est pris dans le texte d'origine quand les positions concordent
+        source = text if len(text) == len(text_lower) else text_lower
+        current_year = date.today().year
+        section = None
+        stated_years = 0
+        experience = []
+        education = {}
+        
+        def line_bounds(position):
+            line_start = text_lower.rfind('\n', 0, position) + 1
+            line_end = text_lower.find('\n', position)
+            return line_start, len(text_lower) if line_end == -1 else line_end
+        
+        for match in PROFILE_PATTERN.finditer(text_lower):
+            if match.group('experience_section'):
+                section = 'experience'
+            elif match.group('education_section'):
+                section = 'education'
+            elif match.group('years') or match.group('years_after'):
+                stated_years = max(stated_years, int(match.group('years') or match.group('years_after')))
+            elif match.group('start'):
+                start_year = int(match.group('start'))
+                end = match.group('end')
+                end_year = int(end) if end.isdigit() else current_year
+                if start_year > end_year or end_year > current_year + 1:
+                    continue
+                
+                line_start, line_end = line_bounds(match.start())
+                context = source[line_start:line_end].strip()[:200]
+                degree = DEGREE_PATTERN.search(text_lower, line_start, line_end)
+                
+                if section == 'education' or degree:
+                    entry = education.setdefault(line_start, {'degree': None, 'context': context})
+                    entry.update(start=start_year, end=end_year)
+                    if degree and not entry['degree']:
+                        entry['degree'] = degree.group('degree')
+                else:
+                    experience.append({
+                        'start': start_year,
+                        'end': end_year,
+                        'years': end_year - start_year,
+                        'context': context
+                    })
+            elif match.group('degree') and section != 'experience':
+                # Un diplôme cité dans une section d'expérience n'est pas une formation
+                line_start, line_end = line_bounds(match.start())
+                entry = education.setdefault(line_start, {
+                    'degree': None,
+                    'context': source[line_start:line_end].strip()[:200]
+                })
+                if not entry['degree']:
+                    entry['degree'] = match.group('degree')
+        
+        # Somme des périodes sans chevauchement
+        dated_years = 0
+        current_start = current_end = None
+        for start_year, end_year in sorted((period['start'], period['end']) for period in experience):
+            if current_end is None or start_year > current_end:
+                if current_end is not None:
+                    dated_years += current_end - current_start
+                current_start, current_end = start_year, end_year
+            else:
+                current_end = max(current_end, end_year)
+        if current_end is not None:
+            dated_years += current_end - current_start
         
-        return found_skills
+        return {
+            'experience_years': max(stated_years, dated_years),
+            'experience': experience,
+            'education': list(education.values())
+        }
     
     def extract_experience_years(self, text: str) -> int:
         """Extrait le nombre d'années d'expérience"""
-        # Recherche de patterns d'expérience
-        patterns = [
-            r'(\d+)\s*an[s]?\s*d[\']?experience',
-            r'(\d+)\s*annee[s]?\s*d[\']?experience',
-            r'experience\s*:\s*(\d+)\s*an[s]?',
-            r'(\d+)\s*years?\s*of\s*experience',
-            r'(\d+)\s*years?\s*experience'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                return int(match.group(1))
-        
-        return 0
+        return self.extract_profile(text)['experience_years']
     
     def categorize_domain(self, text: str, skills: List[str]) -> str:
         """Catégorise le domaine professionnel"""
@@ -193,62 +343,78 @@ class CVAnalyzer:
     Analyseur IA pour le filtrage et la classification des CV
     """
     
-    def __init__(self):
-        self.processor = CVProcessor()
+    def __init__(self, max_pdf_pages: Optional[int] = None, max_text_chars: Optional[int] = None,
+                 skill_matcher_provider: Optional[Callable[[], SkillMatcher]] = None,
+                 quality_backend: str = AUTO_BACKEND, quality_latency_budget_ms: Optional[float] = None):
+        self.processor = CVProcessor(
+            max_pdf_pages=max_pdf_pages,
+            max_chars=max_text_chars,
+            skill_matcher_provider=skill_matcher_provider
+        )
         self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
         self.domain_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.quality_classifier = SVC(kernel='rbf', random_state=42)
+        # Backend du modèle de qualité (voir quality_models.QUALITY_BACKENDS, ou 'auto')
+        self.quality_backend = quality_backend
+        self.quality_latency_budget_ms = quality_latency_budget_ms
+        self.quality_classifier = make_quality_classifier(quality_backend)
+        self.quality_benchmark = []
+        # Exactitude du classificateur de domaines sur le jeu de test du dernier entraînement
+        self.domain_accuracy = None
         self.is_trained = False
-        
-    def process_cv_dataset(self, dataset_path: str) -> pd.DataFrame:
-        """Traite un dataset de CV et extrait les features"""
+        self.model_version = None
+        
+    def process_cv_dataset(self, dataset_path: str, max_per_domain: Optional[int] = 50, sampling: str = 'first',
+                           seed: int = 42, workers: Optional[int] = None,
+                           manifest_path: Optional[str] = None) -> pd.DataFrame:
+        """
+        Traite un dataset de CV et extrait les features
+        - max_per_domain / sampling / seed: politique d'échantillonnage par domaine (None ou 0 = tous les CV)
+        - workers: nombre de processus d'extraction (None = nombre de coeurs)
+        - manifest_path: manifeste des textes déjà extraits, seuls les PDF nouveaux ou modifiés sont relus
+        """
+        files = list_dataset_files(dataset_path, max_per_domain=max_per_domain, sampling=sampling, seed=seed)
+        manifest = DatasetManifest(manifest_path, extraction_options={
+            'max_pdf_pages': self.processor.max_pdf_pages,
+            'max_chars': self.processor.max_chars
+        })
+
+        # Extraction parallèle des seuls fichiers nouveaux ou modifiés
+        pool = CVWorkerPool(self, max_workers=workers, batch_size=16)
+        try:
+            texts = extract_dataset_texts(pool, dataset_path, [path for _, path in files], manifest)
+        finally:
+            pool.shutdown()
+        logger.info(f"📄 {len(files)} CV sélectionnés, {len(texts)} textes disponibles")
+
+        manifest.prune(dataset_path)
+        manifest.save()
+
         cv_data = []
-        
-        # Parcourir tous les dossiers de domaines
-        for domain_folder in os.listdir(dataset_path):
-            domain_path = os.path.join(dataset_path, domain_folder)
-            
-            if not os.path.isdir(domain_path):
+        for domain_folder, relative_path in files:
+            text = texts.get(relative_path)
+            if not text:
                 continue
-                
-            logger.info(f"📁 Traitement du domaine: {domain_folder}")
             
-            # Parcourir tous les fichiers CV dans ce domaine
-            cv_files = [f for f in os.listdir(domain_path) if f.endswith('.pdf')]
+            # Nettoyage du texte et extraction des features sur une seule tokenisation
+            features = featurize(text)
+            cleaned_text = features.cleaned
+            skills = self.processor.extract_skills_from_features(features)
+            experience_years = self.processor.extract_profile(text, features.text_lower)['experience_years']
             
-            for i, file in enumerate(cv_files):
-                if i >= 50:  # Limiter à 50 CV par domaine pour l'entraînement initial
-                    break
-                    
-                file_path = os.path.join(domain_path, file)
-                logger.info(f"📄 Traitement du CV: {file} ({i+1}/{min(50, len(cv_files))})")
-                
-                # Extraction du texte
-                text = self.processor.extract_text(file_path)
-                if not text:
-                    continue
-                
-                # Nettoyage du texte
-                cleaned_text = self.processor.clean_text(text)
-                
-                # Extraction des features
-                skills = self.processor.extract_skills(text)
-                experience_years = self.processor.extract_experience_years(text)
-                
-                # Utiliser le nom du dossier comme domaine
-                domain = domain_folder.lower().replace('-', '_')
-                
-                cv_data.append({
-                    'filename': file,
-                    'text': cleaned_text,
-                    'raw_text': text,
-                    'skills': skills,
-                    'skills_count': len(skills),
-                    'experience_years': experience_years,
-                    'domain': domain,
-                    'word_count': len(cleaned_text.split()),
-                    'file_path': file_path
-                })
+            # Utiliser le nom du dossier comme domaine
+            domain = domain_folder.lower().replace('-', '_')
+            
+            cv_data.append({
+                'filename': os.path.basename(relative_path),
+                'text': cleaned_text,
+                'raw_text': text,
+                'skills': skills,
+                'skills_count': len(skills),
+                'experience_years': experience_years,
+                'domain': domain,
+                'word_count': features.word_count,
+                'file_path': os.path.join(dataset_path, relative_path)
+            })
         
         return pd.DataFrame(cv_data)
     
@@ -275,6 +441,7 @@ class CVAnalyzer:
                 
                 # Évaluation
                 y_pred = self.domain_classifier.predict(X_test)
+                self.domain_accuracy = float(accuracy_score(y_test, y_pred))
                 logger.info("Classification des domaines:")
                 logger.info(classification_report(y_test, y_pred))
             except ValueError as e:
@@ -302,13 +469,30 @@ class CVAnalyzer:
         
         # Entraînement du classificateur de qualité seulement si plusieurs classes
         unique_quality = set(quality_labels)
+        self.quality_benchmark = []
         if len(unique_quality) > 1:
+            selected = None
             try:
                 X_train, X_test, y_train, y_test = train_test_split(
                     X, quality_labels, test_size=0.2, random_state=42
                 )
                 
-                self.quality_classifier.fit(X_train, y_train)
+                # Benchmark des backends (exactitude, latence p50/p99 par CV) sur le même découpage
+                self.quality_benchmark = benchmark_quality_backends(X_train, y_train, X_test, y_test)
+                if self.quality_backend == AUTO_BACKEND:
+                    selected = select_quality_backend(self.quality_benchmark, self.quality_latency_budget_ms)
+                else:
+                    selected = next(
+                        (result for result in self.quality_benchmark if result['backend'] == self.quality_backend),
+                        None
+                    )
+                if selected is None:
+                    raise ValueError("aucun backend de qualité n'a pu être entraîné")
+                self.quality_classifier = selected['model']
+                logger.info(
+                    f"Modèle de qualité: {selected['backend']} "
+                    f"(exactitude {selected['accuracy']:.3f}, p99 {selected['p99_ms']:.3f} ms)"
+                )
                 
                 # Évaluation
                 y_pred = self.quality_classifier.predict(X_test)
@@ -316,53 +500,188 @@ class CVAnalyzer:
                 logger.info(classification_report(y_test, y_pred))
             except ValueError as e:
                 logger.warning(f"Impossible de diviser le dataset pour l'entraînement de la qualité: {e}")
-                # Entraîner sur tout le dataset
+                # Entraîner sur tout le dataset le backend retenu (sinon celui de la configuration)
+                backend = selected['backend'] if selected is not None else self.quality_backend
+                self.quality_classifier = make_quality_classifier(backend)
                 self.quality_classifier.fit(X, quality_labels)
         else:
-            logger.info("Une seule classe de qualité détectée, entraînement simple...")
+            # Les backends de qualité exigent deux classes: la seule classe observée est prédite
+            logger.info("Une seule classe de qualité détectée, prédiction constante de cette classe")
+            self.quality_classifier = DummyClassifier(strategy='most_frequent')
             self.quality_classifier.fit(X, quality_labels)
         
         self.is_trained = True
+        self.model_version = self._compute_model_version([
+            pickle.dumps(model) for model in (self.vectorizer, self.domain_classifier, self.quality_classifier)
+        ])
         logger.info("Entraînement terminé avec succès!")
         
         return cv_dataframe
     
-    def analyze_cv(self, cv_text: str) -> Dict:
-        """Analyse un CV individuel"""
+    @property
+    def is_incremental(self) -> bool:
+        """Modèles entraînables par mini-lots (vectoriseur par hachage et partial_fit)"""
+        return isinstance(self.vectorizer, HashingVectorizer) and hasattr(self.domain_classifier, 'partial_fit')
+    
+    def use_incremental_models(self, n_features: int = 2 ** 18):
+        """
+        Remplace les modèles par leurs équivalents incrémentaux:
+        vectoriseur par hachage sans état et classifieurs linéaires SGD
+        """
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, stop_words='english'
+        )
+        # log_loss: probabilités disponibles pour la confiance du domaine
+        self.domain_classifier = SGDClassifier(loss='log_loss', random_state=42)
+        self.quality_classifier = SGDClassifier(loss='hinge', random_state=42)
+        self.is_trained = False
+        self.model_version = None
+    
+    def partial_fit(self, raw_texts: List[str], domains: List[str], domain_classes: Optional[List[str]] = None) -> int:
+        """
+        Entraîne les modèles incrémentaux sur un mini-lot de CV
+        domain_classes est obligatoire au premier lot; ensuite les CV d'un domaine inconnu sont ignorés
+        Retourne le nombre de CV utilisés
+        """
+        if not self.is_incremental:
+            raise ValueError("Les modèles ne sont pas incrémentaux, utilisez use_incremental_models()")
+        
+        first_batch = not hasattr(self.domain_classifier, 'classes_')
+        if first_batch and not domain_classes:
+            raise ValueError("Les domaines possibles doivent être fournis pour le premier lot")
+        
+        if not first_batch:
+            known = set(self.domain_classifier.classes_)
+            rows = [(text, domain) for text, domain in zip(raw_texts, domains) if domain in known]
+            if len(rows) < len(raw_texts):
+                logger.warning(f"{len(raw_texts) - len(rows)} CV ignorés: domaine absent du modèle")
+            raw_texts = [text for text, _ in rows]
+            domains = [domain for _, domain in rows]
+        
+        if not raw_texts:
+            return 0
+        
+        features = [featurize(text) for text in raw_texts]
+        X = vectorize(self.vectorizer, features)
+        
+        if first_batch:
+            self.domain_classifier.partial_fit(X, domains, classes=sorted(set(domain_classes)))
+        else:
+            self.domain_classifier.partial_fit(X, domains)
+        
+        # Même score de qualité que train_models, normalisé par le maximum observé jusqu'ici
+        skills_counts = np.array([len(self.processor.extract_skills_from_features(feature)) for feature in features])
+        experience_years = np.array([
+            self.processor.extract_profile(feature.text, feature.text_lower)['experience_years'] for feature in features
+        ])
+        word_counts = np.array([feature.word_count for feature in features])
+        scores = skills_counts * 0.4 + experience_years * 0.3 + (word_counts / 100) * 0.3
+        
+        score_max = max(getattr(self.quality_classifier, 'score_max_', 0.0), float(scores.max()))
+        if score_max > 0:
+            scores = scores / score_max * 100
+        quality_labels = np.where(scores >= 60, 'bon', 'moyen')
+        self.quality_classifier.partial_fit(X, quality_labels, classes=QUALITY_CLASSES)
+        # Conservé avec le modèle pour les mises à jour suivantes
+        self.quality_classifier.score_max_ = score_max
+        
+        return len(raw_texts)
+    
+    def train_incremental(self, batches: Iterable[Tuple[List[str], List[str]]],
+                          domain_classes: Optional[List[str]] = None) -> int:
+        """
+        Entraîne (ou met à jour) les modèles incrémentaux sur un flux de mini-lots (textes, domaines)
+        Seul le lot courant est en mémoire; retourne le nombre total de CV utilisés
+        """
+        if not self.is_incremental:
+            self.use_incremental_models()
+        
+        total = 0
+        for index, (raw_texts, domains) in enumerate(batches, 1):
+            total += self.partial_fit(raw_texts, domains, domain_classes)
+            logger.info(f"Lot {index}: {total} CV appris")
+        
+        if total:
+            self.is_trained = True
+            self.model_version = self._compute_model_version([
+                pickle.dumps(model) for model in (self.vectorizer, self.domain_classifier, self.quality_classifier)
+            ])
+        logger.info(f"Entraînement incrémental terminé ({total} CV)")
+        return total
+    
+    def _predict_quality(self, X) -> np.ndarray:
+        """Prédit la classe de qualité en un seul passage sur la matrice"""
+        classifier = self.quality_classifier
+        if hasattr(classifier, 'predict_proba'):
+            return classifier.classes_[classifier.predict_proba(X).argmax(axis=1)]
+        
+        # SVC sans probabilités: la fonction de décision suffit
+        scores = classifier.decision_function(X)
+        if scores.ndim == 1:
+            return classifier.classes_[(scores > 0).astype(int)]
+        return classifier.classes_[scores.argmax(axis=1)]
+    
+    def analyze_cvs(self, cv_texts: List[str]) -> List[Dict]:
+        """
+        Analyse un lot de CV
+        Une seule vectorisation de la matrice et une seule prédiction par modèle pour tout le lot
+        """
+        # Une seule tokenisation par CV, partagée par toutes les features
+        return self.analyze_features([featurize(cv_text) for cv_text in cv_texts])[0]
+    
+    def analyze_features(self, features: List[CVFeatures]):
+        """
+        Analyse un lot de CV déjà tokenisés (featurize)
+        Retourne (analyses, matrice TF-IDF du lot): les lignes servent aussi à la similarité
+        et à l'index des candidatures, sans nouvelle vectorisation
+        """
         if not self.is_trained:
             raise ValueError("Les modèles doivent être entraînés avant l'analyse")
         
-        # Traitement du texte
-        cleaned_text = self.processor.clean_text(cv_text)
-        skills = self.processor.extract_skills(cv_text)
-        experience_years = self.processor.extract_experience_years(cv_text)
-        
-        # Vectorisation
-        X = self.vectorizer.transform([cleaned_text])
-        
-        # Prédictions
-        predicted_domain = self.domain_classifier.predict(X)[0]
-        domain_proba = max(self.domain_classifier.predict_proba(X)[0])
-        
-        predicted_quality = self.quality_classifier.predict(X)[0]
-        
-        # Calcul du score de qualité
-        quality_score = (
-            len(skills) * 0.4 +
-            experience_years * 0.3 +
-            (len(cleaned_text.split()) / 100) * 0.3
-        )
-        
-        return {
-            'domain': predicted_domain,
-            'domain_confidence': float(domain_proba),
-            'quality': predicted_quality,
-            'quality_score': float(quality_score),
-            'skills': skills,
-            'skills_count': len(skills),
-            'experience_years': experience_years,
-            'word_count': len(cleaned_text.split())
-        }
+        if not features:
+            return [], None
+        
+        skills = [self.processor.extract_skills_from_features(feature) for feature in features]
+        profiles = [self.processor.extract_profile(feature.text, feature.text_lower) for feature in features]
+        
+        # Vectorisation de tout le lot à partir des jetons
+        X = vectorize(self.vectorizer, features)
+        
+        # Prédictions: un predict_proba pour les domaines, une décision pour la qualité
+        domain_proba = self.domain_classifier.predict_proba(X)
+        domain_index = domain_proba.argmax(axis=1)
+        predicted_domains = self.domain_classifier.classes_[domain_index]
+        domain_confidences = domain_proba[np.arange(len(features)), domain_index]
+        
+        predicted_qualities = self._predict_quality(X)
+        
+        # Calcul vectorisé du score de qualité
+        skills_counts = np.array([len(cv_skills) for cv_skills in skills])
+        experience_years = np.array([profile['experience_years'] for profile in profiles])
+        word_counts = np.array([feature.word_count for feature in features])
+        quality_scores = skills_counts * 0.4 + experience_years * 0.3 + (word_counts / 100) * 0.3
+        
+        analyses = [
+            {
+                'domain': predicted_domains[i],
+                'domain_confidence': float(domain_confidences[i]),
+                'quality': predicted_qualities[i],
+                'quality_score': float(quality_scores[i]),
+                'skills': skills[i],
+                'skills_count': int(skills_counts[i]),
+                'experience_years': int(experience_years[i]),
+                'extracted_experience': profiles[i]['experience'],
+                'extracted_education': profiles[i]['education'],
+                'word_count': int(word_counts[i]),
+                'model_version': self.model_version
+            }
+            for i in range(len(features))
+        ]
+        return analyses, X
+    
+    def analyze_cv(self, cv_text: str) -> Dict:
+        """Analyse un CV individuel"""
+        return self.analyze_cvs([cv_text])[0]
     
     def filter_top_candidates(self, cv_analyses: List[Dict], domain: str, top_n: int = 10) -> List[Dict]:
         """Filtre les top N candidats pour un domaine donné"""
@@ -375,31 +694,91 @@ class CVAnalyzer:
         # Retourner les top N
         return domain_candidates[:top_n]
     
-    def save_models(self, models_path: str):
-        """Sauvegarde les modèles entraînés"""
-        os.makedirs(models_path, exist_ok=True)
-        
-        with open(os.path.join(models_path, 'vectorizer.pkl'), 'wb') as f:
-            pickle.dump(self.vectorizer, f)
-        
-        with open(os.path.join(models_path, 'domain_classifier.pkl'), 'wb') as f:
-            pickle.dump(self.domain_classifier, f)
-        
-        with open(os.path.join(models_path, 'quality_classifier.pkl'), 'wb') as f:
-            pickle.dump(self.quality_classifier, f)
+    def save_models(self, models_path: str) -> str:
+        """
+        Sauvegarde les modèles entraînés dans un bundle versionné (voir artifacts.py)
+        et le désigne comme bundle actif du dossier; retourne le dossier du bundle
+        Le vectoriseur est sauvegardé sous forme compacte (sans état d'entraînement, float32)
+        """
+        if not self.model_version:
+            self.model_version = self._compute_model_version([
+                pickle.dumps(model) for model in (self.vectorizer, self.domain_classifier, self.quality_classifier)
+            ])
+        
+        vectorizer = compact_vectorizer(self.vectorizer)
+        bundle_dir = save_bundle(
+            models_path,
+            {
+                'vectorizer': vectorizer,
+                'domain_classifier': self.domain_classifier,
+                'quality_classifier': self.quality_classifier,
+            },
+            self.model_version,
+            metadata={
+                'analysis_format_version': ANALYSIS_FORMAT_VERSION,
+                'vectorizer': type(vectorizer).__name__,
+                'quality_classifier': type(self.quality_classifier).__name__,
+                'incremental': self.is_incremental,
+            }
+        )
         
         logger.info(f"Modèles sauvegardés dans {models_path}")
+        return bundle_dir
+    
+    @property
+    def cache_version(self) -> Optional[str]:
+        """
+        Version utilisée par le cache: version du modèle, format des résultats, révision
+        de la liste des compétences (les compétences en cache suivent la table JobSkill)
+        et budgets d'extraction (un texte extrait sous un autre budget n'est pas réutilisé)
+        """
+        if not self.model_version:
+            return None
+        return (
+            f"{self.model_version}.{ANALYSIS_FORMAT_VERSION}.{self.processor.skill_matcher_provider().revision}"
+            f".p{self.processor.max_pdf_pages or 0}c{self.processor.max_chars or 0}"
+        )
     
-    def load_models(self, models_path: str):
-        """Charge les modèles pré-entraînés"""
-        with open(os.path.join(models_path, 'vectorizer.pkl'), 'rb') as f:
-            self.vectorizer = pickle.load(f)
+    @staticmethod
+    def _compute_model_version(serialized_models: List[bytes]) -> str:
+        """Version du modèle: empreinte des modèles sérialisés"""
+        digest = hashlib.sha256()
+        for data in serialized_models:
+            digest.update(data)
+        return digest.hexdigest()[:16]
+    
+    def load_models(self, models_path: str, mmap: bool = True):
+        """
+        Charge les modèles pré-entraînés: bundle actif du dossier (tableaux projetés
+        en mémoire en lecture seule si mmap), ou anciens pickles à la racine du dossier
+        Les vectoriseurs TF-IDF d'anciens modèles sont compactés pour l'inférence
+        """
+        try:
+            models, manifest = load_bundle(models_path, mmap=mmap)
+        except ArtifactError:
+            if not has_legacy_models(models_path):
+                raise
+            return self._load_legacy_models(models_path)
+        
+        self.vectorizer = compact_vectorizer(models['vectorizer'])
+        self.domain_classifier = models['domain_classifier']
+        self.quality_classifier = models['quality_classifier']
         
-        with open(os.path.join(models_path, 'domain_classifier.pkl'), 'rb') as f:
-            self.domain_classifier = pickle.load(f)
+        self.is_trained = True
+        self.model_version = manifest['model_version']
+        logger.info(f"Modèles {self.model_version} chargés depuis {models_path}")
+    
+    def _load_legacy_models(self, models_path: str):
+        """Anciens modèles: trois pickles à la racine du dossier"""
+        serialized = []
+        for filename in ('vectorizer.pkl', 'domain_classifier.pkl', 'quality_classifier.pkl'):
+            with open(os.path.join(models_path, filename), 'rb') as f:
+                serialized.append(f.read())
         
-        with open(os.path.join(models_path, 'quality_classifier.pkl'), 'rb') as f:
-            self.quality_classifier = pickle.load(f)
+        self.vectorizer = compact_vectorizer(pickle.loads(serialized[0]))
+        self.domain_classifier = pickle.loads(serialized[1])
+        self.quality_classifier = pickle.loads(serialized[2])
         
         self.is_trained = True
+        self.model_version = self._compute_model_version(serialized)
         logger.info(f"Modèles chargés depuis {models_path}")
@@ -0,0 +1,169 @@
+"""
+Préparation incrémentale du dataset d'entraînement
+Un manifeste (chemin, taille, date de modification, empreinte, texte extrait) évite
+de ré-extraire les PDF inchangés d'un entraînement à l'autre
+"""
+import os
+import json
+import random
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Politiques d'échantillonnage des CV par domaine
+SAMPLING_POLICIES = ('first', 'random')
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_dataset_files(dataset_path: str, max_per_domain: Optional[int] = 50, sampling: str = 'first',
+                       seed: int = 42) -> List[Tuple[str, str]]:
+    """
+    Liste les PDF du dataset par dossier de domaine: [(dossier du domaine, chemin relatif)]
+    max_per_domain: nombre maximum de CV par domaine (None ou 0 = tous)
+    sampling: 'first' (premiers fichiers par ordre alphabétique) ou 'random' (tirage reproductible)
+    """
+    if sampling not in SAMPLING_POLICIES:
+        raise ValueError(f"Politique d'échantillonnage inconnue: {sampling}")
+
+    rng = random.Random(seed)
+    files = []
+    for domain_folder in sorted(os.listdir(dataset_path)):
+        domain_path = os.path.join(dataset_path, domain_folder)
+        if not os.path.isdir(domain_path):
+            continue
+
+        cv_files = sorted(f for f in os.listdir(domain_path) if f.endswith('.pdf'))
+        if max_per_domain and len(cv_files) > max_per_domain:
+            if sampling == 'random':
+                cv_files = sorted(rng.sample(cv_files, max_per_domain))
+            else:
+                cv_files = cv_files[:max_per_domain]
+
+        files.extend((domain_folder, os.path.join(domain_folder, file)) for file in cv_files)
+    return files
+
+
+class DatasetManifest:
+    """
+    Manifeste JSON des fichiers déjà extraits
+    Une entrée est réutilisée si la taille et la date de modification n'ont pas changé,
+    ou si le contenu (empreinte) est identique; elle est invalidée si les paramètres
+    d'extraction (budgets de pages et de caractères) changent
+    """
+
+    def __init__(self, path: Optional[str], extraction_options: Optional[Dict] = None):
+        self.path = path
+        self.extraction_options = extraction_options or {}
+        self.entries = {}
+        self._by_hash = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifeste illisible, extraction complète: {e}")
+            return
+
+        if data.get('version') != MANIFEST_VERSION or data.get('extraction') != self.extraction_options:
+            logger.info("Manifeste obsolète (version ou paramètres d'extraction), extraction complète")
+            return
+
+        self.entries = data.get('files', {})
+        self._by_hash = {entry['hash']: entry for entry in self.entries.values()}
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'extraction': self.extraction_options,
+                'files': self.entries
+            }, file, ensure_ascii=False)
+        os.replace(temporary_path, self.path)
+
+    def lookup(self, relative_path: str, absolute_path: str) -> Tuple[Optional[str], Dict]:
+        """
+        Retourne (texte connu ou None, métadonnées courantes du fichier)
+        L'empreinte n'est calculée que si la taille ou la date de modification a changé
+        """
+        stat = os.stat(absolute_path)
+        metadata = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        entry = self.entries.get(relative_path)
+
+        if entry and entry['size'] == metadata['size'] and entry['mtime'] == metadata['mtime']:
+            metadata['hash'] = entry['hash']
+            return entry['text'], metadata
+
+        metadata['hash'] = hash_file(absolute_path)
+        known = self._by_hash.get(metadata['hash'])
+        if known is not None:
+            # Fichier touché, déplacé ou copié: même contenu, même texte
+            self.record(relative_path, metadata, known['text'])
+            return known['text'], metadata
+        return None, metadata
+
+    def record(self, relative_path: str, metadata: Dict, text: str):
+        entry = dict(metadata, text=text)
+        self.entries[relative_path] = entry
+        self._by_hash[entry['hash']] = entry
+
+    def prune(self, dataset_path: str):
+        """Retire les fichiers qui n'existent plus dans le dataset"""
+        missing = [path for path in self.entries if not os.path.exists(os.path.join(dataset_path, path))]
+        for relative_path in missing:
+            del self.entries[relative_path]
+        if missing:
+            self._by_hash = {entry['hash']: entry for entry in self.entries.values()}
+
+
+def extract_dataset_texts(pool, dataset_path: str, relative_paths: List[str],
+                          manifest: DatasetManifest) -> Dict[str, str]:
+    """
+    Texte de chaque fichier du dataset: depuis le manifeste s'il est inchangé,
+    sinon extrait en parallèle avec le pool (voir parallel.CVWorkerPool) puis mémorisé
+    """
+    texts = {}
+    pending = []
+    for relative_path in relative_paths:
+        text, metadata = manifest.lookup(relative_path, os.path.join(dataset_path, relative_path))
+        if text is None:
+            pending.append((relative_path, metadata))
+        else:
+            texts[relative_path] = text
+
+    if not pending:
+        return texts
+
+    results = pool.extract_files([
+        (os.path.join(dataset_path, relative_path), os.path.basename(relative_path))
+        for relative_path, _ in pending
+    ])
+    for (relative_path, metadata), result in zip(pending, results):
+        if result['status'] == 'error' and not result.get('empty'):
+            # Erreur passagère possible: ne pas la mémoriser (seuls les PDF sans texte le sont)
+            logger.warning(f"⚠️ {relative_path}: {result['error']}")
+            continue
+        # Les PDF sans texte sont aussi mémorisés pour ne pas être relus à chaque entraînement
+        text = result.get('text', '')
+        manifest.record(relative_path, metadata, text)
+        texts[relative_path] = text
+    return texts
@@ -0,0 +1,215 @@
+"""
+Tokenisation unique des CV
+Un seul passage d'expression régulière par document produit les jetons normalisés,
+consommés ensuite par le nettoyage, les compétences, les mots-clés, le nombre de mots
+et la vectorisation TF-IDF (sans ré-analyse du texte par scikit-learn)
+
+Les modèles sauvegardés utilisent un vectoriseur compact (CompactTfidfVectorizer):
+table de termes triés sans l'état d'entraînement, et matrices float32 à l'inférence
+"""
+import re
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+# Mots: mêmes caractères que \w pour le nettoyage et le token_pattern de scikit-learn
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# token_pattern par défaut de scikit-learn: jetons de deux caractères ou plus
+SKLEARN_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+class CVFeatures:
+    """
+    Texte d'un CV tokenisé une fois
+    - text_lower: texte en minuscules (contexte, recherches de sous-chaînes)
+    - tokens: mots normalisés dans l'ordre du texte
+    - cleaned: texte nettoyé (mots séparés par une espace), identique à CVProcessor.clean_text
+    """
+
+    __slots__ = ('text', 'text_lower', 'tokens', '_token_set')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        self.tokens = TOKEN_PATTERN.findall(self.text_lower)
+        self._token_set = None
+
+    @property
+    def token_set(self) -> frozenset:
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+    @property
+    def cleaned(self) -> str:
+        return ' '.join(self.tokens)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
+    def contains(self, keyword: str) -> bool:
+        """Présence d'un mot-clé (sous-chaîne du texte en minuscules, comme les scores existants)"""
+        return keyword in self.text_lower
+
+
+def featurize(text: str) -> CVFeatures:
+    return CVFeatures(text)
+
+
+def _accepts_tokens(vectorizer) -> bool:
+    """Vectoriseur dont l'analyse du texte nettoyé revient à filtrer nos jetons"""
+    return (
+        hasattr(vectorizer, 'vocabulary_')
+        and hasattr(vectorizer, '_tfidf')
+        and vectorizer.analyzer == 'word'
+        and vectorizer.tokenizer is None
+        and vectorizer.preprocessor is None
+        and vectorizer.strip_accents is None
+        and vectorizer.token_pattern == SKLEARN_TOKEN_PATTERN
+        and tuple(vectorizer.ngram_range) == (1, 1)
+        and not vectorizer.binary
+    )
+
+
+class CompactTfidfVectorizer:
+    """
+    Vectoriseur TF-IDF d'inférence, équivalent à un TfidfVectorizer entraîné
+    Sauvegardé sous forme de table de termes: termes triés (ordre des colonnes de
+    scikit-learn) concaténés en UTF-8 avec leurs positions, et poids idf en float64.
+    Le dictionnaire de recherche est reconstruit au chargement; les matrices produites
+    sont en float32 (dtype), calculées en float64 puis converties.
+    """
+
+    def __init__(self, terms: Sequence[str], idf: Optional[np.ndarray], norm: Optional[str] = 'l2',
+                 sublinear_tf: bool = False, dtype=np.float32):
+        encoded = [term.encode('utf-8') for term in terms]
+        self.term_bytes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        self.term_offsets = np.cumsum([0] + [len(term) for term in encoded], dtype=np.int32)
+        self.idf = idf
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.dtype = dtype
+        self._build_vocabulary()
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, dtype=np.float32) -> 'CompactTfidfVectorizer':
+        """Version compacte d'un TfidfVectorizer entraîné (ValueError si sa configuration diffère)"""
+        if not _accepts_tokens(vectorizer):
+            raise ValueError(f"Vectoriseur non compactable: {type(vectorizer).__name__}")
+        transformer = vectorizer._tfidf
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        return cls(
+            terms,
+            idf=np.asarray(transformer.idf_, dtype=np.float64) if transformer.use_idf else None,
+            norm=transformer.norm,
+            sublinear_tf=transformer.sublinear_tf,
+            dtype=dtype
+        )
+
+    def _build_vocabulary(self):
+        data = self.term_bytes.tobytes()
+        offsets = self.term_offsets.tolist()
+        self.vocabulary_ = {
+            data[start:end].decode('utf-8'): index
+            for index, (start, end) in enumerate(zip(offsets, offsets[1:]))
+        }
+
+    def __getstate__(self):
+        # Le dictionnaire n'est pas sauvegardé: seulement la table de termes
+        state = self.__dict__.copy()
+        del state['vocabulary_']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_vocabulary()
+
+    @property
+    def n_features(self) -> int:
+        return len(self.term_offsets) - 1
+
+    def get_feature_names_out(self) -> np.ndarray:
+        names = np.empty(self.n_features, dtype=object)
+        for term, index in self.vocabulary_.items():
+            names[index] = term
+        return names
+
+    def transform_tokens(self, token_lists: Sequence[List[str]]):
+        """Matrice TF-IDF d'un lot de documents déjà tokenisés (jetons en minuscules)"""
+        vocabulary = self.vocabulary_
+        indices: List[int] = []
+        values: List[int] = []
+        indptr = [0]
+        for tokens in token_lists:
+            counts = Counter(index for index in map(vocabulary.get, tokens) if index is not None)
+            indices.extend(counts.keys())
+            values.extend(counts.values())
+            indptr.append(len(indices))
+
+        X = sp.csr_matrix(
+            (np.asarray(values, dtype=np.float64), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int32)),
+            shape=(len(token_lists), self.n_features)
+        )
+        X.sort_indices()
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        if self.norm is not None:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X.astype(self.dtype)
+
+    def transform(self, raw_documents: Iterable[str]):
+        """Même interface que TfidfVectorizer.transform (documents bruts ou nettoyés)"""
+        return self.transform_tokens([TOKEN_PATTERN.findall(document.lower()) for document in raw_documents])
+
+
+def compact_vectorizer(vectorizer):
+    """
+    Vectoriseur à sauvegarder: version compacte d'un TfidfVectorizer compatible,
+    sinon le vectoriseur lui-même sans l'ensemble stop_words_ des termes écartés
+    (état d'entraînement seulement, souvent plus gros que le vocabulaire)
+    """
+    if _accepts_tokens(vectorizer):
+        return CompactTfidfVectorizer.from_vectorizer(vectorizer)
+    if getattr(vectorizer, 'stop_words_', None) is not None:
+        vectorizer.stop_words_ = None
+    return vectorizer
+
+
+def vectorize(vectorizer, features: Sequence[CVFeatures]):
+    """
+    Matrice TF-IDF d'un lot à partir des jetons déjà calculés
+    Le vocabulaire appris ne contient ni mots vides ni jetons d'un caractère: une simple
+    recherche par jeton donne les mêmes comptes que l'analyseur de scikit-learn.
+    Autres vectoriseurs (hachage): transformation du texte nettoyé.
+    """
+    if isinstance(vectorizer, CompactTfidfVectorizer):
+        return vectorizer.transform_tokens([feature.tokens for feature in features])
+    if not _accepts_tokens(vectorizer):
+        return vectorizer.transform([feature.cleaned for feature in features])
+
+    vocabulary = vectorizer.vocabulary_
+    indices: List[int] = []
+    values: List[int] = []
+    indptr = [0]
+    for feature in features:
+        counts = Counter(index for index in map(vocabulary.get, feature.tokens) if index is not None)
+        indices.extend(counts.keys())
+        values.extend(counts.values())
+        indptr.append(len(indices))
+
+    X = sp.csr_matrix(
+        (np.asarray(values, dtype=vectorizer.dtype), np.asarray(indices, dtype=np.int32),
+         np.asarray(indptr, dtype=np.int32)),
+        shape=(len(features), len(vocabulary))
+    )
+    X.sort_indices()
+    return vectorizer._tfidf.transform(X, copy=False)
@@ -0,0 +1,148 @@
+"""
+Sources de mini-lots pour l'entraînement incrémental (CVAnalyzer.train_incremental)
+Les CV sont lus lot par lot: le dossier du dataset ou les analyses enregistrées en base
+"""
+import os
+import random
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dataset import DatasetManifest, extract_dataset_texts, list_dataset_files
+from .parallel import CVWorkerPool
+
+logger = logging.getLogger(__name__)
+
+Batch = Tuple[List[str], List[str]]
+
+# Catégories de postes (create_job_categories) -> domaines des modèles (dossiers du dataset)
+# Une catégorie qui porte déjà le nom d'un domaine du dataset n'a pas besoin d'y figurer
+CATEGORY_DOMAINS = {
+    'information_technology': 'information_technology',
+    'teaching': 'teacher',
+    'advocacy': 'advocate',
+    'accounting': 'accountant',
+    'engineering': 'engineering',
+    'healthcare': 'healthcare',
+    'banking': 'banking',
+    'sales': 'sales',
+    'human_resources': 'hr',
+    'consulting': 'consultant',
+    'design': 'designer',
+    'chef': 'chef',
+}
+
+
+def domain_label(name: str) -> str:
+    """Nom de domaine utilisé par les modèles (dossier 'INFORMATION-TECHNOLOGY' -> 'information_technology')"""
+    return '_'.join(name.lower().replace('-', ' ').split())
+
+
+def category_domain(name: Optional[str], known_domains: Iterable[str]) -> Optional[str]:
+    """
+    Domaine des modèles correspondant à une catégorie de poste, ou None si elle n'en a pas
+    Le nom de la catégorie passe par CATEGORY_DOMAINS, sinon il doit être un domaine connu
+    """
+    if not name:
+        return None
+    label = domain_label(name)
+    domain = CATEGORY_DOMAINS.get(label, label)
+    return domain if domain in known_domains else None
+
+
+def dataset_domains(dataset_path: str) -> List[str]:
+    """Domaines du dataset (un dossier par domaine)"""
+    return sorted(
+        domain_label(folder) for folder in os.listdir(dataset_path)
+        if os.path.isdir(os.path.join(dataset_path, folder))
+    )
+
+
+def iter_dataset_batches(analyzer, dataset_path: str, batch_size: int = 256,
+                         max_per_domain: Optional[int] = None, sampling: str = 'first', seed: int = 42,
+                         workers: Optional[int] = None, manifest_path: Optional[str] = None) -> Iterator[Batch]:
+    """
+    Mini-lots (textes, domaines) du dataset, mélangés pour que chaque lot couvre plusieurs domaines
+    Les textes connus du manifeste ne sont pas ré-extraits
+    """
+    files = list_dataset_files(dataset_path, max_per_domain=max_per_domain, sampling=sampling, seed=seed)
+    random.Random(seed).shuffle(files)
+
+    manifest = DatasetManifest(manifest_path, extraction_options={
+        'max_pdf_pages': analyzer.processor.max_pdf_pages,
+        'max_chars': analyzer.processor.max_chars
+    })
+    pool = CVWorkerPool(analyzer, max_workers=workers, batch_size=16)
+    try:
+        for start in range(0, len(files), batch_size):
+            chunk = files[start:start + batch_size]
+            texts = extract_dataset_texts(pool, dataset_path, [path for _, path in chunk], manifest)
+            batch = [(texts[path], domain_label(folder)) for folder, path in chunk if texts.get(path)]
+            if batch:
+                yield [text for text, _ in batch], [domain for _, domain in batch]
+    finally:
+        pool.shutdown()
+        manifest.prune(dataset_path)
+        manifest.save()
+
+
+def _cv_analyses(since=None):
+    from candidates.models import CVAnalysis
+
+    queryset = CVAnalysis.objects.exclude(extracted_text__isnull=True).exclude(extracted_text='')
+    if since is not None:
+        queryset = queryset.filter(processed_at__gte=since)
+    return queryset
+
+
+def cv_analysis_domains(known_domains: Iterable[str]) -> List[str]:
+    """Domaines des modèles atteints par les catégories de postes"""
+    from jobs.models import JobCategory
+
+    known_domains = set(known_domains)
+    return sorted({
+        domain for domain in (
+            category_domain(name, known_domains) for name in JobCategory.objects.values_list('name', flat=True)
+        ) if domain
+    })
+
+
+def cv_analysis_coverage(known_domains: Iterable[str], since=None) -> Tuple[int, Dict[str, int]]:
+    """
+    Analyses de CV utilisables pour les domaines connus des modèles
+    Retourne (nombre total d'analyses, {catégorie sans domaine connu: nombre d'analyses})
+    """
+    from django.db.models import Count
+
+    known_domains = set(known_domains)
+    rows = _cv_analyses(since).values_list('application__job__category__name').annotate(count=Count('id'))
+    total = 0
+    unmapped = {}
+    for category, count in rows:
+        total += count
+        if category_domain(category, known_domains) is None:
+            unmapped[category or '(sans catégorie)'] = count
+    return total, unmapped
+
+
+def iter_cv_analysis_batches(known_domains: Iterable[str], batch_size: int = 256, since=None) -> Iterator[Batch]:
+    """
+    Mini-lots (textes, domaines) des analyses de CV en base
+    Le domaine vient de la catégorie du poste (category_domain); les catégories sans domaine
+    connu sont ignorées. Seules les lignes demandées sont en mémoire
+    since: ne lire que les analyses traitées depuis cette date (mise à jour nocturne)
+    """
+    known_domains = set(known_domains)
+    rows = _cv_analyses(since).order_by('id').values_list('extracted_text', 'application__job__category__name')
+
+    texts, domains = [], []
+    for text, category in rows.iterator(chunk_size=batch_size):
+        domain = category_domain(category, known_domains)
+        if domain is None:
+            continue
+        texts.append(text)
+        domains.append(domain)
+        if len(texts) >= batch_size:
+            yield texts, domains
+            texts, domains = [], []
+    if texts:
+        yield texts, domains
@@ -0,0 +1,141 @@
+"""
+Commande Django pour mesurer la mémoire des modèles IA par worker
+Usage: python manage.py ai_memory_report --workers 4 [--models-dir /path/to/models] [--cv-dir /path/to/cvs]
+
+Compare trois modes avec des processus forkés comme des workers gunicorn:
+- per_worker: chaque worker charge sa propre copie (ancien comportement)
+- mmap: chaque worker charge le bundle avec les tableaux projetés en mémoire
+- preload: chargement unique dans le maître puis fork (gunicorn --preload + gc.freeze)
+"""
+import gc
+import os
+import multiprocessing
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ai_analysis.cv_processor import CVAnalyzer
+from ai_analysis.sharing import process_memory
+
+MODES = ('per_worker', 'mmap', 'preload')
+
+SAMPLE_CV = (
+    "Développeur Python senior, 6 ans d'expérience. Django, PostgreSQL, Docker, AWS.\n"
+    "Expérience professionnelle\n2017 - 2023 Ingénieur logiciel\nFormation\nMaster informatique"
+)
+
+
+def _worker(conn, analyzer, mode, models_dir, texts):
+    """Worker simulé: charge les modèles selon le mode, analyse des CV, puis mesure sa mémoire"""
+    if mode != 'preload':
+        analyzer = CVAnalyzer()
+        analyzer.load_models(models_dir, mmap=(mode == 'mmap'))
+    analyzer.analyze_cvs(texts)
+    gc.collect()
+    conn.send(process_memory())
+    # Rester en vie pendant la mesure des autres workers (pages partagées comptées en PSS)
+    conn.recv()
+
+
+class Command(BaseCommand):
+    help = 'Mesure la mémoire résidente incrémentale par worker selon le mode de partage des modèles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de workers simulés')
+        parser.add_argument(
+            '--models-dir',
+            type=str,
+            default=str(settings.AI_MODEL_CONFIG['MODELS_DIR']),
+            help='Dossier des modèles (bundle ou anciens pickles)'
+        )
+        parser.add_argument(
+            '--cv-dir',
+            type=str,
+            default=None,
+            help='Dossier de CV analysés par chaque worker (par défaut: un CV d\'exemple)'
+        )
+        parser.add_argument(
+            '--modes',
+            type=str,
+            default=','.join(MODES),
+            help='Modes à comparer, séparés par des virgules'
+        )
+
+    def handle(self, *args, **options):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('Cette mesure nécessite fork (Linux)')
+        context = multiprocessing.get_context('fork')
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Modes inconnus: {", ".join(sorted(unknown))}')
+
+        texts = self.load_texts(options['cv_dir'])
+        baseline = process_memory()
+        self.stdout.write(
+            f'📏 Processus maître avant chargement: RSS {baseline["rss"]:.1f} Mo, '
+            f'{options["workers"]} workers simulés, {len(texts)} CV analysés par worker'
+        )
+        self.stdout.write(
+            f'{"Mode":<12} {"RSS/worker":>12} {"PSS/worker":>12} {"USS/worker":>12} {"Total PSS":>12}'
+        )
+
+        for mode in modes:
+            analyzer = None
+            if mode == 'preload':
+                analyzer = CVAnalyzer()
+                analyzer.load_models(options['models_dir'])
+                gc.collect()
+                gc.freeze()
+
+            reports = self.run_workers(context, options['workers'], analyzer, mode, options['models_dir'], texts)
+
+            if mode == 'preload':
+                gc.unfreeze()
+                del analyzer
+                gc.collect()
+
+            count = len(reports)
+            self.stdout.write(
+                f'{mode:<12} {sum(r["rss"] for r in reports) / count:>9.1f} Mo '
+                f'{sum(r.get("pss", 0) for r in reports) / count:>9.1f} Mo '
+                f'{sum(r.get("uss", 0) for r in reports) / count:>9.1f} Mo '
+                f'{sum(r.get("pss", 0) for r in reports):>9.1f} Mo'
+            )
+
+        self.stdout.write(
+            '\nUSS: mémoire propre à chaque worker (coût incrémental); '
+            'PSS: part équitable des pages partagées'
+        )
+
+    def run_workers(self, context, count, analyzer, mode, models_dir, texts):
+        connections = []
+        processes = []
+        for _ in range(count):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker, args=(child_conn, analyzer, mode, models_dir, texts))
+            process.start()
+            connections.append(parent_conn)
+            processes.append(process)
+
+        try:
+            return [conn.recv() for conn in connections]
+        finally:
+            for conn in connections:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+            for process in processes:
+                process.join()
+
+    def load_texts(self, cv_dir):
+        if not cv_dir:
+            return [SAMPLE_CV]
+        processor = CVAnalyzer().processor
+        texts = []
+        for root, _, files in os.walk(cv_dir):
+            for file in sorted(files)[:20]:
+                text = processor.extract_text(os.path.join(root, file))
+                if text:
+                    texts.append(text)
+        return texts or [SAMPLE_CV]
@@ -0,0 +1,121 @@
+"""
+Commande Django pour mesurer le coût de préparation des features par CV
+Usage: python manage.py benchmark_featurizer --cv-dir /path/to/cvs [--models-dir /path/to/models] [--repeat 5]
+
+Compare l'ancien chemin (nettoyage par deux expressions régulières, automate de compétences,
+extraction du profil et analyseur de scikit-learn, chacun re-tokenisant le texte)
+à la tokenisation unique de featurizer.py, et vérifie que les résultats sont identiques
+"""
+import os
+import re
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from sklearn.feature_extraction.text import TfidfVectorizer
+from ai_analysis.artifacts import ArtifactError
+from ai_analysis.cv_processor import CVAnalyzer
+from ai_analysis.featurizer import featurize, vectorize
+
+
+def _legacy_clean_text(text):
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.lower().strip()
+
+
+class Command(BaseCommand):
+    help = 'Compare la préparation des features avec et sans tokenisation unique par CV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cv-dir',
+            type=str,
+            required=True,
+            help='Dossier contenant des CV (pdf, docx, txt) utilisés pour la mesure'
+        )
+        parser.add_argument(
+            '--models-dir',
+            type=str,
+            default=str(settings.AI_MODEL_CONFIG['MODELS_DIR']),
+            help='Modèles dont le vectoriseur est utilisé (sinon un vectoriseur est appris sur les CV)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Nombre maximum de CV utilisés'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Nombre de répétitions (le meilleur temps est retenu)'
+        )
+
+    def handle(self, *args, **options):
+        cv_dir = options['cv_dir']
+        if not os.path.isdir(cv_dir):
+            raise CommandError(f'Le dossier {cv_dir} n\'existe pas!')
+
+        analyzer = CVAnalyzer()
+        processor = analyzer.processor
+        texts = []
+        for root, _, files in os.walk(cv_dir):
+            for file in sorted(files):
+                if len(texts) >= options['limit']:
+                    break
+                text = processor.extract_text(os.path.join(root, file))
+                if text:
+                    texts.append(text)
+
+        if not texts:
+            raise CommandError('Aucun CV exploitable trouvé!')
+
+        try:
+            analyzer.load_models(options['models_dir'])
+            vectorizer = analyzer.vectorizer
+            self.stdout.write(f'📦 Vectoriseur du modèle {analyzer.model_version}')
+        except (ArtifactError, OSError):
+            vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+            vectorizer.fit([_legacy_clean_text(text) for text in texts])
+            self.stdout.write('📦 Aucun modèle: vectoriseur appris sur les CV de la mesure')
+
+        def legacy():
+            cleaned = [_legacy_clean_text(text) for text in texts]
+            skills = [processor.extract_skills(text) for text in texts]
+            profiles = [processor.extract_profile(text) for text in texts]
+            word_counts = [len(text.split()) for text in cleaned]
+            return vectorizer.transform(cleaned), skills, profiles, word_counts
+
+        def fused():
+            features = [featurize(text) for text in texts]
+            skills = [processor.extract_skills_from_features(feature) for feature in features]
+            profiles = [processor.extract_profile(feature.text, feature.text_lower) for feature in features]
+            word_counts = [feature.word_count for feature in features]
+            return vectorize(vectorizer, features), skills, profiles, word_counts
+
+        legacy_result = legacy()
+        fused_result = fused()
+        identical = (
+            abs(legacy_result[0] - fused_result[0]).max() < 1e-12
+            and legacy_result[1:] == fused_result[1:]
+        )
+
+        self.stdout.write(f'📄 {len(texts)} CV chargés, {options["repeat"]} répétitions')
+        self.stdout.write(f'{"Chemin":<22} {"ms/CV":>10}')
+        timings = {}
+        for name, run in (('Ancien (multi-passes)', legacy), ('Tokenisation unique', fused)):
+            best = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best * 1000 / len(texts)
+            self.stdout.write(f'{name:<22} {timings[name]:>10.3f}')
+
+        speedup = timings['Ancien (multi-passes)'] / timings['Tokenisation unique']
+        self.stdout.write(f'\n⚡ Accélération: x{speedup:.2f}')
+        if identical:
+            self.stdout.write(self.style.SUCCESS('✅ Features identiques (TF-IDF, compétences, profils, mots)'))
+        else:
+            self.stdout.write(self.style.WARNING('⚠️ Features différentes entre les deux chemins'))
@@ -0,0 +1,75 @@
+"""
+Commande Django pour mesurer le coût de détection des compétences selon la taille de la taxonomie
+Usage: python manage.py benchmark_skill_matcher --cv-dir /path/to/cvs --sizes 50,500,5000
+"""
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ai_analysis.cv_processor import CVProcessor
+from ai_analysis.skill_matcher import TECHNICAL_SKILLS, SkillMatcher
+
+
+class Command(BaseCommand):
+    help = 'Compare la recherche naïve et l\'automate de compétences sur des taxonomies croissantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cv-dir',
+            type=str,
+            required=True,
+            help='Dossier contenant des CV (pdf, docx, txt) utilisés pour la mesure'
+        )
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='50,500,5000',
+            help='Tailles de taxonomie à tester, séparées par des virgules'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Nombre maximum de CV utilisés'
+        )
+
+    def handle(self, *args, **options):
+        cv_dir = options['cv_dir']
+        if not os.path.isdir(cv_dir):
+            raise CommandError(f'Le dossier {cv_dir} n\'existe pas!')
+
+        processor = CVProcessor()
+        texts = []
+        for root, _, files in os.walk(cv_dir):
+            for file in sorted(files):
+                if len(texts) >= options['limit']:
+                    break
+                text = processor.extract_text(os.path.join(root, file))
+                if text:
+                    texts.append(text)
+
+        if not texts:
+            raise CommandError('Aucun CV exploitable trouvé!')
+
+        self.stdout.write(f'📄 {len(texts)} CV chargés')
+        self.stdout.write(f'{"Taxonomie":>10} {"Naïf (ms/CV)":>14} {"Automate (ms/CV)":>18} {"Construction (ms)":>18}')
+
+        for size in [int(value) for value in options['sizes'].split(',') if value.strip()]:
+            # Compléter la liste intégrée avec des compétences synthétiques
+            skills = list(TECHNICAL_SKILLS) + [f'competence {i}' for i in range(max(0, size - len(TECHNICAL_SKILLS)))]
+
+            start = time.perf_counter()
+            matcher = SkillMatcher(skills)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for text in texts:
+                text_lower = text.lower()
+                [skill for skill in skills if skill in text_lower]
+            naive_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+            start = time.perf_counter()
+            for text in texts:
+                matcher.find_all(text)
+            automaton_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+            self.stdout.write(f'{len(skills):>10} {naive_ms:>14.3f} {automaton_ms:>18.3f} {build_ms:>18.1f}')
@@ -0,0 +1,65 @@
+"""
+Commande Django pour indexer les CV des candidatures (vecteurs TF-IDF persistés)
+Usage: python manage.py index_applications [--job 12] [--force] [--batch-size 32]
+
+Seules les candidatures sans vecteur pour le modèle actif sont traitées (sauf --force);
+les index de similarité des serveurs se rechargent d'eux-mêmes à la requête suivante
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from candidates.models import Application
+from ai_analysis.vector_index import index_applications
+from ai_analysis.services import model_registry
+
+
+class Command(BaseCommand):
+    help = 'Indexe les CV des candidatures pour le classement et la recherche de candidats similaires'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job',
+            type=int,
+            default=None,
+            help='Seulement les candidatures de cette offre'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Ré-indexe aussi les candidatures déjà indexées avec le modèle actif'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('BATCH_SIZE', 32),
+            help='Candidatures extraites et analysées par lot'
+        )
+
+    def handle(self, *args, **options):
+        with model_registry.acquire() as model:
+            if model is None:
+                raise CommandError('L\'IA n\'est pas encore entraînée!')
+
+            applications = Application.objects.exclude(cv_file='').order_by('id')
+            if options['job'] is not None:
+                applications = applications.filter(job_id=options['job'])
+            if not options['force']:
+                applications = applications.exclude(feature_vector__model_version=model.model_version)
+
+            application_ids = list(applications.values_list('id', flat=True))
+            self.stdout.write(f'📦 Modèle {model.model_version}: {len(application_ids)} candidatures à indexer')
+
+            indexed = 0
+            failed = 0
+            batch_size = max(1, options['batch_size'])
+            for start in range(0, len(application_ids), batch_size):
+                batch = list(Application.objects.filter(id__in=application_ids[start:start + batch_size]).order_by('id'))
+                successes, errors = index_applications(model, batch)
+                indexed += len(successes)
+                failed += len(errors)
+                for error in errors:
+                    self.stdout.write(self.style.WARNING(
+                        f"⚠️ Candidature {error['application_id']} ({error['filename']}): {error['error']}"
+                    ))
+                self.stdout.write(f'📄 {indexed + failed}/{len(application_ids)} traitées')
+
+            self.stdout.write(self.style.SUCCESS(f'✅ {indexed} candidatures indexées, {failed} échecs'))
@@ -0,0 +1,199 @@
+"""
+Commande Django qui traite les files d'analyse (candidatures et lots asynchrones)
+Usage: python manage.py run_cv_workers [--workers 4] [--batch-size 16] [--max-wait 0.5] [--once]
+
+Lance --workers processus de traitement qui se partagent la file; le débit augmente en
+ajoutant des processus, ou en lançant la commande sur d'autres serveurs reliés à la même
+base PostgreSQL. Un lot incomplet attend au plus --max-wait secondes d'autres éléments:
+des lots plus grands augmentent le débit, une attente plus courte réduit la latence.
+SIGTERM ou Ctrl+C: chaque processus termine son lot en cours puis s'arrête.
+"""
+import signal
+import logging
+import multiprocessing
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from ai_analysis.parallel import CVWorkerPool
+from ai_analysis.registry import ModelRegistry
+from ai_analysis.sandbox import ExtractionSandbox
+from ai_analysis.batches import BatchFileQueue
+from ai_analysis.work_queue import ApplicationQueue, CVQueueWorker, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+def build_worker(index: int, options):
+    """
+    Processus de traitement avec son propre registre de modèles: (worker, bac à sable)
+    L'analyse se fait dans le processus (pas de pool imbriqué); l'extraction passe par
+    un bac à sable d'un seul sous-processus si EXTRACTION_SANDBOX est actif
+    """
+    from ai_analysis.services import create_analyzer, cv_cache, cv_processor, job_profiles
+
+    config = settings.AI_MODEL_CONFIG
+    sandbox = None
+    if config.get('EXTRACTION_SANDBOX', False):
+        sandbox = ExtractionSandbox(
+            cv_processor,
+            max_workers=1,
+            timeout=config.get('EXTRACTION_TIMEOUT', 30),
+            memory_limit_mb=config.get('EXTRACTION_MEMORY_MB', 512),
+            max_documents=config.get('EXTRACTION_MAX_DOCUMENTS', 100)
+        )
+
+    registry = ModelRegistry(
+        str(config['MODELS_DIR']),
+        analyzer_factory=create_analyzer,
+        pool_factory=lambda analyzer: CVWorkerPool(analyzer, max_workers=1, sandbox=sandbox),
+        check_interval=config.get('MODEL_REGISTRY_CHECK_INTERVAL', 30)
+    )
+    worker = CVQueueWorker(
+        registry,
+        name=worker_name(index),
+        batch_size=options['batch_size'],
+        max_wait=options['max_wait'],
+        poll_interval=options['poll_interval'],
+        max_attempts=options['max_attempts'],
+        backoff=config.get('QUEUE_RETRY_BACKOFF', 30),
+        backoff_max=config.get('QUEUE_RETRY_BACKOFF_MAX', 3600),
+        lease_seconds=config.get('QUEUE_LEASE_SECONDS', 600),
+        metrics_interval=config.get('QUEUE_METRICS_INTERVAL', 60),
+        sources=[ApplicationQueue(job_profiles=job_profiles), BatchFileQueue(cache=cv_cache, job_profiles=job_profiles)]
+    )
+    return worker, sandbox
+
+
+def close_worker(worker: CVQueueWorker, sandbox):
+    current = worker.registry.current
+    if current is not None:
+        current.retire()
+    if sandbox is not None:
+        sandbox.shutdown()
+
+
+def worker_main(index: int, options):
+    """Point d'entrée d'un processus de traitement"""
+    # Le processus principal gère Ctrl+C et transmet SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker, sandbox = build_worker(index, options)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    try:
+        worker.run()
+    finally:
+        close_worker(worker, sandbox)
+
+
+class Command(BaseCommand):
+    help = 'Traite la file des candidatures avec plusieurs processus (arrêt propre sur SIGTERM)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('QUEUE_WORKERS', 2),
+            help='Nombre de processus de traitement'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('QUEUE_BATCH_SIZE', 16),
+            help='Éléments réservés et analysés ensemble par processus'
+        )
+        parser.add_argument(
+            '--max-wait',
+            type=float,
+            default=settings.AI_MODEL_CONFIG.get('QUEUE_BATCH_MAX_WAIT', 0.5),
+            help='Secondes d\'attente maximale pour compléter un lot incomplet (0 = aucune)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.AI_MODEL_CONFIG.get('QUEUE_POLL_INTERVAL', 2.0),
+            help='Secondes d\'attente quand la file est vide'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('QUEUE_MAX_ATTEMPTS', 3),
+            help='Tentatives avant l\'échec définitif d\'un élément'
+        )
+        parser.add_argument(
+            '--shutdown-timeout',
+            type=float,
+            default=120.0,
+            help='Secondes accordées aux processus pour terminer leur lot à l\'arrêt'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite la file jusqu\'à ce qu\'elle soit vide dans ce processus, puis s\'arrête'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers doit être au moins 1')
+        if options['max_wait'] < 0:
+            raise CommandError('--max-wait ne peut pas être négatif')
+
+        if options['once']:
+            worker, sandbox = build_worker(0, options)
+            try:
+                if not worker.registry.ensure_loaded():
+                    raise CommandError('L\'IA n\'est pas encore entraînée!')
+                while worker.run_once():
+                    pass
+            finally:
+                close_worker(worker, sandbox)
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Files traitées: {worker.processed} éléments analysés, {worker.failed} échecs'
+            ))
+            self.stdout.write(f'📊 {worker.metrics.describe()}')
+            return
+
+        context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() \
+            else multiprocessing.get_context()
+        stopping = False
+        processes = {}
+
+        def start(index):
+            # Les connexions à la base ne doivent pas être partagées avec les processus fils
+            connections.close_all()
+            process = context.Process(target=worker_main, args=(index, options), name=f'cv-worker-{index}')
+            process.start()
+            processes[index] = process
+
+        def request_stop(*args):
+            nonlocal stopping
+            if not stopping:
+                stopping = True
+                self.stdout.write('🛑 Arrêt demandé: fin des lots en cours...')
+                for process in processes.values():
+                    if process.is_alive():
+                        process.terminate()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        for index in range(options['workers']):
+            start(index)
+        self.stdout.write(f'🚀 {options["workers"]} processus de traitement démarrés')
+
+        # Supervision: un processus terminé anormalement est relancé
+        while not stopping:
+            for index, process in list(processes.items()):
+                process.join(timeout=1.0 / len(processes))
+                if stopping:
+                    break
+                if not process.is_alive():
+                    logger.error(f"Processus de traitement {process.name} terminé (code {process.exitcode}), relance")
+                    start(index)
+
+        for process in processes.values():
+            process.join(timeout=options['shutdown_timeout'])
+            if process.is_alive():
+                logger.error(f"Processus {process.name} toujours actif après {options['shutdown_timeout']}s, arrêt forcé")
+                process.kill()
+                process.join()
+        self.stdout.write(self.style.SUCCESS('✅ Processus de traitement arrêtés'))
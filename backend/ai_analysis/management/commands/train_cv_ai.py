@@ -1,9 +1,21 @@
 """
 Commande Django pour entraîner l'IA de filtrage de CV
-Usage: python manage.py train_cv_ai --dataset /path/to/your/cv/dataset
+Usage: python manage.py train_cv_ai --dataset /path/to/your/cv/dataset [--max-per-domain 0 --sampling random]
+       [--training-data /path/to/training_data.csv]
+       python manage.py train_cv_ai --incremental --from-db --since 2024-01-31
 """
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from ai_analysis.cv_processor import CVAnalyzer
+from django.utils.dateparse import parse_date, parse_datetime
+from ai_analysis.artifacts import ArtifactError
+from ai_analysis.dataset import SAMPLING_POLICIES
+from ai_analysis.quality_models import AUTO_BACKEND, QUALITY_BACKENDS
+from ai_analysis.registry import register_model_bundle
+from ai_analysis.services import create_analyzer
+from ai_analysis.incremental import (
+    CATEGORY_DOMAINS, cv_analysis_coverage, cv_analysis_domains, dataset_domains,
+    iter_cv_analysis_batches, iter_dataset_batches
+)
 import os
 import logging
 
@@ -16,7 +28,6 @@ class Command(BaseCommand):
         parser.add_argument(
             '--dataset',
             type=str,
-            required=True,
             help='Chemin vers le dossier contenant vos CV pour l\'entraînement'
         )
         parser.add_argument(
@@ -24,6 +35,92 @@ class Command(BaseCommand):
             action='store_true',
             help='Exécute des tests après l\'entraînement'
         )
+        parser.add_argument(
+            '--max-per-domain',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('TRAINING_MAX_CV_PER_DOMAIN', 50),
+            help='Nombre maximum de CV par domaine (0 = tout le dataset)'
+        )
+        parser.add_argument(
+            '--sampling',
+            choices=SAMPLING_POLICIES,
+            default=settings.AI_MODEL_CONFIG.get('TRAINING_SAMPLING', 'first'),
+            help='Choix des CV quand un domaine dépasse le maximum: premiers fichiers ou tirage aléatoire'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Graine du tirage aléatoire'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('WORKERS') or None,
+            help='Nombre de processus d\'extraction (par défaut: nombre de coeurs)'
+        )
+        parser.add_argument(
+            '--manifest',
+            type=str,
+            default=None,
+            help='Manifeste des textes extraits (par défaut: <dataset>/.extraction_manifest.json)'
+        )
+        parser.add_argument(
+            '--no-manifest',
+            action='store_true',
+            help='Ré-extrait tous les PDF sans lire ni écrire de manifeste'
+        )
+        parser.add_argument(
+            '--quality-backend',
+            choices=[AUTO_BACKEND] + list(QUALITY_BACKENDS),
+            default=settings.AI_MODEL_CONFIG.get('QUALITY_BACKEND', AUTO_BACKEND),
+            help='Modèle de qualité; auto = le plus exact sous le budget de latence'
+        )
+        parser.add_argument(
+            '--latency-budget-ms',
+            type=float,
+            default=settings.AI_MODEL_CONFIG.get('QUALITY_LATENCY_BUDGET_MS'),
+            help='Budget de latence p99 par CV (ms) pour la sélection automatique du modèle de qualité'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Entraînement par mini-lots (hachage + partial_fit), poursuit les modèles incrémentaux existants'
+        )
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Mode incrémental: apprend des analyses de CV enregistrées au lieu du dossier du dataset'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            default=None,
+            help='Mode incrémental avec --from-db: seulement les analyses traitées depuis cette date'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.AI_MODEL_CONFIG.get('TRAINING_BATCH_SIZE', 256),
+            help='Mode incrémental: nombre de CV par mini-lot'
+        )
+        parser.add_argument(
+            '--max-unmapped-share',
+            type=float,
+            default=settings.AI_MODEL_CONFIG.get('TRAINING_MAX_UNMAPPED_SHARE', 0.05),
+            help='Mode --from-db: part maximale d\'analyses sans domaine connu du modèle avant l\'abandon'
+        )
+        parser.add_argument(
+            '--training-data',
+            type=str,
+            default=settings.AI_MODEL_CONFIG['TRAINING_DATA_PATH'],
+            help='Fichier CSV où enregistrer les données d\'entraînement préparées'
+        )
+        parser.add_argument(
+            '--no-activate',
+            action='store_true',
+            help='Enregistre le modèle dans AIModel sans l\'activer (les serveurs gardent le modèle actif)'
+        )
 
     def handle(self, *args, **options):
         dataset_path = options['dataset']
@@ -33,15 +130,35 @@ class Command(BaseCommand):
             self.style.SUCCESS('🚀 Début de l\'entraînement des modèles IA')
         )
         
+        if options['incremental'] and options['from_db']:
+            return self.train_incremental(options)
+        
+        if not dataset_path:
+            raise CommandError('--dataset est obligatoire (sauf en mode --incremental --from-db)')
         if not os.path.exists(dataset_path):
             raise CommandError(f'Le dossier {dataset_path} n\'existe pas!')
         
-        # Initialiser l'analyseur
-        analyzer = CVAnalyzer()
+        if options['incremental']:
+            return self.train_incremental(options)
+        
+        # Initialiser l'analyseur (budgets d'extraction du service)
+        analyzer = create_analyzer(
+            quality_backend=options['quality_backend'],
+            quality_latency_budget_ms=options['latency_budget_ms']
+        )
         
-        # Traitement du dataset
+        manifest_path = self.get_manifest_path(options)
+        
+        # Traitement du dataset (extraction parallèle et incrémentale)
         self.stdout.write('📄 Traitement des CV du dataset...')
-        cv_dataframe = analyzer.process_cv_dataset(dataset_path)
+        cv_dataframe = analyzer.process_cv_dataset(
+            dataset_path,
+            max_per_domain=options['max_per_domain'] or None,
+            sampling=options['sampling'],
+            seed=options['seed'],
+            workers=options['workers'],
+            manifest_path=manifest_path
+        )
         
         if cv_dataframe.empty:
             raise CommandError('Aucun CV trouvé dans le dataset!')
@@ -56,14 +173,16 @@ class Command(BaseCommand):
         # Entraîner les modèles
         self.stdout.write('🤖 Entraînement des modèles d\'IA...')
         trained_df = analyzer.train_models(cv_dataframe)
+        self.display_quality_benchmark(analyzer)
         
         # Sauvegarder les modèles
-        models_path = "C:/Users/Me/Desktop/RH/ai-model"
-        analyzer.save_models(models_path)
+        models_path = str(settings.AI_MODEL_CONFIG['MODELS_DIR'])
+        bundle_dir = analyzer.save_models(models_path)
+        self.register_model(analyzer, bundle_dir, options, f'{len(cv_dataframe)} CV du dataset {dataset_path}')
         
         # Sauvegarder les données d'entraînement
-        data_path = "C:/Users/Me/Desktop/RH/data/training_data.csv"
-        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        data_path = options['training_data']
+        os.makedirs(os.path.dirname(os.path.abspath(data_path)), exist_ok=True)
         trained_df.to_csv(data_path, index=False, encoding='utf-8')
         
         self.stdout.write(
@@ -74,6 +193,114 @@ class Command(BaseCommand):
         if run_tests:
             self.run_filtering_tests(analyzer, trained_df)
     
+    def get_manifest_path(self, options):
+        if options['no_manifest']:
+            return None
+        return options['manifest'] or os.path.join(options['dataset'], '.extraction_manifest.json')
+    
+    def train_incremental(self, options):
+        """Entraîne ou met à jour les modèles incrémentaux sans charger tout le corpus"""
+        models_path = str(settings.AI_MODEL_CONFIG['MODELS_DIR'])
+        
+        analyzer = create_analyzer()
+        try:
+            # Sans projection mémoire: les modèles vont être modifiés par partial_fit
+            analyzer.load_models(models_path, mmap=False)
+        except (ArtifactError, OSError):
+            pass
+        if analyzer.is_incremental:
+            self.stdout.write('🔁 Mise à jour des modèles incrémentaux existants')
+        else:
+            self.stdout.write('🆕 Nouveaux modèles incrémentaux (hachage + SGD)')
+            analyzer.use_incremental_models()
+        
+        if options['from_db']:
+            since = None
+            if options['since']:
+                since = parse_datetime(options['since']) or parse_date(options['since'])
+                if since is None:
+                    raise CommandError(f'Date invalide: {options["since"]}')
+            known_domains = self.known_domains(analyzer, options)
+            self.check_domain_coverage(known_domains, since, options['max_unmapped_share'])
+            domain_classes = cv_analysis_domains(known_domains)
+            batches = iter_cv_analysis_batches(known_domains, batch_size=options['batch_size'], since=since)
+        else:
+            domain_classes = dataset_domains(options['dataset'])
+            batches = iter_dataset_batches(
+                analyzer,
+                options['dataset'],
+                batch_size=options['batch_size'],
+                max_per_domain=options['max_per_domain'] or None,
+                sampling=options['sampling'],
+                seed=options['seed'],
+                workers=options['workers'],
+                manifest_path=self.get_manifest_path(options)
+            )
+        
+        self.stdout.write('🤖 Entraînement incrémental des modèles d\'IA...')
+        total = analyzer.train_incremental(batches, domain_classes=domain_classes)
+        if not total:
+            raise CommandError('Aucun CV disponible pour l\'entraînement incrémental!')
+        
+        bundle_dir = analyzer.save_models(models_path)
+        self.register_model(analyzer, bundle_dir, options, f'Entraînement incrémental ({total} CV)')
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ ENTRAÎNEMENT INCRÉMENTAL TERMINÉ ({total} CV, version {analyzer.model_version})')
+        )
+    
+    def known_domains(self, analyzer, options):
+        """Domaines que le modèle peut apprendre: ceux du modèle existant, sinon ceux du dataset"""
+        if hasattr(analyzer.domain_classifier, 'classes_'):
+            return set(analyzer.domain_classifier.classes_)
+        if options['dataset']:
+            return set(dataset_domains(options['dataset']))
+        return set(CATEGORY_DOMAINS.values())
+    
+    def check_domain_coverage(self, known_domains, since, max_unmapped_share):
+        """Abandon si trop d'analyses ont une catégorie sans domaine connu (elles seraient ignorées)"""
+        total, unmapped = cv_analysis_coverage(known_domains, since=since)
+        skipped = sum(unmapped.values())
+        if not skipped:
+            return
+        details = ', '.join(f'{category}: {count}' for category, count in sorted(unmapped.items()))
+        share = skipped / total
+        if share > max_unmapped_share:
+            raise CommandError(
+                f'{skipped}/{total} analyses ({share:.0%}) ont une catégorie sans domaine connu du modèle '
+                f'({details}); complétez CATEGORY_DOMAINS (ai_analysis/incremental.py)'
+            )
+        self.stdout.write(self.style.WARNING(f'⚠️ {skipped}/{total} analyses ignorées, catégorie sans domaine: {details}'))
+    
+    def register_model(self, analyzer, bundle_dir, options, description):
+        """Enregistre le bundle dans AIModel; une fois actif, les serveurs le chargent à chaud"""
+        activate = not options['no_activate']
+        record = register_model_bundle(
+            bundle_dir,
+            analyzer.model_version,
+            accuracy=analyzer.domain_accuracy,
+            description=description,
+            activate=activate
+        )
+        state = 'actif' if activate else 'inactif'
+        self.stdout.write(f'📦 Modèle {record.version} enregistré ({record.name}, {state})')
+    
+    def display_quality_benchmark(self, analyzer):
+        """Affiche l'exactitude et la latence par CV de chaque backend de qualité"""
+        if not analyzer.quality_benchmark:
+            return
+        budget = analyzer.quality_latency_budget_ms
+        budget_label = f'{budget:g} ms' if budget is not None else 'aucun'
+        self.stdout.write(f'\n⏱️ BENCHMARK DES MODÈLES DE QUALITÉ (budget p99: {budget_label}):')
+        self.stdout.write(
+            f'   {"Backend":<12} {"Exactitude":>10} {"p50 (ms)":>10} {"p99 (ms)":>10} {"Taille (Ko)":>12}'
+        )
+        for result in analyzer.quality_benchmark:
+            selected = ' ✅' if result['model'] is analyzer.quality_classifier else ''
+            self.stdout.write(
+                f'   {result["backend"]:<12} {result["accuracy"]:>10.3f} {result["p50_ms"]:>10.3f} '
+                f'{result["p99_ms"]:>10.3f} {result["size_bytes"] / 1024:>12.1f}{selected}'
+            )
+    
     def display_dataset_stats(self, cv_dataframe):
         """Affiche les statistiques du dataset"""
         self.stdout.write('\n📊 STATISTIQUES DU DATASET:')
@@ -95,11 +322,9 @@ class Command(BaseCommand):
         self.stdout.write('\n🧪 Tests du système de filtrage...')
         
         # Analyser tous les CV
-        cv_analyses = []
-        for idx, row in cv_dataframe.iterrows():
-            analysis = analyzer.analyze_cv(row['raw_text'])
-            analysis['filename'] = row['filename']
-            cv_analyses.append(analysis)
+        cv_analyses = analyzer.analyze_cvs(cv_dataframe['raw_text'].tolist())
+        for analysis, filename in zip(cv_analyses, cv_dataframe['filename']):
+            analysis['filename'] = filename
         
         # Test pour chaque domaine
         domains = ['informatique', 'enseignement', 'avocat', 'marketing', 'finance']
@@ -0,0 +1,310 @@
+"""
+Correspondance entre un CV et un poste
+Score de correspondance (compétences, expérience, mots-clés) et profil de poste compilé
+une fois par révision de l'offre (JobMatchProfile), réutilisé d'une requête à l'autre
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .featurizer import CVFeatures, featurize, vectorize
+from .ranking import job_document
+from .skill_matcher import SkillMatcher
+
+
+# Mots-clés techniques du score de description
+DESCRIPTION_KEYWORDS = ['python', 'java', 'javascript', 'react', 'django', 'machine learning',
+                        'data', 'sql', 'git', 'agile', 'scrum', 'docker', 'kubernetes', 'api',
+                        'frontend', 'backend', 'database', 'cloud', 'aws', 'azure']
+
+
+def find_description_keywords(text_lower):
+    """Mots-clés de description présents dans un texte en minuscules"""
+    return {keyword for keyword in DESCRIPTION_KEYWORDS if keyword in text_lower}
+
+
+def calculate_job_match_score(cv_text, required_skills, job_description, job_requirements, experience_required, candidate_experience,
+                              matched_skills=None, job_keywords=None, experience_range=None):
+    """
+    Calcule un score de correspondance entre un CV et un poste
+    matched_skills: compétences requises déjà trouvées dans le CV (évite une nouvelle recherche)
+    job_keywords: mots-clés de description déjà trouvés dans l'offre (find_description_keywords)
+    experience_range: fourchette d'expérience déjà analysée (parse_experience_range)
+    """
+    total_score = 0
+    
+    # 1. Score basé sur les compétences requises (50% du score total)
+    skills_score = 0
+    if required_skills:
+        if matched_skills is not None:
+            found_skills = len(matched_skills)
+        else:
+            found_skills = 0
+            for skill in required_skills:
+                if skill in cv_text:
+                    found_skills += 1
+        skills_score = (found_skills / len(required_skills)) * 50 if required_skills else 0
+    
+    # 2. Score basé sur l'expérience (30% du score total)
+    experience_score = calculate_experience_match(experience_required, candidate_experience, experience_range)
+    
+    # 3. Score basé sur les mots-clés de la description (20% du score total)
+    if job_keywords is None:
+        job_keywords = find_description_keywords(f"{job_description} {job_requirements}")
+    found_keywords = len(job_keywords) + sum(
+        1 for keyword in DESCRIPTION_KEYWORDS if keyword not in job_keywords and keyword in cv_text
+    )
+    description_score = min((found_keywords / len(DESCRIPTION_KEYWORDS)) * 20, 20)
+    
+    total_score = skills_score + experience_score + description_score
+    return min(total_score, 100)
+
+
+def calculate_experience_match(experience_required, candidate_experience, experience_range=None):
+    """
+    Calcule le score de correspondance d'expérience (sur 30 points)
+    experience_range: (min, max) déjà obtenu par parse_experience_range
+    """
+    if not experience_required:
+        return 30  # Si pas d'exigence, score maximum
+
+    # Parser l'expérience requise
+    required_min, required_max = experience_range or parse_experience_range(experience_required)
+
+    # Hard filter: if candidate experience is below required minimum, score is 0 (except for entry-level)
+    if required_min >= 1 and candidate_experience < required_min:
+        return 0
+
+    # Si le candidat n'a pas d'expérience et que c'est requis
+    if candidate_experience == 0 and required_min > 0:
+        return 0
+
+    # Si le candidat a l'expérience exacte requise
+    if required_min <= candidate_experience <= required_max:
+        return 30  # Score maximum
+
+    # Si le candidat a plus d'expérience que requis (sur-qualification)
+    if candidate_experience > required_max:
+        # Légère pénalité pour sur-qualification
+        excess = candidate_experience - required_max
+        penalty = min(excess * 2, 10)  # Maximum 10 points de pénalité
+        return max(30 - penalty, 20)
+
+    return 15  # Score moyen par défaut
+
+
+def parse_experience_range(experience_str):
+    """
+    Parse une string d'expérience comme '1-3' ou '5-10' ou '10+'
+    Retourne (min_years, max_years)
+    """
+    experience_str = experience_str.lower().strip()
+    
+    if '+' in experience_str:
+        # Format '10+'
+        min_years = int(experience_str.replace('+', ''))
+        max_years = min_years + 10  # Assume max 10 ans de plus
+        return min_years, max_years
+    
+    if '-' in experience_str:
+        # Format '1-3'
+        parts = experience_str.split('-')
+        if len(parts) == 2:
+            try:
+                min_years = int(parts[0])
+                max_years = int(parts[1])
+                return min_years, max_years
+            except ValueError:
+                pass
+    
+    # Format '0' ou autre
+    try:
+        years = int(experience_str)
+        return years, years
+    except ValueError:
+        return 0, 0  # Défaut si impossible à parser
+
+
+class JobMatchProfile:
+    """
+    Partie « poste » du score, compilée une seule fois: compétences requises et leur automate,
+    fourchette d'expérience, mots-clés de l'offre et vecteur TF-IDF (par version du modèle)
+    Le score d'un CV ne fait plus que le travail propre au CV
+    """
+
+    def __init__(self, description: str = '', requirements: str = '', required_skills: str = '',
+                 experience_required: str = '', title: str = '', company: str = '', revision=None):
+        # Champs d'origine: JobProfileCache.for_fields(**fields) recompile le même profil
+        self.fields = {
+            'description': description or '',
+            'requirements': requirements or '',
+            'required_skills': required_skills or '',
+            'experience_required': experience_required or '',
+            'title': title or '',
+            'company': company or '',
+        }
+        self.title = title
+        self.company = company
+        self.revision = revision
+        self.experience_required = experience_required or ''
+        self.experience_range = parse_experience_range(self.experience_required)
+        self.skills_keywords = [skill.strip().lower() for skill in (required_skills or '').split(',') if skill.strip()]
+        self.skills_matcher = SkillMatcher(self.skills_keywords) if self.skills_keywords else None
+        self.job_keywords = find_description_keywords(f"{description or ''} {requirements or ''}".lower())
+        self.document = job_document(description, requirements, required_skills)
+        self._features = None
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_job(cls, job) -> 'JobMatchProfile':
+        return cls(
+            description=job.description,
+            requirements=job.requirements,
+            required_skills=job.skills_required,
+            experience_required=job.experience_required,
+            title=job.title,
+            company=job.company_name,
+            revision=job.updated_at
+        )
+
+    def accepts_experience(self, candidate_experience: int) -> bool:
+        """Filtre d'expérience de la cascade"""
+        required_min, required_max = self.experience_range
+        if required_max >= 10:
+            return candidate_experience >= 10
+        return required_min <= candidate_experience <= required_max
+
+    def match_skills(self, features: CVFeatures) -> List[str]:
+        """Compétences requises présentes dans un CV tokenisé"""
+        if self.skills_matcher is None:
+            return []
+        return self.skills_matcher.find_in_tokens(features.token_set, features.text_lower)
+
+    def accepts_skills(self, matched_skills: List[str], min_skills_match: int) -> bool:
+        if self.skills_matcher is None:
+            return True
+        return len(matched_skills) >= min(min_skills_match, len(self.skills_matcher))
+
+    def score(self, features: CVFeatures, candidate_experience: int, matched_skills: List[str]) -> float:
+        """Score de correspondance (même calcul que calculate_job_match_score)"""
+        return calculate_job_match_score(
+            features.text_lower,
+            self.skills_keywords,
+            '',
+            '',
+            self.experience_required,
+            candidate_experience,
+            matched_skills=matched_skills if self.skills_matcher else None,
+            job_keywords=self.job_keywords,
+            experience_range=self.experience_range
+        )
+
+    def breakdown(self, features: CVFeatures, candidate_experience: int, matched_skills: List[str]) -> Dict:
+        """
+        Détail de la correspondance enregistré avec l'analyse d'une candidature (CVAnalysis):
+        score global, scores des compétences et de l'expérience ramenés sur 100,
+        compétences requises trouvées et manquantes
+        """
+        matched = list(matched_skills) if self.skills_matcher else []
+        experience_score = calculate_experience_match(
+            self.experience_required, candidate_experience, self.experience_range
+        )
+        return {
+            'overall_score': self.score(features, candidate_experience, matched_skills),
+            'skill_match_score': round(len(matched) / len(self.skills_keywords) * 100, 2) if self.skills_keywords else 100.0,
+            'experience_match_score': round(experience_score * 100 / 30, 2),
+            'matched_skills': matched,
+            'missing_skills': [skill for skill in self.skills_matcher.skills if skill not in matched] if self.skills_matcher else [],
+        }
+
+    def vector(self, analyzer):
+        """Vecteur TF-IDF du poste pour le vectoriseur d'un modèle (calculé une fois par version)"""
+        key = analyzer.model_version
+        vector = self._vectors.get(key)
+        if vector is None:
+            with self._lock:
+                if self._features is None:
+                    self._features = featurize(self.document)
+                vector = vectorize(analyzer.vectorizer, [self._features])
+                # Seule la version courante est utile après un remplacement du modèle
+                self._vectors = {key: vector}
+        return vector
+
+
+class JobProfileCache:
+    """
+    Profils compilés en mémoire du processus, les plus récemment utilisés
+    Un profil de poste est recompilé dès que Job.updated_at change (vérifié à chaque
+    demande par une requête sur cette seule colonne); les profils construits à partir
+    des champs de la requête sont indexés par leur contenu
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple, JobMatchProfile]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple, revision=None) -> Optional[JobMatchProfile]:
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is None or profile.revision != revision:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return profile
+
+    def _put(self, key: Tuple, profile: JobMatchProfile) -> JobMatchProfile:
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def for_job(self, job_id) -> Optional[JobMatchProfile]:
+        """Profil de l'offre job_id à sa dernière révision (None si l'offre n'existe pas)"""
+        from jobs.models import Job
+
+        try:
+            job_id = int(job_id)
+        except (TypeError, ValueError):
+            return None
+        revision = Job.objects.filter(pk=job_id).values_list('updated_at', flat=True).first()
+        if revision is None:
+            return None
+
+        key = ('job', job_id)
+        profile = self._get(key, revision)
+        if profile is None:
+            job = Job.objects.filter(pk=job_id).first()
+            if job is None:
+                return None
+            profile = self._put(key, JobMatchProfile.from_job(job))
+        return profile
+
+    def for_fields(self, description: str, requirements: str, required_skills: str,
+                   experience_required: str, title: str = '', company: str = '') -> JobMatchProfile:
+        """Profil construit à partir des champs fournis dans la requête"""
+        fields = (description, requirements, required_skills, experience_required, title, company)
+        key = ('fields',) + fields
+        profile = self._get(key)
+        if profile is None:
+            profile = self._put(key, JobMatchProfile(*fields))
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None
+        }
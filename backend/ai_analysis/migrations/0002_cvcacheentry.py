@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_analysis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='Empreinte SHA-256')),
+                ('model_version', models.CharField(max_length=64, verbose_name='Version du modèle')),
+                ('extracted_text', models.TextField(verbose_name='Texte extrait')),
+                ('analysis', models.JSONField(default=dict, verbose_name="Résultat de l'analyse")),
+                ('size_bytes', models.PositiveIntegerField(default=0, help_text="Taille approximative de l'entrée, utilisée pour l'éviction", verbose_name='Taille (octets)')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name="Nombre d'accès")),
+                ('last_accessed_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Dernier accès')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé à')),
+            ],
+            options={
+                'verbose_name': "Entrée du cache d'analyse",
+                'verbose_name_plural': "Entrées du cache d'analyse",
+                'ordering': ['-last_accessed_at'],
+                'unique_together': {('file_hash', 'model_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0001_initial'),
+        ('ai_analysis', '0002_cvcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_version', models.CharField(db_index=True, max_length=64, verbose_name='Version du modèle')),
+                ('domain', models.CharField(blank=True, db_index=True, max_length=100, verbose_name='Domaine')),
+                ('n_features', models.PositiveIntegerField(verbose_name='Dimension')),
+                ('data', models.BinaryField(verbose_name='Vecteur')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='feature_vector', to='candidates.application', verbose_name='Candidature')),
+            ],
+            options={
+                'verbose_name': 'Vecteur de candidature',
+                'verbose_name_plural': 'Vecteurs de candidatures',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_analysis', '0003_applicationvector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingqueue',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text="Date à partir de laquelle l'élément peut être traité (délai entre tentatives)", verbose_name='Prochaine tentative'),
+        ),
+        migrations.AddField(
+            model_name='processingqueue',
+            name='worker',
+            field=models.CharField(blank=True, help_text="Processus ayant réservé l'élément", max_length=100, verbose_name='Processus de traitement'),
+        ),
+        migrations.AlterField(
+            model_name='processingqueue',
+            name='ai_model',
+            field=models.ForeignKey(blank=True, help_text='Modèle ayant traité la candidature (renseigné par le processus de traitement)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to='ai_analysis.aimodel', verbose_name='Modèle IA'),
+        ),
+        migrations.AddIndex(
+            model_name='processingqueue',
+            index=models.Index(fields=['status', 'priority', 'next_attempt_at'], name='queue_claim_idx'),
+        ),
+    ]
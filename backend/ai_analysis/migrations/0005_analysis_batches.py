@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ai_analysis', '0004_processing_queue_worker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('bulk', 'Analyse en lot'), ('job', 'Analyse pour un poste')], max_length=20, verbose_name="Type d'analyse")),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('completed', 'Terminé')], default='pending', max_length=20, verbose_name='Statut')),
+                ('parameters', models.JSONField(default=dict, help_text="Paramètres de la requête d'origine (domaine, poste, classement...)", verbose_name='Paramètres')),
+                ('total_files', models.PositiveIntegerField(default=0, verbose_name='Nombre de fichiers')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé à')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré à')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé à')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='analysis_batches', to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+            ],
+            options={
+                'verbose_name': "Lot d'analyse",
+                'verbose_name_plural': "Lots d'analyse",
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalysisBatchFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text="Ordre d'upload dans le lot", verbose_name='Position')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('file', models.FileField(blank=True, upload_to='ai_batches/%Y/%m/%d/', verbose_name='Fichier')),
+                ('file_hash', models.CharField(blank=True, max_length=64, verbose_name='Empreinte SHA-256')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('completed', 'Terminé'), ('failed', 'Échec'), ('retrying', 'Nouvelle tentative')], default='pending', max_length=20, verbose_name='Statut')),
+                ('priority', models.PositiveIntegerField(default=3, help_text='1 = haute priorité, 5 = basse priorité', verbose_name='Priorité')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name="Message d'erreur")),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Processus de traitement')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Résultat')),
+                ('processing_time', models.FloatField(blank=True, null=True, verbose_name='Temps de traitement (secondes)')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré à')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé à')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé à')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='ai_analysis.analysisbatch', verbose_name='Lot')),
+            ],
+            options={
+                'verbose_name': "Fichier de lot d'analyse",
+                'verbose_name_plural': "Fichiers de lots d'analyse",
+                'ordering': ['batch', 'position'],
+                'indexes': [models.Index(fields=['status', 'priority', 'next_attempt_at'], name='batch_file_claim_idx')],
+                'unique_together': {('batch', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+def fill_scores(apps, schema_editor):
+    """Domaine et score de classement des fichiers déjà traités (voir batches.ranking_score)"""
+    AnalysisBatchFile = apps.get_model('ai_analysis', 'AnalysisBatchFile')
+    rows = AnalysisBatchFile.objects.filter(status='completed', result__isnull=False).select_related('batch')
+    for row in rows.iterator():
+        result = row.result or {}
+        if result.get('status') != 'success':
+            continue
+        if row.batch.kind == 'job':
+            similarity = row.batch.parameters.get('ranking') == 'similarity'
+            score = result.get('similarity_score' if similarity else 'job_match_score')
+        else:
+            score = result.get('quality_score')
+        AnalysisBatchFile.objects.filter(pk=row.pk).update(domain=result.get('domain', ''), score=score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_analysis', '0005_analysis_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisbatchfile',
+            name='domain',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Domaine'),
+        ),
+        migrations.AddField(
+            model_name='analysisbatchfile',
+            name='score',
+            field=models.FloatField(blank=True, help_text='Clé du classement de la synthèse: correspondance ou similarité (poste), qualité (lot)', null=True, verbose_name='Score de classement'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisbatchfile',
+            index=models.Index(fields=['batch', 'domain', 'score'], name='batch_file_rank_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from candidates.models import Application
@@ -95,7 +97,10 @@ class ProcessingQueue(models.Model):
         AIModel,
         on_delete=models.CASCADE,
         related_name='processing_jobs',
-        verbose_name=_('Modèle IA')
+        verbose_name=_('Modèle IA'),
+        blank=True,
+        null=True,
+        help_text=_('Modèle ayant traité la candidature (renseigné par le processus de traitement)')
     )
     status = models.CharField(
         _('Statut'),
@@ -117,6 +122,17 @@ class ProcessingQueue(models.Model):
         blank=True,
         null=True
     )
+    next_attempt_at = models.DateTimeField(
+        _('Prochaine tentative'),
+        default=timezone.now,
+        help_text=_('Date à partir de laquelle l\'élément peut être traité (délai entre tentatives)')
+    )
+    worker = models.CharField(
+        _('Processus de traitement'),
+        max_length=100,
+        blank=True,
+        help_text=_('Processus ayant réservé l\'élément')
+    )
     processing_time = models.FloatField(
         _('Temps de traitement (secondes)'),
         blank=True,
@@ -141,6 +157,9 @@ class ProcessingQueue(models.Model):
         verbose_name = _('File de traitement')
         verbose_name_plural = _('Files de traitement')
         ordering = ['priority', '-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at'], name='queue_claim_idx'),
+        ]
 
     def __str__(self):
         return f"Traitement {self.application.candidate.full_name} - {self.status}"
@@ -359,3 +378,276 @@ class AnalyticsReport(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.date_from} - {self.date_to})"
+
+
+class CVCacheEntry(models.Model):
+    """
+    Cache persistant des extractions et analyses de CV
+    Adressé par l'empreinte SHA-256 du fichier et la version du modèle
+    """
+    file_hash = models.CharField(
+        _('Empreinte SHA-256'),
+        max_length=64
+    )
+    model_version = models.CharField(
+        _('Version du modèle'),
+        max_length=64
+    )
+    extracted_text = models.TextField(
+        _('Texte extrait')
+    )
+    analysis = models.JSONField(
+        _('Résultat de l\'analyse'),
+        default=dict
+    )
+    size_bytes = models.PositiveIntegerField(
+        _('Taille (octets)'),
+        default=0,
+        help_text=_('Taille approximative de l\'entrée, utilisée pour l\'éviction')
+    )
+    hit_count = models.PositiveIntegerField(
+        _('Nombre d\'accès'),
+        default=0
+    )
+    last_accessed_at = models.DateTimeField(
+        _('Dernier accès'),
+        auto_now_add=True,
+        db_index=True
+    )
+    created_at = models.DateTimeField(
+        _('Créé à'),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _('Entrée du cache d\'analyse')
+        verbose_name_plural = _('Entrées du cache d\'analyse')
+        ordering = ['-last_accessed_at']
+        unique_together = ['file_hash', 'model_version']
+
+    def __str__(self):
+        return f"{self.file_hash[:12]} ({self.model_version})"
+
+
+class ApplicationVector(models.Model):
+    """
+    Vecteur TF-IDF creux d'une candidature analysée, au format binaire compact
+    (indices int32 puis valeurs float32, voir vector_index.py)
+    Chargé dans les index de similarité en mémoire, par offre ou par domaine
+    """
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        related_name='feature_vector',
+        verbose_name=_('Candidature')
+    )
+    model_version = models.CharField(
+        _('Version du modèle'),
+        max_length=64,
+        db_index=True
+    )
+    domain = models.CharField(
+        _('Domaine'),
+        max_length=100,
+        blank=True,
+        db_index=True
+    )
+    n_features = models.PositiveIntegerField(
+        _('Dimension')
+    )
+    data = models.BinaryField(
+        _('Vecteur')
+    )
+    updated_at = models.DateTimeField(
+        _('Dernière modification'),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _('Vecteur de candidature')
+        verbose_name_plural = _('Vecteurs de candidatures')
+
+    def __str__(self):
+        return f"Vecteur {self.application_id} ({self.model_version})"
+
+
+class AnalysisBatch(models.Model):
+    """
+    Analyse asynchrone d'un lot de CV uploadés (réponse 202, suivi par l'endpoint de statut)
+    Les fichiers sont traités par la file (voir AnalysisBatchFile et run_cv_workers)
+    """
+    KIND_CHOICES = [
+        ('bulk', _('Analyse en lot')),
+        ('job', _('Analyse pour un poste')),
+    ]
+    STATUS_CHOICES = [
+        ('pending', _('En attente')),
+        ('processing', _('En cours')),
+        ('completed', _('Terminé')),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    kind = models.CharField(
+        _('Type d\'analyse'),
+        max_length=20,
+        choices=KIND_CHOICES
+    )
+    status = models.CharField(
+        _('Statut'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    parameters = models.JSONField(
+        _('Paramètres'),
+        default=dict,
+        help_text=_('Paramètres de la requête d\'origine (domaine, poste, classement...)')
+    )
+    total_files = models.PositiveIntegerField(
+        _('Nombre de fichiers'),
+        default=0
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='analysis_batches',
+        verbose_name=_('Créé par'),
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(
+        _('Créé à'),
+        auto_now_add=True
+    )
+    started_at = models.DateTimeField(
+        _('Démarré à'),
+        blank=True,
+        null=True
+    )
+    completed_at = models.DateTimeField(
+        _('Terminé à'),
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = _('Lot d\'analyse')
+        verbose_name_plural = _('Lots d\'analyse')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Lot {self.id} ({self.kind}, {self.total_files} fichiers)"
+
+
+class AnalysisBatchFile(models.Model):
+    """
+    Fichier d'un lot d'analyse, élément de file de traitement
+    Mêmes champs de file que ProcessingQueue; le fichier stocké est supprimé une fois traité
+    """
+    STATUS_CHOICES = ProcessingQueue.STATUS_CHOICES
+
+    batch = models.ForeignKey(
+        AnalysisBatch,
+        on_delete=models.CASCADE,
+        related_name='files',
+        verbose_name=_('Lot')
+    )
+    position = models.PositiveIntegerField(
+        _('Position'),
+        help_text=_('Ordre d\'upload dans le lot')
+    )
+    filename = models.CharField(
+        _('Nom du fichier'),
+        max_length=255
+    )
+    file = models.FileField(
+        _('Fichier'),
+        upload_to='ai_batches/%Y/%m/%d/',
+        blank=True
+    )
+    file_hash = models.CharField(
+        _('Empreinte SHA-256'),
+        max_length=64,
+        blank=True
+    )
+    status = models.CharField(
+        _('Statut'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    priority = models.PositiveIntegerField(
+        _('Priorité'),
+        default=3,
+        help_text=_('1 = haute priorité, 5 = basse priorité')
+    )
+    attempts = models.PositiveIntegerField(
+        _('Tentatives'),
+        default=0
+    )
+    error_message = models.TextField(
+        _('Message d\'erreur'),
+        blank=True,
+        null=True
+    )
+    next_attempt_at = models.DateTimeField(
+        _('Prochaine tentative'),
+        default=timezone.now
+    )
+    worker = models.CharField(
+        _('Processus de traitement'),
+        max_length=100,
+        blank=True
+    )
+    result = models.JSONField(
+        _('Résultat'),
+        blank=True,
+        null=True
+    )
+    domain = models.CharField(
+        _('Domaine'),
+        max_length=100,
+        blank=True
+    )
+    score = models.FloatField(
+        _('Score de classement'),
+        blank=True,
+        null=True,
+        help_text=_('Clé du classement de la synthèse: correspondance ou similarité (poste), qualité (lot)')
+    )
+    processing_time = models.FloatField(
+        _('Temps de traitement (secondes)'),
+        blank=True,
+        null=True
+    )
+    started_at = models.DateTimeField(
+        _('Démarré à'),
+        blank=True,
+        null=True
+    )
+    completed_at = models.DateTimeField(
+        _('Terminé à'),
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(
+        _('Créé à'),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _('Fichier de lot d\'analyse')
+        verbose_name_plural = _('Fichiers de lots d\'analyse')
+        ordering = ['batch', 'position']
+        unique_together = ['batch', 'position']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at'], name='batch_file_claim_idx'),
+            models.Index(fields=['batch', 'domain', 'score'], name='batch_file_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
@@ -0,0 +1,338 @@
+"""
+Pool de processus pour l'extraction et l'analyse parallèles des CV
+Les processus sont démarrés une seule fois et réutilisés entre les requêtes
+"""
+import os
+import pickle
+import logging
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+import scipy.sparse as sp
+
+from .featurizer import featurize
+
+logger = logging.getLogger(__name__)
+
+# Modules importés par le serveur forkserver avant de démarrer les processus
+FORKSERVER_PRELOAD = ['ai_analysis.cv_processor']
+
+# Analyseur du processus de travail (hérité du processus parent à l'initialisation)
+_worker_analyzer = None
+
+
+def _init_worker(payload: bytes):
+    """
+    Initialise un processus de travail: configure Django (l'analyse lit la table JobSkill)
+    puis reconstruit l'analyseur transmis sérialisé
+    """
+    global _worker_analyzer
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    _worker_analyzer = pickle.loads(payload)
+
+
+def _warm_up(_=None):
+    """Tâche vide utilisée pour démarrer tous les processus à l'avance"""
+    return os.getpid()
+
+
+def extract_cv_files(analyzer, items: List[Tuple[object, str]]) -> List[Dict]:
+    """
+    Extrait le texte de chaque CV, sans classification
+    Retourne toujours un résultat par fichier, les erreurs sont rapportées par fichier
+    """
+    results = []
+    for source, filename in items:
+        try:
+            text = analyzer.processor.extract_text(source, filename=filename)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'extraction de {filename}: {e}")
+            results.append({'filename': filename, 'status': 'error', 'error': str(e)})
+            continue
+
+        if not text:
+            results.append({
+                'filename': filename,
+                'status': 'error',
+                'error': 'Impossible d\'extraire le texte du CV',
+                'empty': True
+            })
+            continue
+
+        results.append({'filename': filename, 'status': 'success', 'text': text})
+    return results
+
+
+def analyze_cv_texts(analyzer, texts: List[str]) -> List[Dict]:
+    """
+    Analyse un lot de textes déjà extraits en une seule inférence vectorisée
+    En cas d'échec du lot, chaque texte est analysé séparément pour isoler l'erreur
+    """
+    try:
+        return [{'status': 'success', 'analysis': analysis} for analysis in analyzer.analyze_cvs(texts)]
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse du lot, analyse fichier par fichier: {e}")
+
+    results = []
+    for text in texts:
+        try:
+            results.append({'status': 'success', 'analysis': analyzer.analyze_cv(text)})
+        except Exception as e:
+            results.append({'status': 'error', 'error': str(e)})
+    return results
+
+
+def analyze_cv_features(analyzer, features: List) -> List[Dict]:
+    """
+    Analyse un lot de CV déjà tokenisés (featurize) en une seule inférence vectorisée
+    Chaque résultat garde sa ligne de la matrice TF-IDF ('vector'), réutilisée pour la
+    similarité sans nouvelle vectorisation; en cas d'échec du lot, CV par CV
+    """
+    if not features:
+        return []
+    try:
+        analyses, X = analyzer.analyze_features(features)
+        X = sp.csr_matrix(X)
+        return [
+            {'status': 'success', 'analysis': analysis, 'vector': X[row]}
+            for row, analysis in enumerate(analyses)
+        ]
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse du lot, analyse fichier par fichier: {e}")
+
+    results = []
+    for feature in features:
+        try:
+            analyses, X = analyzer.analyze_features([feature])
+            results.append({'status': 'success', 'analysis': analyses[0], 'vector': sp.csr_matrix(X)})
+        except Exception as e:
+            results.append({'status': 'error', 'error': str(e)})
+    return results
+
+
+def attach_analyses(results: List[Dict], outcomes: List[Dict]):
+    """
+    Associe les analyses (dans l'ordre des extractions réussies) aux résultats d'extraction
+    La ligne TF-IDF de l'analyse ('vector') est conservée avec le résultat quand elle existe
+    """
+    extracted = [result for result in results if result['status'] == 'success']
+    for result, outcome in zip(extracted, outcomes):
+        if outcome['status'] == 'error':
+            result.update(status='error', error=outcome['error'])
+            del result['text']
+            result.pop('features', None)
+            continue
+        outcome['analysis']['filename'] = result['filename']
+        result['analysis'] = outcome['analysis']
+        if 'vector' in outcome:
+            result['vector'] = outcome['vector']
+    return results
+
+
+def process_cv_files(analyzer, items: List[Tuple[object, str]], keep_features: bool = False) -> List[Dict]:
+    """
+    Extrait le texte de chaque CV puis analyse le lot en une seule inférence vectorisée
+    keep_features: chaque résultat réussi garde ses jetons ('features') et sa ligne TF-IDF ('vector')
+    Retourne toujours un résultat par fichier, les erreurs sont rapportées par fichier
+    """
+    results = extract_cv_files(analyzer, items)
+    extracted = [result for result in results if result['status'] == 'success']
+    if not extracted:
+        return results
+    if not keep_features:
+        return attach_analyses(results, analyze_cv_texts(analyzer, [result['text'] for result in extracted]))
+    for result in extracted:
+        result['features'] = featurize(result['text'])
+    return attach_analyses(results, analyze_cv_features(analyzer, [result['features'] for result in extracted]))
+
+
+def _extract_in_worker(items: List[Tuple[object, str]]) -> List[Dict]:
+    return extract_cv_files(_worker_analyzer, items)
+
+
+def _analyze_in_worker(texts: List[str]) -> List[Dict]:
+    return analyze_cv_texts(_worker_analyzer, texts)
+
+
+def _analyze_features_in_worker(features: List) -> List[Dict]:
+    return analyze_cv_features(_worker_analyzer, features)
+
+
+def _process_in_worker(items: List[Tuple[object, str]], keep_features: bool = False) -> List[Dict]:
+    return process_cv_files(_worker_analyzer, items, keep_features)
+
+
+def _transferable(source):
+    """
+    Les chemins et octets sont transmis tels quels aux processus de travail;
+    un objet fichier en mémoire est transmis par son contenu
+    """
+    if isinstance(source, (str, os.PathLike, bytes)):
+        return source
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _transferable_items(items: List[Tuple[object, str]]) -> List[Tuple[object, str]]:
+    return [(_transferable(source), name) for source, name in items]
+
+
+def _file_errors(chunk: List[Tuple[object, str]], message: str) -> List[Dict]:
+    return [{'filename': name, 'status': 'error', 'error': message} for _, name in chunk]
+
+
+def _text_errors(chunk: List, message: str) -> List[Dict]:
+    return [{'status': 'error', 'error': message} for _ in chunk]
+
+
+def _get_mp_context():
+    """
+    Processus démarrés par un serveur sans threads (forkserver), à défaut par spawn: un fork
+    du processus web hériterait des verrous et des connexions à la base de ses autres threads
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Le serveur importe une fois les bibliothèques d'analyse: chaque processus démarre sans les réimporter
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def pool_size(total_workers: int = 0, web_workers: int = 1) -> int:
+    """
+    Processus d'analyse d'un processus web: sa part du budget du serveur
+    total_workers: processus pour tout le serveur (0 = nombre de coeurs)
+    web_workers: processus web qui se partagent ce budget (workers gunicorn)
+    1 = analyse dans le processus web, sans pool
+    """
+    total = total_workers or os.cpu_count() or 1
+    return max(1, total // max(1, web_workers))
+
+
+class CVWorkerPool:
+    """
+    Pool borné de processus pour CVProcessor.extract_text + CVAnalyzer.analyze_cvs
+    Avec un bac à sable (voir sandbox.ExtractionSandbox), l'extraction est confiée à ses
+    sous-processus isolés et seule la classification utilise ce pool
+    """
+
+    def __init__(self, analyzer, max_workers: Optional[int] = None, min_parallel_files: int = 2,
+                 batch_size: int = 32, sandbox=None):
+        self.analyzer = analyzer
+        self.sandbox = sandbox
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel_files = min_parallel_files
+        # Nombre maximum de CV analysés ensemble par un processus
+        self.batch_size = batch_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=_get_mp_context(),
+                    initializer=_init_worker,
+                    initargs=(pickle.dumps(self.analyzer),)
+                )
+                # Démarrer tous les processus avant le premier lot
+                list(self._executor.map(_warm_up, range(self.max_workers)))
+                logger.info(f"Pool de {self.max_workers} processus démarré pour l'analyse des CV")
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def shutdown(self, sandbox: bool = True):
+        """Arrête les processus du pool (et ceux du bac à sable d'extraction si sandbox)"""
+        self._reset_executor()
+        if sandbox and self.sandbox is not None:
+            self.sandbox.shutdown()
+
+    def _run(self, items: List, serial: Callable, in_worker: Callable,
+             prepare: Callable, on_error: Callable) -> List[Dict]:
+        """
+        Répartit les éléments en lots sur les processus et rassemble les résultats dans l'ordre
+        Un lot en échec produit une erreur pour chacun de ses éléments (on_error(lot, message))
+        """
+        if len(items) < self.min_parallel_files or self.max_workers <= 1:
+            return serial(self.analyzer, items)
+
+        executor = self._get_executor()
+        # Des lots assez petits pour occuper tous les processus
+        chunk_size = max(1, min(self.batch_size, -(-len(items) // self.max_workers)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        futures = [executor.submit(in_worker, prepare(chunk)) for chunk in chunks]
+
+        results = []
+        broken = False
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except BrokenProcessPool as e:
+                broken = True
+                logger.error(f"Processus de travail interrompu pendant le traitement d'un lot: {e}")
+                results.extend(on_error(chunk, 'Processus de traitement interrompu'))
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement d'un lot: {e}")
+                results.extend(on_error(chunk, str(e)))
+
+        if broken:
+            # Le pool sera recréé lors du prochain lot
+            self._reset_executor()
+
+        return results
+
+    def process_files(self, items: List[Tuple[object, str]], keep_features: bool = False) -> List[Dict]:
+        """
+        Traite une liste de (source du fichier, nom d'origine)
+        La source est un chemin, des octets ou un objet fichier (voir CVProcessor.extract_text)
+        Chaque processus reçoit un lot de fichiers analysé en une seule inférence
+        keep_features: chaque résultat réussi porte aussi ses jetons ('features') et sa
+        ligne TF-IDF ('vector'), calculés une seule fois par l'analyse
+        Les résultats sont retournés dans l'ordre des fichiers fournis
+        """
+        if self.sandbox is not None:
+            results = self.sandbox.extract_files(items)
+            extracted = [result for result in results if result['status'] == 'success']
+            if not extracted:
+                return results
+            if not keep_features:
+                return attach_analyses(results, self.analyze_texts([result['text'] for result in extracted]))
+            for result in extracted:
+                result['features'] = featurize(result['text'])
+            return attach_analyses(results, self.analyze_features([result['features'] for result in extracted]))
+        return self._run(
+            items,
+            functools.partial(process_cv_files, keep_features=keep_features),
+            functools.partial(_process_in_worker, keep_features=keep_features),
+            _transferable_items,
+            _file_errors
+        )
+
+    def extract_files(self, items: List[Tuple[object, str]]) -> List[Dict]:
+        """Extrait seulement le texte d'une liste de (source du fichier, nom d'origine)"""
+        if self.sandbox is not None:
+            return self.sandbox.extract_files(items)
+        return self._run(items, extract_cv_files, _extract_in_worker, _transferable_items, _file_errors)
+
+    def analyze_texts(self, texts: List[str]) -> List[Dict]:
+        """Classifie des textes déjà extraits, par lots vectorisés, dans l'ordre fourni"""
+        return self._run(texts, analyze_cv_texts, _analyze_in_worker, list, _text_errors)
+
+    def analyze_features(self, features: List) -> List[Dict]:
+        """Classifie des CV déjà tokenisés; chaque résultat porte sa ligne TF-IDF ('vector')"""
+        return self._run(features, analyze_cv_features, _analyze_features_in_worker, list, _text_errors)
@@ -0,0 +1,46 @@
+"""
+Classement des CV par similarité textuelle avec un poste
+Les CV et le poste sont projetés dans l'espace TF-IDF du modèle; toutes les similarités
+cosinus sont obtenues par un seul produit de matrices creuses et seuls les k meilleurs
+sont triés (argpartition)
+"""
+from typing import Optional
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+# Modes de classement de analyze_job_cvs
+RANKING_MODES = ('score', 'similarity')
+
+
+def job_document(description: Optional[str], requirements: Optional[str], skills_required: Optional[str]) -> str:
+    """Texte du poste vectorisé pour la similarité (description, exigences, compétences)"""
+    return '\n'.join(part for part in (description, requirements, skills_required) if part)
+
+
+def cosine_similarities(X, Q) -> np.ndarray:
+    """
+    Similarités cosinus entre les lignes de X (CV) et celles de Q (postes): matrice dense (CV x postes)
+    Un seul produit creux; les lignes nulles (texte sans terme connu) ont une similarité nulle
+    """
+    X = normalize(X, norm='l2', copy=True)
+    Q = normalize(Q, norm='l2', copy=True)
+    similarities = X @ Q.T
+    if hasattr(similarities, 'toarray'):
+        similarities = similarities.toarray()
+    return np.asarray(similarities, dtype=np.float64)
+
+
+def top_k(scores, k: Optional[int]) -> np.ndarray:
+    """
+    Indices des k meilleurs scores, du meilleur au moins bon
+    argpartition sélectionne les k meilleurs en temps linéaire, seuls ceux-ci sont triés
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    count = len(scores)
+    if k is None or k >= count:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
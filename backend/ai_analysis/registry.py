@@ -0,0 +1,314 @@
+"""
+Registre des modèles servis par l'API
+Le modèle actif est désigné par la table AIModel (ligne active de type 'custom'),
+à défaut par le bundle actif du dossier des modèles (fichier CURRENT).
+
+Remplacement à chaud par lecture-copie-mise à jour:
+- chaque requête prend une référence sur le modèle courant (acquire) et l'utilise jusqu'au bout;
+- une nouvelle version est chargée dans un thread, hors de tout verrou lu par les requêtes,
+  puis publiée par une simple affectation de référence;
+- l'ancien modèle est retiré: son pool de processus est arrêté quand sa dernière requête se termine.
+"""
+import os
+import time
+import logging
+import weakref
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .artifacts import CURRENT_FILENAME
+
+logger = logging.getLogger(__name__)
+
+# Type des lignes AIModel servies par ce registre
+MODEL_TYPE = 'custom'
+
+
+class LoadedModel:
+    """
+    Version publiée d'un modèle: analyseur chargé et pool de processus associé
+    Immuable après publication; compte les requêtes qui l'utilisent encore
+    """
+
+    def __init__(self, analyzer, pool, source: Tuple, record_id: Optional[int] = None):
+        self.analyzer = analyzer
+        self.pool = pool
+        self.source = source
+        self.record_id = record_id
+        self.loaded_at = time.time()
+        self._users = 0
+        self._retired = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.analyzer.model_version
+
+    @property
+    def cache_version(self) -> Optional[str]:
+        return self.analyzer.cache_version
+
+    def _enter(self) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self._users += 1
+            return True
+
+    def _exit(self):
+        with self._lock:
+            self._users -= 1
+            close = self._retired and self._users == 0 and not self._closed
+            if close:
+                self._closed = True
+        if close:
+            self._close()
+
+    def retire(self):
+        """Plus servi aux nouvelles requêtes; libéré après la dernière requête en cours"""
+        with self._lock:
+            self._retired = True
+            close = self._users == 0 and not self._closed
+            if close:
+                self._closed = True
+        if close:
+            self._close()
+
+    def _close(self):
+        if self.pool is not None:
+            # Le bac à sable d'extraction ne dépend pas du modèle: il est conservé
+            self.pool.shutdown(sandbox=False)
+        logger.info(f"Modèle {self.model_version} retiré")
+
+
+class ModelRegistry:
+    """
+    Modèle courant résolu depuis la table AIModel (ou le dossier des modèles)
+    La source est revérifiée au plus toutes les check_interval secondes (et après invalidate(),
+    appelé par les signaux de AIModel); un changement déclenche un chargement en arrière-plan
+    """
+
+    # Registres du processus, invalidés par les signaux de AIModel
+    _instances = weakref.WeakSet()
+
+    def __init__(self, models_dir: str, analyzer_factory: Callable, pool_factory: Optional[Callable] = None,
+                 check_interval: float = 30.0):
+        self.models_dir = models_dir
+        self.analyzer_factory = analyzer_factory
+        self.pool_factory = pool_factory
+        self.check_interval = check_interval
+        self.state = 'idle'
+        self.error = None
+        self._current = None
+        self._checked_at = float('-inf')
+        self._loading = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._initial_lock = threading.Lock()
+        ModelRegistry._instances.add(self)
+
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+
+    @property
+    def current(self) -> Optional[LoadedModel]:
+        """Modèle publié (sans référence: préférer acquire() pour une requête)"""
+        return self._current
+
+    def _resolve_source(self) -> Tuple[Tuple, str, Optional[int]]:
+        """
+        Source du modèle actif: (clé de version, chemin, id AIModel)
+        La clé change dès que la ligne active ou le bundle désigné change
+        """
+        from django.db import DatabaseError
+        from .models import AIModel
+
+        try:
+            record = (
+                AIModel.objects.filter(is_active=True, model_type=MODEL_TYPE)
+                .order_by('-updated_at', '-id')
+                .values('id', 'version', 'model_path', 'updated_at')
+                .first()
+            )
+        except DatabaseError as e:
+            logger.warning(f"Table AIModel indisponible, dossier des modèles utilisé: {e}")
+            record = None
+
+        if record and record['model_path']:
+            key = ('record', record['id'], record['version'], record['model_path'], record['updated_at'])
+            return key, record['model_path'], record['id']
+
+        current = os.path.join(self.models_dir, CURRENT_FILENAME)
+        marker = os.path.getmtime(current) if os.path.exists(current) else None
+        return ('directory', self.models_dir, marker), self.models_dir, None
+
+    def _load(self, source: Tuple, path: str, record_id: Optional[int]) -> Optional[LoadedModel]:
+        """Charge une version et la publie; l'ancienne version est retirée"""
+        with self._load_lock:
+            current = self._current
+            if current is not None and current.source == source:
+                return current
+            if current is None:
+                self.state = 'loading'
+            try:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Modèles IA non trouvés: {path}")
+                analyzer = self.analyzer_factory()
+                analyzer.load_models(path)
+                pool = self.pool_factory(analyzer) if self.pool_factory else None
+            except FileNotFoundError as e:
+                if current is None:
+                    self.state = 'missing'
+                self.error = str(e)
+                logger.warning(f"⚠️ {e}, utilisez l'entraînement d'abord")
+                return None
+            except Exception as e:
+                if current is None:
+                    self.state = 'error'
+                self.error = str(e)
+                logger.error(f"❌ Erreur lors du chargement des modèles {path}: {e}")
+                return None
+
+            loaded = LoadedModel(analyzer, pool, source, record_id)
+            # Publication: une affectation de référence, les requêtes en cours gardent l'ancienne
+            self._current = loaded
+            self.state = 'ready'
+            self.error = None
+            if current is not None:
+                logger.info(f"🔄 Modèle {current.model_version} remplacé par {loaded.model_version}")
+                current.retire()
+            else:
+                logger.info(f"✅ Modèles IA {loaded.model_version} chargés depuis {path}")
+            return loaded
+
+    def _load_in_background(self, source: Tuple, path: str, record_id: Optional[int]):
+        try:
+            self._load(source, path, record_id)
+        finally:
+            self._loading = False
+
+    def refresh(self, wait: bool = False) -> bool:
+        """
+        Vérifie la source du modèle actif et charge la nouvelle version si elle a changé
+        Sans wait, le chargement se fait dans un thread et les requêtes continuent sur l'ancien modèle
+        """
+        # Un seul thread vérifie la source (requête AIModel); tant qu'un modèle est chargé,
+        # les autres ne l'attendent pas et continuent avec le modèle courant
+        if not self._lock.acquire(blocking=wait or self._current is None):
+            return False
+        try:
+            if self._loading:
+                return False
+            self._checked_at = time.monotonic()
+            source, path, record_id = self._resolve_source()
+            current = self._current
+            if current is not None and current.source == source:
+                return False
+            self._loading = True
+        finally:
+            self._lock.release()
+
+        if wait or current is None:
+            self._load_in_background(source, path, record_id)
+        else:
+            threading.Thread(
+                target=self._load_in_background,
+                args=(source, path, record_id),
+                name='ai-models-swap',
+                daemon=True
+            ).start()
+        return True
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+
+    def ensure_loaded(self) -> bool:
+        """
+        Charge le premier modèle de façon synchrone (les appels concurrents attendent);
+        ensuite ne fait que programmer la vérification d'une nouvelle version
+        """
+        if self._current is None:
+            with self._initial_lock:
+                if self._current is None and time.monotonic() - self._checked_at >= self.check_interval:
+                    self.refresh(wait=True)
+        else:
+            self._maybe_refresh()
+        return self._current is not None
+
+    @contextmanager
+    def acquire(self) -> Iterator[Optional[LoadedModel]]:
+        """
+        Référence sur le modèle courant pour toute la durée d'une requête (None si aucun modèle)
+        Un remplacement pendant la requête ne l'affecte pas
+        """
+        self.ensure_loaded()
+        while True:
+            model = self._current
+            if model is None or model._enter():
+                break
+        try:
+            yield model
+        finally:
+            if model is not None:
+                model._exit()
+
+    def invalidate(self):
+        """Force la vérification de la source à la prochaine requête"""
+        self._checked_at = float('-inf')
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Charge les modèles dans un thread pour que la première requête ne paie pas le chargement"""
+        thread = threading.Thread(target=self.ensure_loaded, name='ai-models-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict:
+        current = self._current
+        return {
+            'state': self.state,
+            'ready': current is not None,
+            'error': self.error,
+            'model_version': current.model_version if current else None,
+            'source': current.source[0] if current else None,
+            'record_id': current.record_id if current else None,
+            'loaded_at': current.loaded_at if current else None,
+            'models_dir': self.models_dir,
+        }
+
+
+def register_model_bundle(bundle_dir: str, model_version: str, accuracy: Optional[float] = None,
+                          description: str = '', activate: bool = True):
+    """
+    Enregistre un bundle entraîné dans la table AIModel
+    activate: la ligne devient la seule active de son type, les serveurs la chargent à chaud
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import AIModel
+
+    with transaction.atomic():
+        record, _ = AIModel.objects.update_or_create(
+            name=f'cv-analyzer-{model_version}',
+            defaults={
+                'model_type': MODEL_TYPE,
+                'model_path': os.path.abspath(bundle_dir),
+                'version': model_version,
+                'accuracy_score': accuracy,
+                'description': description,
+                'training_date': timezone.now(),
+                'is_active': activate,
+            }
+        )
+        if activate:
+            AIModel.objects.filter(model_type=MODEL_TYPE, is_active=True).exclude(pk=record.pk).update(is_active=False)
+    return record
+
+
+def invalidate_model_registry(*args, **kwargs):
+    """Récepteur de signal: la table AIModel a changé"""
+    for registry in list(ModelRegistry._instances):
+        registry.invalidate()
@@ -0,0 +1,283 @@
+"""
+Extraction isolée des CV dans des sous-processus recyclables
+Chaque fichier a un délai maximum et chaque processus une limite mémoire:
+un PDF malformé ou énorme produit une erreur pour ce fichier sans bloquer le lot
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: pas de limites de ressources par processus
+    resource = None
+
+from .parallel import _get_mp_context, _transferable_items
+
+logger = logging.getLogger(__name__)
+
+
+def _address_space() -> Optional[int]:
+    """Taille actuelle de l'espace d'adressage du processus (octets), si connue"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss() -> int:
+    """Pic de mémoire résidente du processus (octets)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _sandbox_main(conn, processor, memory_limit: Optional[int]):
+    """
+    Boucle d'un processus d'extraction: reçoit (source, nom), renvoie (statut, valeur, recycler)
+    La mémoire est plafonnée au-dessus de l'empreinte de départ du processus
+    """
+    rss_ceiling = None
+    if resource is not None and memory_limit:
+        rss_ceiling = _peak_rss() + memory_limit
+        address_space = _address_space()
+        if address_space is not None:
+            try:
+                limit = address_space + memory_limit
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Limite mémoire non appliquée au processus d'extraction: {e}")
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        source, filename = message
+        out_of_memory = False
+        try:
+            text = processor.extract_text(source, filename=filename)
+            reply = ('ok', text)
+        except MemoryError:
+            out_of_memory = True
+            reply = ('error', 'Limite mémoire dépassée pendant l\'extraction')
+        except Exception as e:
+            reply = ('error', str(e))
+
+        # Au-delà du plafond (ou après une erreur mémoire), le processus demande à être recyclé
+        recycle = out_of_memory or (rss_ceiling is not None and _peak_rss() > rss_ceiling)
+        try:
+            conn.send(reply + (recycle,))
+        except MemoryError:
+            break
+        if recycle:
+            break
+
+
+class ExtractionTimeout(Exception):
+    """Le fichier n'a pas été extrait dans le délai imparti"""
+
+
+class WorkerLost(Exception):
+    """Le processus d'extraction s'est arrêté pendant le traitement d'un fichier"""
+
+
+class _SandboxWorker:
+    """Un sous-processus d'extraction et son canal de communication"""
+
+    def __init__(self, context, processor, memory_limit: Optional[int]):
+        self.context = context
+        self.processor = processor
+        self.memory_limit = memory_limit
+        self.process = None
+        self.conn = None
+        self.documents = 0
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_sandbox_main,
+            args=(child_conn, self.processor, self.memory_limit),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.documents = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, force: bool = False):
+        if self.process is None:
+            return
+        if not force:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=1)
+            except (OSError, BrokenPipeError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def extract(self, source, filename: str, timeout: float) -> Tuple[str, str, bool]:
+        """
+        Retourne (statut, texte ou message d'erreur, recycler)
+        Lève ExtractionTimeout si le délai est dépassé, WorkerLost si le processus a disparu
+        """
+        try:
+            self.conn.send((source, filename))
+            if not self.conn.poll(timeout):
+                raise ExtractionTimeout(f'Délai d\'extraction dépassé ({timeout:g}s)')
+            status, value, recycle = self.conn.recv()
+        except (EOFError, OSError):
+            raise WorkerLost('Processus d\'extraction interrompu (limite mémoire dépassée?)')
+        self.documents += 1
+        return status, value, recycle
+
+
+class ExtractionSandbox:
+    """
+    Groupe de sous-processus dédiés à CVProcessor.extract_text
+    - délai maximum par fichier: le processus bloqué est tué puis remplacé
+    - plafond mémoire par processus (RLIMIT_AS, et pic RSS vérifié après chaque fichier)
+    - recyclage après max_documents fichiers pour limiter la fragmentation mémoire
+    Les processus de remplacement sont démarrés par un unique thread superviseur, hors du
+    chemin des requêtes; tous sont créés par le serveur forkserver (voir parallel._get_mp_context)
+    """
+
+    def __init__(self, processor, max_workers: Optional[int] = None, timeout: float = 30.0,
+                 memory_limit_mb: Optional[int] = 512, max_documents: int = 100):
+        self.processor = processor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.max_documents = max_documents
+        self._idle = None
+        self._restarts = None
+        self._supervisor = None
+        self._workers = []
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            context = _get_mp_context()
+            self._idle = queue.Queue()
+            self._workers = []
+            for _ in range(self.max_workers):
+                worker = _SandboxWorker(context, self.processor, self.memory_limit)
+                worker.start()
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._restarts = queue.Queue()
+            self._supervisor = threading.Thread(
+                target=self._supervise, args=(self._restarts, self._idle),
+                name='cv-extraction-supervisor', daemon=True
+            )
+            self._supervisor.start()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='cv-extraction'
+            )
+            logger.info(f"{self.max_workers} processus d'extraction isolés démarrés")
+
+    def shutdown(self):
+        """Arrête tous les processus d'extraction"""
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=True)
+            # Les redémarrages en attente sont traités avant l'arrêt du superviseur
+            self._restarts.put(None)
+            self._supervisor.join()
+            for worker in self._workers:
+                worker.stop()
+            self._executor = None
+            self._supervisor = None
+            self._restarts = None
+            self._workers = []
+            self._idle = None
+
+    @staticmethod
+    def _supervise(restarts: queue.Queue, idle: queue.Queue):
+        """Thread superviseur: redémarre les processus arrêtés puis les rend disponibles"""
+        while True:
+            worker = restarts.get()
+            if worker is None:
+                break
+            try:
+                worker.start()
+            except Exception as e:
+                logger.error(f"Redémarrage d'un processus d'extraction impossible: {e}")
+                time.sleep(1)
+                restarts.put(worker)
+                continue
+            idle.put(worker)
+
+    def _replace(self, worker: _SandboxWorker, force: bool = False):
+        """Arrête un processus et confie son redémarrage au thread superviseur"""
+        worker.stop(force=force)
+        self._restarts.put(worker)
+
+    def _acquire(self) -> _SandboxWorker:
+        """Prochain processus disponible; un processus mort est remplacé"""
+        while True:
+            worker = self._idle.get()
+            if worker.alive:
+                return worker
+            self._replace(worker, force=True)
+
+    def _extract_one(self, item: Tuple[object, str]) -> Dict:
+        source, filename = item
+        worker = self._acquire()
+        try:
+            status, value, recycle = worker.extract(source, filename, self.timeout)
+        except (ExtractionTimeout, WorkerLost) as e:
+            logger.warning(f"Extraction de {filename} interrompue: {e}")
+            self._replace(worker, force=True)
+            return {'filename': filename, 'status': 'error', 'error': str(e)}
+
+        if recycle or worker.documents >= self.max_documents:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+        if status == 'error':
+            logger.error(f"Erreur lors de l'extraction de {filename}: {value}")
+            return {'filename': filename, 'status': 'error', 'error': value}
+
+        text = value
+        if not text:
+            return {
+                'filename': filename,
+                'status': 'error',
+                'error': 'Impossible d\'extraire le texte du CV',
+                'empty': True
+            }
+        return {'filename': filename, 'status': 'success', 'text': text}
+
+    def extract_files(self, items: List[Tuple[object, str]]) -> List[Dict]:
+        """
+        Extrait une liste de (source du fichier, nom d'origine) dans les sous-processus
+        Les résultats sont retournés dans l'ordre des fichiers fournis
+        """
+        if not items:
+            return []
+
+        self._ensure_started()
+        return list(self._executor.map(self._extract_one, _transferable_items(items)))
@@ -0,0 +1,93 @@
+"""
+Services partagés de l'analyse IA: analyseur, pool de processus, cache, registre des modèles
+Instances uniques du processus, utilisées par les vues, les commandes et l'entraînement
+"""
+from django.conf import settings
+
+from .cv_processor import CVAnalyzer, CVProcessor
+from .parallel import CVWorkerPool, pool_size
+from .sandbox import ExtractionSandbox
+from .registry import ModelRegistry
+from .cache import CVResultCache
+from .skill_matcher import get_skill_matcher
+from .matching import JobProfileCache
+from .vector_index import CandidateIndexCache
+
+# Extraction du texte, indépendante de la version du modèle
+cv_processor = CVProcessor(
+    max_pdf_pages=settings.AI_MODEL_CONFIG.get('PDF_MAX_PAGES'),
+    max_chars=settings.AI_MODEL_CONFIG.get('MAX_TEXT_LENGTH'),
+    skill_matcher_provider=get_skill_matcher
+)
+
+# Part de ce processus web dans le budget de processus d'analyse du serveur
+analysis_workers = pool_size(
+    settings.AI_MODEL_CONFIG.get('WORKERS', 0),
+    settings.AI_MODEL_CONFIG.get('WEB_WORKERS', 1)
+)
+
+# Sous-processus isolés pour l'extraction (délai par fichier, plafond mémoire)
+extraction_sandbox = None
+if settings.AI_MODEL_CONFIG.get('EXTRACTION_SANDBOX', False):
+    extraction_sandbox = ExtractionSandbox(
+        cv_processor,
+        max_workers=analysis_workers,
+        timeout=settings.AI_MODEL_CONFIG.get('EXTRACTION_TIMEOUT', 30),
+        memory_limit_mb=settings.AI_MODEL_CONFIG.get('EXTRACTION_MEMORY_MB', 512),
+        max_documents=settings.AI_MODEL_CONFIG.get('EXTRACTION_MAX_DOCUMENTS', 100)
+    )
+
+
+def create_analyzer(**options):
+    """
+    Nouvel analyseur (non entraîné) configuré selon les paramètres
+    Utilisé aussi pour l'entraînement: mêmes budgets d'extraction et mêmes compétences qu'en service
+    options: autres paramètres de CVAnalyzer (modèle de qualité)
+    """
+    return CVAnalyzer(
+        max_pdf_pages=settings.AI_MODEL_CONFIG.get('PDF_MAX_PAGES'),
+        max_text_chars=settings.AI_MODEL_CONFIG.get('MAX_TEXT_LENGTH'),
+        skill_matcher_provider=get_skill_matcher,
+        **options
+    )
+
+
+def create_pool(analyzer):
+    """
+    Pool de processus des analyses en lot, lié à une version du modèle (recréé à chaque remplacement)
+    Chaque processus web n'en démarre que sa part du budget WORKERS du serveur
+    """
+    return CVWorkerPool(
+        analyzer,
+        max_workers=analysis_workers,
+        min_parallel_files=settings.AI_MODEL_CONFIG.get('PARALLEL_MIN_FILES', 2),
+        batch_size=settings.AI_MODEL_CONFIG.get('BATCH_SIZE', 32),
+        sandbox=extraction_sandbox
+    )
+
+# Cache des extractions et analyses, partagé entre les endpoints
+cv_cache = CVResultCache(
+    max_bytes=settings.AI_MODEL_CONFIG.get('CACHE_MAX_BYTES', 200 * 1024 * 1024),
+    enabled=settings.AI_MODEL_CONFIG.get('CACHE_ENABLED', True),
+    evict_interval=settings.AI_MODEL_CONFIG.get('CACHE_EVICT_INTERVAL', 60),
+    touch_interval=settings.AI_MODEL_CONFIG.get('CACHE_TOUCH_INTERVAL', 300)
+)
+
+# Modèle actif (table AIModel), chargé au premier appel d'IA (ou préchauffé par le serveur WSGI)
+# et remplacé à chaud: chaque requête garde la version prise au début (model_registry.acquire())
+model_registry = ModelRegistry(
+    str(settings.AI_MODEL_CONFIG['MODELS_DIR']),
+    analyzer_factory=create_analyzer,
+    pool_factory=create_pool,
+    check_interval=settings.AI_MODEL_CONFIG.get('MODEL_REGISTRY_CHECK_INTERVAL', 30)
+)
+
+# Profils de poste compilés (compétences, expérience, mots-clés, vecteur), recompilés quand l'offre change
+job_profiles = JobProfileCache(
+    max_entries=settings.AI_MODEL_CONFIG.get('JOB_PROFILE_CACHE_SIZE', 256)
+)
+
+# Index de similarité des candidatures (vecteurs persistés), par offre ou par domaine
+candidate_indexes = CandidateIndexCache(
+    max_entries=settings.AI_MODEL_CONFIG.get('CANDIDATE_INDEX_CACHE_SIZE', 64)
+)
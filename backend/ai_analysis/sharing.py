@@ -0,0 +1,54 @@
+"""
+Partage d'une seule copie des modèles entre les processus du serveur
+Les modèles sont chargés dans le processus maître avant le fork (gunicorn --preload):
+les workers partagent ces pages en copie à l'écriture. gc.freeze() évite que le
+ramasse-miettes des workers ne réécrive les en-têtes d'objets et ne duplique les pages.
+Les tableaux projetés en mémoire (voir artifacts.py) sont de plus partagés via le cache disque.
+"""
+import gc
+import logging
+from typing import Dict
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def preload_shared_models(registry) -> bool:
+    """
+    Charge les modèles de façon synchrone dans le processus courant puis gèle les objets
+    À appeler dans le maître avant le fork des workers (pas de thread ni de connexion
+    à la base ouverte avant un fork)
+    """
+    ready = registry.ensure_loaded()
+    # Les connexions ouvertes par le chargement (table AIModel) ne doivent pas être héritées par les workers
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Modèles IA préchargés pour les workers ({gc.get_freeze_count()} objets gelés)")
+    return ready
+
+
+def process_memory(pid='self') -> Dict[str, float]:
+    """
+    Mémoire d'un processus en Mo (Linux): rss, pss (part des pages partagées),
+    uss (pages privées: coût propre du processus), shared (pages partagées)
+    """
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            for line in smaps:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    values[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        # Sans smaps_rollup: seulement le pic de mémoire résidente
+        import resource
+        return {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    return {
+        'rss': values.get('Rss', 0.0),
+        'pss': values.get('Pss', 0.0),
+        'uss': values.get('Private_Clean', 0.0) + values.get('Private_Dirty', 0.0),
+        'shared': values.get('Shared_Clean', 0.0) + values.get('Shared_Dirty', 0.0),
+    }
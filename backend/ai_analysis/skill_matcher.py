@@ -0,0 +1,258 @@
+"""
+Détection des compétences en une seule passe
+Automate d'Aho-Corasick construit à partir de la liste intégrée et de la table JobSkill
+"""
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import AbstractSet, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Liste des compétences techniques communes
+TECHNICAL_SKILLS = [
+    # Programmation
+    'python', 'java', 'javascript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
+    'html', 'css', 'sql', 'r', 'matlab', 'scala', 'kotlin', 'swift',
+
+    # Frameworks et librairies
+    'django', 'flask', 'react', 'angular', 'vue', 'node.js', 'express',
+    'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy',
+
+    # Bases de données
+    'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
+
+    # Outils et technologies
+    'docker', 'kubernetes', 'aws', 'azure', 'git', 'jenkins', 'linux',
+    'apache', 'nginx', 'hadoop', 'spark',
+
+    # Méthodologies
+    'agile', 'scrum', 'devops', 'ci/cd', 'machine learning', 'deep learning',
+    'data science', 'big data', 'intelligence artificielle'
+]
+
+# Catégorie (SkillExtraction) des compétences de la liste intégrée; les autres sont techniques
+SKILL_CATEGORIES = {
+    **dict.fromkeys(['django', 'flask', 'react', 'angular', 'vue', 'node.js', 'express',
+                     'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy'], 'framework'),
+    **dict.fromkeys(['docker', 'kubernetes', 'aws', 'azure', 'git', 'jenkins', 'linux',
+                     'apache', 'nginx', 'hadoop', 'spark'], 'tool'),
+    **dict.fromkeys(['agile', 'scrum', 'devops', 'ci/cd'], 'methodology'),
+}
+
+
+# Compétence d'un seul mot: reconnue directement parmi les jetons du CV
+_SINGLE_WORD = re.compile(r'\w+')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def normalize_skill(skill: str) -> str:
+    """Normalise un nom de compétence (minuscules, espaces simples)"""
+    return ' '.join(skill.lower().split())
+
+
+def skill_category(skill: str) -> str:
+    """Catégorie d'une compétence détectée (choix de SkillExtraction.category)"""
+    return SKILL_CATEGORIES.get(normalize_skill(skill), 'technical')
+
+
+class SkillMatcher:
+    """
+    Automate multi-motifs: toutes les compétences sont trouvées en un seul
+    parcours linéaire du texte, en respectant les limites de mots
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills = []
+        seen = set()
+        for skill in skills:
+            normalized = normalize_skill(skill)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                self.skills.append(normalized)
+        # Révision de la liste des compétences, identique d'un processus à l'autre (version du cache)
+        self.revision = hashlib.sha256('\n'.join(self.skills).encode('utf-8')).hexdigest()[:12]
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._build()
+
+    def _build(self):
+        goto, fail, output = self._goto, self._fail, self._output
+
+        # Construction du trie
+        for index, skill in enumerate(self.skills):
+            node = 0
+            for char in skill:
+                child = goto[node].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    output.append(())
+                    goto[node][char] = child
+                node = child
+            output[node] = output[node] + (index,)
+
+        # Liens d'échec en largeur d'abord
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = output[child] + output[fail[child]]
+
+        self._lengths = [len(skill) for skill in self.skills]
+
+        # Index pour les jetons déjà calculés (voir featurizer.py)
+        self._single_words = {}
+        self._compounds = []
+        for index, skill in enumerate(self.skills):
+            if _SINGLE_WORD.fullmatch(skill):
+                self._single_words[skill] = index
+            else:
+                self._compounds.append((index, skill))
+
+    def __len__(self):
+        return len(self.skills)
+
+    def find_all(self, text: str) -> List[str]:
+        """
+        Retourne les compétences présentes dans le texte, dans l'ordre de la taxonomie
+        Une compétence n'est retenue que si elle n'est pas collée à un autre mot
+        """
+        text = text.lower()
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        text_length = len(text)
+        found = set()
+        node = 0
+
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            if output[node]:
+                for index in output[node]:
+                    if index in found:
+                        continue
+                    start = position - lengths[index] + 1
+                    if start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if position + 1 < text_length and _is_word_char(text[position + 1]):
+                        continue
+                    found.add(index)
+
+        return [self.skills[index] for index in sorted(found)]
+
+    def find_in_tokens(self, tokens: AbstractSet[str], text_lower: str) -> List[str]:
+        """
+        Même résultat que find_all, à partir d'un CV déjà tokenisé:
+        les compétences d'un mot sont cherchées dans l'ensemble des jetons,
+        les autres (plusieurs mots, ponctuation) par recherche de sous-chaîne en minuscules
+        """
+        single_words = self._single_words
+        if len(tokens) < len(single_words):
+            found = {single_words[token] for token in tokens if token in single_words}
+        else:
+            found = {index for skill, index in single_words.items() if skill in tokens}
+
+        text_length = len(text_lower)
+        for index, skill in self._compounds:
+            position = text_lower.find(skill)
+            while position != -1:
+                end = position + len(skill)
+                if (position == 0 or not _is_word_char(text_lower[position - 1])) and \
+                        (end >= text_length or not _is_word_char(text_lower[end])):
+                    found.add(index)
+                    break
+                position = text_lower.find(skill, position + 1)
+
+        return [self.skills[index] for index in sorted(found)]
+
+
+_default_matcher = None
+
+
+def default_skill_matcher() -> SkillMatcher:
+    """Automate construit sur la liste intégrée uniquement (sans base de données)"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = SkillMatcher(TECHNICAL_SKILLS)
+    return _default_matcher
+
+
+class SkillTableMatcher:
+    """
+    Automate construit sur la liste intégrée et la table JobSkill
+    Reconstruit lorsque la table change (signaux locaux, empreinte vérifiée périodiquement;
+    updated_at couvre les renommages faits par un autre processus)
+    """
+
+    def __init__(self, check_interval: float = 60.0):
+        self.check_interval = check_interval
+        self._matcher = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _table_fingerprint(self):
+        from django.db.models import Count, Max
+        from jobs.models import JobSkill
+
+        stats = JobSkill.objects.aggregate(count=Count('id'), last_id=Max('id'), last_updated=Max('updated_at'))
+        return stats['count'], stats['last_id'], stats['last_updated']
+
+    def _build(self) -> SkillMatcher:
+        from jobs.models import JobSkill
+
+        names = JobSkill.objects.values_list('name', flat=True)
+        matcher = SkillMatcher(list(TECHNICAL_SKILLS) + list(names))
+        logger.info(f"Automate de compétences construit ({len(matcher)} compétences)")
+        return matcher
+
+    def invalidate(self):
+        """Force la reconstruction au prochain accès"""
+        with self._lock:
+            self._fingerprint = None
+            self._checked_at = 0.0
+
+    def get(self) -> SkillMatcher:
+        now = time.monotonic()
+        if self._matcher is not None and now - self._checked_at < self.check_interval:
+            return self._matcher
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                fingerprint = self._table_fingerprint()
+                if self._matcher is None or fingerprint != self._fingerprint:
+                    self._matcher = self._build()
+                    self._fingerprint = fingerprint
+            except Exception as e:
+                logger.error(f"Impossible de charger la table des compétences: {e}")
+            return self._matcher or default_skill_matcher()
+
+
+skill_table_matcher = SkillTableMatcher()
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Automate courant, à jour avec la table JobSkill"""
+    return skill_table_matcher.get()
+
+
+def invalidate_skill_matcher(*args, **kwargs):
+    """Récepteur de signal: la table JobSkill a changé"""
+    skill_table_matcher.invalidate()
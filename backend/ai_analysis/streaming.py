@@ -0,0 +1,85 @@
+"""
+Réponses en flux des analyses en lot (Server-Sent Events ou NDJSON)
+Les fichiers sont traités par tranches: chaque CV est envoyé dès que sa tranche est
+analysée, suivi du classement courant quand il change. La première tranche ne contient
+qu'un fichier, le premier résultat arrive donc après l'analyse d'un seul CV.
+"""
+import json
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Formats de flux (paramètre stream des endpoints d'analyse en lot)
+STREAM_FORMATS = ('sse', 'ndjson')
+
+_CONTENT_TYPES = {
+    'sse': 'text/event-stream; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def format_event(fmt: str, event: str, data: Any) -> bytes:
+    """Un événement encodé: bloc 'event/data' (SSE) ou une ligne JSON (NDJSON)"""
+    if fmt == 'sse':
+        payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        return f"event: {event}\ndata: {payload}\n\n".encode('utf-8')
+    payload = json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"{payload}\n".encode('utf-8')
+
+
+def stream_chunks(items: Sequence, chunk_size: int) -> Iterator[List]:
+    """Tranches de traitement: un premier élément seul, puis des tranches de chunk_size"""
+    if not items:
+        return
+    yield list(items[:1])
+    chunk_size = max(1, chunk_size)
+    for start in range(1, len(items), chunk_size):
+        yield list(items[start:start + chunk_size])
+
+
+def streaming_response(fmt: str, events: Iterable) -> StreamingHttpResponse:
+    """Réponse en flux d'une suite de (nom de l'événement, données)"""
+    response = StreamingHttpResponse(
+        (format_event(fmt, event, data) for event, data in events),
+        content_type=_CONTENT_TYPES[fmt]
+    )
+    # Ni cache ni mise en mémoire tampon par un proxy (nginx): chaque événement part aussitôt
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class RunningTopN:
+    """
+    Classement courant des n meilleurs éléments (tas de taille n)
+    À score égal, l'élément arrivé le premier est classé devant, comme top_k
+    """
+
+    def __init__(self, size: int, key: Callable[[Dict], float]):
+        self.size = size
+        self.key = key
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item: Dict) -> bool:
+        """Ajoute un élément; retourne True s'il entre dans le classement"""
+        if self.size <= 0:
+            return False
+        entry = (self.key(item), -next(self._counter), item)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def items(self) -> List[Dict]:
+        """Éléments du classement, du meilleur au moins bon"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
@@ -1,3 +1,1438 @@
-from django.test import TestCase
+import gc
+import io
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from candidates.models import Application, CVAnalysis
+from jobs.models import Job, JobCategory, JobSkill
+from notifications.models import Notification, NotificationPreference
+
+from .artifacts import ArtifactError, load_bundle
+from .batches import BatchFileQueue, batch_progress, batch_summary, create_batch
+from .cache import CVResultCache, hash_uploaded_file
+from .cv_processor import ANALYSIS_FORMAT_VERSION, CVAnalyzer, CVProcessor, upload_source
+from .dataset import DatasetManifest, extract_dataset_texts, list_dataset_files
+from .featurizer import CompactTfidfVectorizer, compact_vectorizer, featurize, vectorize
+from .incremental import category_domain, domain_label
+from .matching import JobMatchProfile, JobProfileCache, calculate_job_match_score
+from .models import AnalysisBatch, AnalysisBatchFile, ApplicationVector, CVCacheEntry, ProcessingQueue, SkillExtraction
+from .parallel import CVWorkerPool, extract_cv_files, pool_size, process_cv_files
+from .quality_models import make_quality_classifier, select_quality_backend
+from .ranking import cosine_similarities, job_document, top_k
+from .registry import LoadedModel, ModelRegistry, register_model_bundle
+from .sandbox import ExtractionSandbox
+from .sharing import preload_shared_models, process_memory
+from .skill_matcher import SkillMatcher, get_skill_matcher, invalidate_skill_matcher
+from .vector_index import CandidateIndex, CandidateIndexCache, index_applications, pack_vector, unpack_vectors
+from .streaming import RunningTopN, format_event, stream_chunks, streaming_response
+from . import views
+from .views import bulk_analysis_events, score_job_files
+from . import work_queue
+from .work_queue import BatchMetrics, CVQueueWorker, QueueSource, claim_items, enqueue_application, fail_item, release_expired, retry_delay
+
+# Deux domaines; la longueur et l'expérience varient pour que les deux classes de qualité existent
+TRAINING_CVS = {
+    'information_technology': "Software developer\nPython Django SQL Docker Git Linux\n",
+    'accountant': "Accountant\nAudit tax payroll ledger balance reporting\n",
+}
+
+
+def training_frame(processor, size=10) -> pd.DataFrame:
+    """Dataset d'entraînement synthétique (mêmes colonnes que process_cv_dataset)"""
+    rows = []
+    for index in range(size):
+        for domain, cv in TRAINING_CVS.items():
+            text = cv * (index + 1) + f"{index} years of experience"
+            features = featurize(text)
+            rows.append({
+                'text': text,
+                'domain': domain,
+                'skills_count': len(processor.extract_skills_from_features(features)),
+                'experience_years': processor.extract_profile(text)['experience_years'],
+                'word_count': features.word_count,
+            })
+    return pd.DataFrame(rows)
+
+
+def make_pdf(pages) -> bytes:
+    """PDF minimal: une ligne de texte (Helvetica) par page"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        content = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids))
+
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(data)
+
+
+def create_job(**fields) -> Job:
+    """Offre publiée par un recruteur (les champs fournis remplacent ceux par défaut)"""
+    recruiter = get_user_model().objects.filter(email='recruteur@example.com').first()
+    if recruiter is None:
+        recruiter = get_user_model().objects.create_user(
+            username='recruteur', email='recruteur@example.com', password='secret',
+            first_name='Rita', last_name='Recruteur', role='recruteur'
+        )
+    category, _ = JobCategory.objects.get_or_create(name='Information Technology')
+    return Job.objects.create(**{
+        'title': 'Développeur Python',
+        'category': category,
+        'company_name': 'Acme',
+        'description': 'Backend developer',
+        'requirements': 'Django API',
+        'location': 'Paris',
+        'skills_required': 'Python, Django',
+        'experience_required': '1-3',
+        'posted_by': recruiter,
+        **fields
+    })
+
+
+def create_application(job, name, text) -> Application:
+    """Candidature d'un nouveau candidat avec un CV texte"""
+    candidate = get_user_model().objects.create_user(
+        username=name, email=f'{name}@example.com', password='secret',
+        first_name=name.capitalize(), last_name='Candidat', role='candidat'
+    )
+    application = Application(candidate=candidate, job=job)
+    application.cv_file.save(f'{name}.txt', ContentFile(text.encode('utf-8')), save=False)
+    application.save()
+    return application
+
+
+def use_temporary_media_root(test):
+    """Fichiers uploadés écrits dans un dossier temporaire pendant le test"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    media_root = override_settings(MEDIA_ROOT=directory.name)
+    media_root.enable()
+    test.addCleanup(media_root.disable)
+
+
+class StaticRegistry:
+    """Registre servant toujours le même modèle (voir ModelRegistry.acquire)"""
+
+    def __init__(self, model):
+        self.model = model
+
+    @contextmanager
+    def acquire(self):
+        yield self.model
+
+
+def trained_analyzer(**options) -> CVAnalyzer:
+    analyzer = CVAnalyzer(**options)
+    analyzer.train_models(training_frame(analyzer.processor))
+    return analyzer
+
+
+class WorkerPoolTests(SimpleTestCase):
+    """Pool de processus: mêmes résultats que l'analyse dans le processus, dans l'ordre des fichiers"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.analyzer = trained_analyzer()
+        cls.pool = CVWorkerPool(cls.analyzer, max_workers=2, min_parallel_files=2, batch_size=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+        super().tearDownClass()
+
+    def items(self):
+        return [
+            (TRAINING_CVS['information_technology'].encode('utf-8'), 'dev.txt'),
+            (b'', 'vide.txt'),
+            (TRAINING_CVS['accountant'].encode('utf-8') * 3, 'comptable.txt'),
+            (b'contenu', 'cv.odt'),
+            (b'Python developer, 5 years of experience', 'court.txt'),
+        ]
+
+    def test_pool_size_shares_the_server_budget(self):
+        self.assertEqual(pool_size(16, 4), 4)
+        self.assertEqual(pool_size(3, 4), 1)
+        self.assertEqual(pool_size(0, 1), pool_size())
+        self.assertGreaterEqual(pool_size(), 1)
+
+    def test_parallel_results_match_serial_analysis(self):
+        parallel = self.pool.process_files(self.items())
+        serial = process_cv_files(self.analyzer, self.items())
+
+        self.assertIsNotNone(self.pool._executor)
+        self.assertEqual(parallel, serial)
+        self.assertEqual([result['filename'] for result in parallel],
+                         ['dev.txt', 'vide.txt', 'comptable.txt', 'cv.odt', 'court.txt'])
+        self.assertEqual([result['status'] for result in parallel],
+                         ['success', 'error', 'success', 'error', 'success'])
+        self.assertTrue(parallel[1]['empty'])
+        self.assertEqual(parallel[2]['analysis']['domain'], 'accountant')
+        self.assertEqual(parallel[2]['analysis']['filename'], 'comptable.txt')
+
+    def test_small_lists_stay_in_process(self):
+        pool = CVWorkerPool(self.analyzer, max_workers=2, min_parallel_files=10)
+        results = pool.process_files(self.items())
+        self.assertIsNone(pool._executor)
+        self.assertEqual(results, process_cv_files(self.analyzer, self.items()))
+
+    def test_analyze_features_returns_tfidf_rows(self):
+        features = [featurize(cv * 2) for cv in TRAINING_CVS.values()] * 2
+        outcomes = self.pool.analyze_features(features)
+        analyses, X = self.analyzer.analyze_features(features)
+
+        self.assertEqual([outcome['analysis'] for outcome in outcomes], analyses)
+        for row, outcome in enumerate(outcomes):
+            np.testing.assert_allclose(outcome['vector'].toarray(), X[row].toarray())
+
+
+class ResultCacheTests(TestCase):
+    """Clé du cache: empreinte du fichier et version (modèle, format, budgets d'extraction)"""
+
+    def test_entries_are_keyed_on_hash_and_version(self):
+        cache = CVResultCache()
+        cache.set_many([('a' * 64, 'texte', {'domain': 'it'})], 'v1')
+
+        self.assertEqual(cache.get_many(['a' * 64, 'b' * 64], 'v1'), {
+            'a' * 64: {'text': 'texte', 'analysis': {'domain': 'it'}}
+        })
+        self.assertEqual(cache.get_many(['a' * 64], 'v2'), {})
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(cache.stats()['entries'], 1)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = CVResultCache(enabled=False)
+        cache.set_many([('a' * 64, 'texte', {})], 'v1')
+        self.assertFalse(CVCacheEntry.objects.exists())
+        self.assertEqual(cache.get_many(['a' * 64], 'v1'), {})
+
+    def test_eviction_keeps_most_recently_used(self):
+        cache = CVResultCache(max_bytes=30, evict_interval=0)
+        cache.set_many([('a' * 64, 'x' * 10, {})], 'v1')
+        CVCacheEntry.objects.update(last_accessed_at=timezone.now() - timedelta(hours=1))
+        cache.set_many([('b' * 64, 'y' * 10, {})], 'v1')
+        cache.set_many([('c' * 64, 'z' * 10, {})], 'v1')
+
+        self.assertEqual(
+            set(CVCacheEntry.objects.values_list('file_hash', flat=True)), {'b' * 64, 'c' * 64}
+        )
+
+    def test_reads_refresh_stale_entries_only(self):
+        cache = CVResultCache(touch_interval=300)
+        cache.set_many([('a' * 64, 'texte', {}), ('b' * 64, 'texte', {})], 'v1')
+        CVCacheEntry.objects.filter(file_hash='a' * 64).update(last_accessed_at=timezone.now() - timedelta(hours=1))
+        cache.get_many(['a' * 64, 'b' * 64], 'v1')
+
+        hit_counts = dict(CVCacheEntry.objects.values_list('file_hash', 'hit_count'))
+        self.assertEqual(hit_counts, {'a' * 64: 1, 'b' * 64: 0})
+
+    def test_upload_hash_is_content_hash(self):
+        upload = SimpleUploadedFile('cv.pdf', b'contenu du cv')
+        same = SimpleUploadedFile('autre.pdf', b'contenu du cv')
+        self.assertEqual(hash_uploaded_file(upload), hash_uploaded_file(same))
+        self.assertNotEqual(hash_uploaded_file(upload), hash_uploaded_file(SimpleUploadedFile('cv.pdf', b'autre')))
+        self.assertEqual(upload.read(), b'contenu du cv')
+
+    def test_cache_version_changes_with_budgets(self):
+        analyzer = CVAnalyzer(max_pdf_pages=20, max_text_chars=5000)
+        analyzer.model_version = 'abc123'
+        version = analyzer.cache_version
+        self.assertTrue(version.startswith(f'abc123.{ANALYSIS_FORMAT_VERSION}.'))
+        self.assertTrue(version.endswith('.p20c5000'))
+        self.assertLessEqual(len(version), CVCacheEntry._meta.get_field('model_version').max_length)
+
+        analyzer.processor.max_pdf_pages = 10
+        self.assertNotEqual(analyzer.cache_version, version)
+
+    def test_untrained_analyzer_has_no_cache_version(self):
+        self.assertIsNone(CVAnalyzer().cache_version)
+
+
+class InMemoryExtractionTests(SimpleTestCase):
+    """Extraction depuis un chemin, des octets ou un tampon: même texte, sans fichier temporaire"""
+
+    def setUp(self):
+        self.processor = CVProcessor()
+        self.pdf = make_pdf(['Python developer', 'Django SQL'])
+
+    def test_sources_give_the_same_text(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cv.pdf')
+            with open(path, 'wb') as file:
+                file.write(self.pdf)
+            from_path = self.processor.extract_text(path)
+
+        self.assertEqual(from_path, 'Python developer\nDjango SQL')
+        self.assertEqual(self.processor.extract_text(self.pdf, filename='cv.pdf'), from_path)
+        self.assertEqual(self.processor.extract_text(io.BytesIO(self.pdf), filename='CV.PDF'), from_path)
+        self.assertEqual(self.processor.extract_text(b'Texte du CV\n', filename='cv.txt'), 'Texte du CV')
+
+    def test_format_comes_from_the_filename(self):
+        self.assertEqual(self.processor.extract_text(self.pdf, filename='cv.odt'), '')
+
+    def test_upload_source_avoids_copies(self):
+        buffer = io.BytesIO(self.pdf)
+        in_memory = InMemoryUploadedFile(buffer, 'cv', 'cv.pdf', 'application/pdf', len(self.pdf), None)
+        self.assertIs(upload_source(in_memory), buffer)
+        self.assertEqual(self.processor.extract_text_from_upload(in_memory), 'Python developer\nDjango SQL')
+
+        temporary = TemporaryUploadedFile('cv.pdf', 'application/pdf', len(self.pdf), None)
+        try:
+            temporary.write(self.pdf)
+            temporary.flush()
+            self.assertEqual(upload_source(temporary), temporary.temporary_file_path())
+            self.assertEqual(self.processor.extract_text_from_upload(temporary), 'Python developer\nDjango SQL')
+        finally:
+            temporary.close()
+
+
+class PdfBudgetTests(SimpleTestCase):
+    """Extraction PDF page par page, arrêtée au budget de pages ou de caractères"""
+
+    def setUp(self):
+        self.pdf = make_pdf(['Page one', 'Page two', 'Page three'])
+
+    def test_page_budget(self):
+        processor = CVProcessor(max_pdf_pages=2)
+        self.assertEqual(processor.extract_text_from_pdf(self.pdf), 'Page one\nPage two')
+        self.assertEqual(processor.extract_text_from_pdf(self.pdf, max_pages=1), 'Page one')
+        self.assertEqual(CVProcessor().extract_text_from_pdf(self.pdf), 'Page one\nPage two\nPage three')
+
+    def test_character_budget_stops_after_the_page_reaching_it(self):
+        self.assertEqual(CVProcessor(max_chars=5).extract_text_from_pdf(self.pdf), 'Page one')
+        self.assertEqual(CVProcessor(max_chars=12).extract_text_from_pdf(self.pdf), 'Page one\nPage two')
+
+    def test_pages_beyond_the_budget_are_not_parsed(self):
+        class Page:
+            def __init__(self, text):
+                self.text = text
+
+            def extract_text(self):
+                if self.text is None:
+                    raise AssertionError("page hors budget analysée")
+                return self.text
+
+        class Reader:
+            pages = [Page('un'), Page('deux'), Page(None)]
+
+        self.assertEqual(list(CVProcessor.iter_pdf_pages(Reader(), max_pages=2)), ['un', 'deux'])
+
+    def test_unreadable_pdf_gives_no_text(self):
+        self.assertEqual(CVProcessor().extract_text_from_pdf(b'%PDF-1.4 tronque'), '')
+
+
+class SkillMatcherTests(SimpleTestCase):
+    """Automate d'Aho-Corasick: une passe, limites de mots, ordre de la taxonomie"""
+
+    def setUp(self):
+        self.matcher = SkillMatcher(['Python', 'java', 'javascript', 'c++', 'machine learning', 'r', 'python'])
+
+    def test_skills_are_normalized_and_deduplicated(self):
+        self.assertEqual(self.matcher.skills, ['python', 'java', 'javascript', 'c++', 'machine learning', 'r'])
+
+    def test_word_boundaries(self):
+        self.assertEqual(self.matcher.find_all("JavaScript and Java"), ['java', 'javascript'])
+        self.assertEqual(self.matcher.find_all("javascripts, pythonic, r&d"), ['r'])
+        self.assertEqual(self.matcher.find_all("Expert C++ / Machine   Learning"), ['c++'])
+        self.assertEqual(self.matcher.find_all("Machine Learning with Python"), ['python', 'machine learning'])
+
+    def test_tokens_give_the_same_skills(self):
+        for text in ("JavaScript and Java", "C++, R and machine learning", "pythonic javascripts"):
+            features = featurize(text)
+            self.assertEqual(
+                self.matcher.find_in_tokens(features.token_set, features.text_lower), self.matcher.find_all(text)
+            )
+
+    def test_revision_follows_the_skill_list(self):
+        self.assertEqual(SkillMatcher(['Python', 'java', 'python']).revision, SkillMatcher(['python', 'java']).revision)
+        self.assertNotEqual(SkillMatcher(['java', 'python']).revision, SkillMatcher(['python', 'java']).revision)
+        self.assertNotEqual(SkillMatcher(['python', 'rust']).revision, SkillMatcher(['python', 'java']).revision)
+
+    def test_cache_version_changes_with_skills(self):
+        def cache_version(skills):
+            matcher = SkillMatcher(skills)
+            analyzer = CVAnalyzer(skill_matcher_provider=lambda: matcher)
+            analyzer.model_version = 'abc123'
+            return analyzer.cache_version
+
+        version = cache_version(('python', 'java'))
+        self.assertEqual(cache_version(('Python', 'java', 'python')), version)
+        self.assertNotEqual(cache_version(('python', 'rust')), version)
+
+
+class SkillTableTests(TestCase):
+    """La table JobSkill complète la liste intégrée; l'automate suit ses modifications"""
+
+    def setUp(self):
+        invalidate_skill_matcher()
+        self.addCleanup(invalidate_skill_matcher)
+        self.category = JobCategory.objects.create(name='Informatique')
+
+    def test_job_skills_are_matched_after_changes(self):
+        self.assertEqual(get_skill_matcher().find_all("Terraform and Python"), ['python'])
+
+        skill = JobSkill.objects.create(name='Terraform', category=self.category)
+        self.assertEqual(get_skill_matcher().find_all("Terraform and Python"), ['python', 'terraform'])
+
+        skill.delete()
+        self.assertEqual(get_skill_matcher().find_all("Terraform and Python"), ['python'])
+
+
+class ExtractProfileTests(SimpleTestCase):
+    """Expérience cumulée des périodes datées et des mentions explicites"""
+
+    def setUp(self):
+        self.processor = CVProcessor()
+
+    def test_overlapping_periods_are_merged(self):
+        profile = self.processor.extract_profile(
+            "Experience\n"
+            "Software Engineer, Acme 2010 - 2015\n"
+            "Lead Developer, Beta 2013 - 2018\n"
+            "Consultant 2020 - 2021\n"
+        )
+        # 2010-2018 (chevauchement compté une fois) + 2020-2021
+        self.assertEqual(profile['experience_years'], 9)
+        self.assertEqual([period['years'] for period in profile['experience']], [5, 5, 1])
+
+    def test_contained_period_adds_nothing(self):
+        profile = self.processor.extract_profile("Developer 2010 - 2020\nFreelance 2012 - 2014\n")
+        self.assertEqual(profile['experience_years'], 10)
+
+    def test_stated_years_win_over_shorter_periods(self):
+        profile = self.processor.extract_profile("10 years of experience\nDeveloper 2016 - 2018\n")
+        self.assertEqual(profile['experience_years'], 10)
+
+    def test_open_period_ends_this_year(self):
+        profile = self.processor.extract_profile("Developer 2019 - present\n")
+        self.assertEqual(profile['experience'][0]['end'], timezone.now().year)
+
+    def test_education_periods_are_not_experience(self):
+        profile = self.processor.extract_profile(
+            "Experience\nDeveloper 2010 - 2012\nEducation\nMaster of Science 2005 - 2007\n"
+        )
+        self.assertEqual(profile['experience_years'], 2)
+        self.assertEqual(profile['education'][0]['degree'], 'master')
+        self.assertEqual((profile['education'][0]['start'], profile['education'][0]['end']), (2005, 2007))
+
+    def test_french_mentions(self):
+        profile = self.processor.extract_profile("Expérience : 4 ans\nDéveloppeur 01/2021 à aujourd'hui\n")
+        self.assertEqual(profile['experience_years'], max(4, timezone.now().year - 2021))
+        self.assertEqual(self.processor.extract_experience_years("7 ans d'expérience"), 7)
+
+
+class BatchInferenceTests(SimpleTestCase):
+    """analyze_cvs: une inférence pour tout le lot, mêmes résultats que CV par CV"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.analyzer = trained_analyzer()
+
+    def test_batch_matches_single_analyses(self):
+        texts = [cv * repeat for cv in TRAINING_CVS.values() for repeat in (1, 4)] + ["Python, 3 years of experience"]
+        analyses = self.analyzer.analyze_cvs(texts)
+
+        self.assertEqual(analyses, [self.analyzer.analyze_cv(text) for text in texts])
+        self.assertEqual([analysis['domain'] for analysis in analyses[:4]],
+                         ['information_technology'] * 2 + ['accountant'] * 2)
+        self.assertEqual(analyses[-1]['experience_years'], 3)
+        self.assertEqual(analyses[0]['model_version'], self.analyzer.model_version)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.analyzer.analyze_cvs([]), [])
+
+    def test_untrained_analyzer_refuses_to_analyze(self):
+        with self.assertRaises(ValueError):
+            CVAnalyzer().analyze_cvs(["Python developer"])
+
+
+class JobCascadeTests(TestCase):
+    """analyze_job_cvs: filtres d'expérience et de compétences avant la classification"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analyzer = trained_analyzer()
+        cls.model = LoadedModel(analyzer, CVWorkerPool(analyzer, max_workers=1), ('test',))
+
+    def setUp(self):
+        self.profile = JobMatchProfile(
+            description='Backend developer', requirements='Django API', required_skills='Python, Django',
+            experience_required='1-3'
+        )
+
+    def files(self):
+        return [
+            SimpleUploadedFile(name, text.encode('utf-8')) for name, text in (
+                ('complet.txt', "Python Django developer\n2 years of experience"),
+                ('partiel.txt', "Python developer\n2 years of experience"),
+                ('senior.txt', "Python Django developer\n8 years of experience"),
+                ('comptable.txt', "Accountant audit\n2 years of experience"),
+            )
+        ]
+
+    def stage(self, pipeline, name):
+        return next(stage for stage in pipeline if stage['stage'] == name)
+
+    def test_skills_prefilter_is_off_by_default(self):
+        self.assertEqual(settings.AI_MODEL_CONFIG['MIN_REQUIRED_SKILLS_MATCH'], 0)
+        self.assertTrue(self.profile.accepts_skills([], 0))
+
+        analyses, similarities, errors, pipeline = score_job_files(self.model, self.profile, self.files(), 0)
+        prefilter = self.stage(pipeline, 'prefilter')
+        self.assertEqual((prefilter['rejected_experience'], prefilter['rejected_skills']), (1, 0))
+        self.assertEqual([analysis['filename'] for analysis in analyses], ['complet.txt', 'partiel.txt', 'comptable.txt'])
+        self.assertEqual(self.stage(pipeline, 'classification')['input'], 3)
+        self.assertEqual(len(similarities), 3)
+        self.assertEqual(errors, [])
+
+    def test_required_skills_are_filtered_before_classification(self):
+        analyses, _, _, pipeline = score_job_files(self.model, self.profile, self.files(), 2)
+        self.assertEqual(self.stage(pipeline, 'prefilter')['rejected_skills'], 2)
+        self.assertEqual(self.stage(pipeline, 'classification')['input'], 1)
+        self.assertEqual([analysis['filename'] for analysis in analyses], ['complet.txt'])
+        self.assertEqual(analyses[0]['matched_skills'], ['python', 'django'])
+
+    def test_profile_score_matches_the_reference_score(self):
+        text = "python django developer with sql and docker"
+        features = featurize(text)
+        matched = self.profile.match_skills(features)
+        self.assertEqual(
+            self.profile.score(features, 2, matched),
+            calculate_job_match_score(text, ['python', 'django'], 'backend developer', 'django api', '1-3', 2)
+        )
+
+    def test_experience_filter(self):
+        self.assertEqual([self.profile.accepts_experience(years) for years in (0, 1, 3, 4)], [False, True, True, False])
+        self.assertTrue(JobMatchProfile(experience_required='10+').accepts_experience(12))
+
+
+class ExtractionSandboxTests(SimpleTestCase):
+    """Extraction dans des sous-processus isolés, remplacés quand ils disparaissent"""
+
+    def setUp(self):
+        self.processor = CVProcessor()
+        self.sandbox = ExtractionSandbox(self.processor, max_workers=2, timeout=20, max_documents=2)
+        self.addCleanup(self.sandbox.shutdown)
+        self.items = [
+            (make_pdf(['Python developer']), 'cv.pdf'),
+            (b'', 'vide.txt'),
+            (b'%PDF-1.4 tronque', 'casse.pdf'),
+            (b'Accountant', 'comptable.txt'),
+        ]
+
+    def pids(self):
+        return {worker.process.pid for worker in self.sandbox._workers if worker.process is not None}
+
+    def test_results_match_in_process_extraction(self):
+        results = self.sandbox.extract_files(self.items)
+        self.assertEqual(results, extract_cv_files(CVAnalyzer(), self.items))
+        self.assertEqual([result['status'] for result in results], ['success', 'error', 'error', 'success'])
+        self.assertEqual(results[0]['text'], 'Python developer')
+
+    def test_killed_processes_are_replaced(self):
+        self.sandbox.extract_files(self.items[:1])
+        started = self.pids()
+        for worker in self.sandbox._workers:
+            worker.process.kill()
+            worker.process.join()
+
+        results = self.sandbox.extract_files(self.items)
+        self.assertEqual([result['status'] for result in results], ['success', 'error', 'error', 'success'])
+        self.assertTrue(self.pids().isdisjoint(started))
+
+    def test_processes_are_recycled_after_max_documents(self):
+        self.sandbox.extract_files(self.items[:1])
+        started = self.pids()
+        self.sandbox.extract_files(self.items * 2)
+        self.assertTrue(self.pids() - started)
+
+
+class DatasetPreparationTests(SimpleTestCase):
+    """Dataset d'entraînement: échantillonnage par domaine et manifeste des textes déjà extraits"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dataset = directory.name
+        self.manifest_path = os.path.join(self.dataset, 'cache', 'manifest.json')
+        for domain, names in (('ACCOUNTANT', ['a', 'b', 'c']), ('INFORMATION-TECHNOLOGY', ['d'])):
+            os.makedirs(os.path.join(self.dataset, domain))
+            for name in names:
+                self.write(os.path.join(domain, f'{name}.pdf'), f'CV {name}')
+        self.extracted = []
+        self.pool = CVWorkerPool(CVAnalyzer(), max_workers=1)
+
+    def write(self, relative_path, text):
+        with open(os.path.join(self.dataset, relative_path), 'wb') as file:
+            file.write(make_pdf([text]))
+
+    def extract_files(self, items):
+        """Pool d'extraction enregistrant les fichiers réellement extraits"""
+        self.extracted.extend(name for _, name in items)
+        return self.pool.extract_files(items)
+
+    def extract(self, relative_paths, options=None):
+        manifest = DatasetManifest(self.manifest_path, options or {'max_pdf_pages': 2})
+        texts = extract_dataset_texts(self, self.dataset, relative_paths, manifest)
+        manifest.save()
+        return texts
+
+    def test_files_are_sampled_per_domain(self):
+        files = list_dataset_files(self.dataset, max_per_domain=2)
+        self.assertEqual(files, [
+            ('ACCOUNTANT', os.path.join('ACCOUNTANT', 'a.pdf')),
+            ('ACCOUNTANT', os.path.join('ACCOUNTANT', 'b.pdf')),
+            ('INFORMATION-TECHNOLOGY', os.path.join('INFORMATION-TECHNOLOGY', 'd.pdf')),
+        ])
+        self.assertEqual(len(list_dataset_files(self.dataset, max_per_domain=None)), 4)
+        self.assertEqual(list_dataset_files(self.dataset, 2, 'random', seed=1),
+                         list_dataset_files(self.dataset, 2, 'random', seed=1))
+        with self.assertRaises(ValueError):
+            list_dataset_files(self.dataset, sampling='latest')
+
+    def test_unchanged_files_are_not_extracted_again(self):
+        paths = [path for _, path in list_dataset_files(self.dataset, max_per_domain=None)]
+        texts = self.extract(paths)
+        self.assertEqual(texts[os.path.join('ACCOUNTANT', 'a.pdf')], 'CV a')
+        self.assertEqual(len(self.extracted), 4)
+
+        self.extracted.clear()
+        self.write(os.path.join('ACCOUNTANT', 'b.pdf'), 'CV b revu')
+        texts = self.extract(paths)
+        self.assertEqual(self.extracted, ['b.pdf'])
+        self.assertEqual(texts[os.path.join('ACCOUNTANT', 'b.pdf')], 'CV b revu')
+
+    def test_copied_file_reuses_the_known_text(self):
+        self.extract([os.path.join('ACCOUNTANT', 'a.pdf')])
+        self.extracted.clear()
+        with open(os.path.join(self.dataset, 'ACCOUNTANT', 'a.pdf'), 'rb') as source:
+            with open(os.path.join(self.dataset, 'ACCOUNTANT', 'copie.pdf'), 'wb') as copy:
+                copy.write(source.read())
+
+        texts = self.extract([os.path.join('ACCOUNTANT', 'copie.pdf')])
+        self.assertEqual(texts, {os.path.join('ACCOUNTANT', 'copie.pdf'): 'CV a'})
+        self.assertEqual(self.extracted, [])
+
+    def test_new_extraction_budgets_invalidate_the_manifest(self):
+        self.extract([os.path.join('ACCOUNTANT', 'a.pdf')])
+        self.extracted.clear()
+        self.extract([os.path.join('ACCOUNTANT', 'a.pdf')], {'max_pdf_pages': 5})
+        self.assertEqual(self.extracted, ['a.pdf'])
+
+
+class IncrementalTrainingTests(SimpleTestCase):
+    """Entraînement par mini-lots (partial_fit): un lot en mémoire à la fois"""
+
+    def batches(self, sizes):
+        texts = [(cv * (index + 1), domain) for index in range(10) for domain, cv in TRAINING_CVS.items()]
+        start = 0
+        for size in sizes:
+            chunk = texts[start:start + size]
+            start += size
+            yield [text for text, _ in chunk], [domain for _, domain in chunk]
+
+    def test_models_learn_from_streamed_batches(self):
+        analyzer = CVAnalyzer()
+        self.assertEqual(analyzer.train_incremental(self.batches([6, 6, 8]), domain_classes=list(TRAINING_CVS)), 20)
+
+        self.assertTrue(analyzer.is_incremental)
+        self.assertTrue(analyzer.is_trained)
+        self.assertIsNotNone(analyzer.model_version)
+        analyses = analyzer.analyze_cvs([cv * 3 for cv in TRAINING_CVS.values()])
+        self.assertEqual([analysis['domain'] for analysis in analyses], list(TRAINING_CVS))
+        self.assertIn(analyses[0]['quality'], ('bon', 'moyen'))
+
+    def test_update_changes_the_model_version(self):
+        analyzer = CVAnalyzer()
+        analyzer.train_incremental(self.batches([10]), domain_classes=list(TRAINING_CVS))
+        version = analyzer.model_version
+        analyzer.train_incremental(self.batches([10]))
+        self.assertNotEqual(analyzer.model_version, version)
+
+    def test_job_categories_map_to_model_domains(self):
+        domains = {'teacher', 'information_technology', 'chef'}
+        self.assertEqual(domain_label('INFORMATION-TECHNOLOGY'), 'information_technology')
+        self.assertEqual(category_domain('Teaching', domains), 'teacher')
+        self.assertEqual(category_domain('Information Technology', domains), 'information_technology')
+        self.assertEqual(category_domain('Chef', domains), 'chef')
+        self.assertIsNone(category_domain('Banking', domains))
+        self.assertIsNone(category_domain('', domains))
+
+
+class QualityModelTests(SimpleTestCase):
+    """Choix du modèle de qualité: exactitude sous le budget de latence"""
+
+    def result(self, backend, accuracy, p99_ms):
+        return {'backend': backend, 'accuracy': accuracy, 'p99_ms': p99_ms}
+
+    def test_most_accurate_backend_within_budget(self):
+        results = [self.result('svc_rbf', 0.9, 5.0), self.result('linear_svc', 0.85, 0.1), self.result('logistic', 0.85, 0.05)]
+        self.assertEqual(select_quality_backend(results, None)['backend'], 'svc_rbf')
+        self.assertEqual(select_quality_backend(results, 1.0)['backend'], 'logistic')
+        self.assertEqual(select_quality_backend(results, 0.01)['backend'], 'logistic')
+        self.assertIsNone(select_quality_backend([], 1.0))
+
+    def test_unknown_backend_is_rejected(self):
+        self.assertEqual(type(make_quality_classifier('auto')), type(make_quality_classifier('linear_svc')))
+        with self.assertRaises(ValueError):
+            make_quality_classifier('xgboost')
+
+    def test_training_keeps_the_benchmarked_model(self):
+        analyzer = trained_analyzer(quality_backend='logistic')
+        self.assertEqual({result['backend'] for result in analyzer.quality_benchmark},
+                         {'svc_rbf', 'linear_svc', 'logistic'})
+        self.assertEqual(type(analyzer.quality_classifier).__name__, 'LogisticRegression')
+
+    def test_single_quality_class_is_predicted_constantly(self):
+        analyzer = CVAnalyzer()
+        frame = training_frame(analyzer.processor, size=4)
+        frame['skills_count'] = 1
+        frame['experience_years'] = 1
+        frame['word_count'] = 100
+        analyzer.train_models(frame)
+
+        self.assertEqual(type(analyzer.quality_classifier).__name__, 'DummyClassifier')
+        analyses = analyzer.analyze_cvs(list(TRAINING_CVS.values()))
+        self.assertEqual({analysis['quality'] for analysis in analyses}, {'bon'})
+
+
+class ModelBundleTests(SimpleTestCase):
+    """Bundles versionnés: manifeste, empreintes, bundle actif et anciens pickles"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.analyzer = trained_analyzer()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.models_dir = directory.name
+        self.texts = [cv * 2 for cv in TRAINING_CVS.values()]
+
+    def test_round_trip_gives_the_same_analyses(self):
+        bundle_dir = self.analyzer.save_models(self.models_dir)
+        self.assertEqual(os.path.basename(bundle_dir), self.analyzer.model_version)
+        with open(os.path.join(self.models_dir, 'CURRENT')) as current:
+            self.assertEqual(current.read(), self.analyzer.model_version)
+
+        for mmap in (True, False):
+            loaded = CVAnalyzer()
+            loaded.load_models(self.models_dir, mmap=mmap)
+            self.assertEqual(loaded.model_version, self.analyzer.model_version)
+            self.assertEqual(loaded.analyze_cvs(self.texts), self.analyzer.analyze_cvs(self.texts))
+
+    def test_corrupted_file_is_rejected(self):
+        bundle_dir = self.analyzer.save_models(self.models_dir)
+        with open(os.path.join(bundle_dir, 'quality_classifier.joblib'), 'ab') as file:
+            file.write(b'\0')
+        with self.assertRaises(ArtifactError):
+            load_bundle(self.models_dir)
+
+    def test_missing_models_raise_artifact_error(self):
+        with self.assertRaises(ArtifactError):
+            CVAnalyzer().load_models(self.models_dir)
+
+    def test_legacy_pickles_are_still_loaded(self):
+        for name in ('vectorizer', 'domain_classifier', 'quality_classifier'):
+            with open(os.path.join(self.models_dir, f'{name}.pkl'), 'wb') as file:
+                pickle.dump(getattr(self.analyzer, name), file)
+
+        loaded = CVAnalyzer()
+        loaded.load_models(self.models_dir)
+        self.assertTrue(loaded.is_trained)
+        self.assertEqual(
+            [analysis['domain'] for analysis in loaded.analyze_cvs(self.texts)],
+            [analysis['domain'] for analysis in self.analyzer.analyze_cvs(self.texts)]
+        )
+
+
+class SharedModelTests(SimpleTestCase):
+    """Préchargement des modèles dans le maître avant le fork des workers"""
+
+    def test_preload_loads_then_freezes_objects(self):
+        class Registry:
+            loaded = False
+
+            def ensure_loaded(self):
+                self.loaded = True
+                return True
+
+        registry = Registry()
+        self.addCleanup(gc.unfreeze)
+        self.assertTrue(preload_shared_models(registry))
+        self.assertTrue(registry.loaded)
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_process_memory(self):
+        memory = process_memory()
+        self.assertGreater(memory['rss'], 0)
+        if 'uss' in memory:
+            self.assertLessEqual(memory['uss'], memory['rss'])
+
+
+class ModelRegistryTests(TestCase):
+    """Modèle servi désigné par la table AIModel, remplacé à chaud sans interrompre les requêtes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = trained_analyzer()
+        cls.second = CVAnalyzer()
+        cls.second.train_models(training_frame(cls.second.processor, size=8))
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.models_dir = directory.name
+        self.registry = ModelRegistry(
+            self.models_dir, analyzer_factory=CVAnalyzer,
+            pool_factory=lambda analyzer: CVWorkerPool(analyzer, max_workers=1), check_interval=3600
+        )
+
+    def register(self, analyzer):
+        bundle_dir = analyzer.save_models(os.path.join(self.models_dir, 'bundles'))
+        return register_model_bundle(bundle_dir, analyzer.model_version)
+
+    def test_no_model_yet(self):
+        with self.registry.acquire() as model:
+            self.assertIsNone(model)
+        self.assertEqual(self.registry.status()['state'], 'error')
+
+        registry = ModelRegistry(os.path.join(self.models_dir, 'absent'), analyzer_factory=CVAnalyzer)
+        self.assertFalse(registry.ensure_loaded())
+        self.assertEqual(registry.status()['state'], 'missing')
+
+    def test_active_record_is_hot_swapped(self):
+        self.register(self.first)
+        with self.registry.acquire() as model:
+            self.assertEqual(model.model_version, self.first.model_version)
+            self.assertEqual(self.registry.status()['source'], 'record')
+
+            # Nouvelle ligne active: le signal force la vérification de la source
+            self.register(self.second)
+            self.assertEqual(self.registry._checked_at, float('-inf'))
+            self.assertTrue(self.registry.refresh(wait=True))
+
+            # La requête en cours garde sa version jusqu'au bout
+            self.assertEqual(self.registry.current.model_version, self.second.model_version)
+            self.assertFalse(model._closed)
+            self.assertEqual(model.analyzer.analyze_cvs(['Python developer'])[0]['model_version'],
+                             self.first.model_version)
+        self.assertTrue(model._closed)
+
+        with self.registry.acquire() as model:
+            self.assertEqual(model.model_version, self.second.model_version)
+        self.assertFalse(self.registry.refresh(wait=True))
+
+
+class FeaturizerTests(SimpleTestCase):
+    """Tokenisation unique partagée par le nettoyage, les compétences et le TF-IDF"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.analyzer = trained_analyzer()
+        cls.texts = [
+            cv * 2 for cv in TRAINING_CVS.values()
+        ] + ["Développeur C++ / Node.js, Machine Learning (3 ans d'expérience)", "", "a b c"]
+
+    def test_tokens_feed_the_cleaned_text_and_word_count(self):
+        features = featurize("Python, Django & SQL:  l'API REST")
+        self.assertEqual(features.tokens, ['python', 'django', 'sql', 'l', 'api', 'rest'])
+        self.assertEqual(features.cleaned, 'python django sql l api rest')
+        self.assertEqual(features.word_count, 6)
+        self.assertTrue(features.contains('django & sql'))
+
+    def test_skills_from_tokens_match_the_text_scan(self):
+        processor = self.analyzer.processor
+        for text in self.texts:
+            self.assertEqual(processor.extract_skills_from_features(featurize(text)), processor.extract_skills(text))
+
+    def test_vectorize_matches_the_sklearn_transform(self):
+        features = [featurize(text) for text in self.texts]
+        expected = self.analyzer.vectorizer.transform([feature.cleaned for feature in features])
+        np.testing.assert_allclose(vectorize(self.analyzer.vectorizer, features).toarray(), expected.toarray())
+
+    def test_pool_keeps_tokens_and_tfidf_rows(self):
+        items = [(text.encode('utf-8'), f'cv{index}.txt') for index, text in enumerate(self.texts)]
+        pool = CVWorkerPool(self.analyzer, max_workers=1)
+        results = pool.process_files(items, keep_features=True)
+
+        self.assertEqual([result['status'] for result in results], ['success', 'success', 'success', 'error', 'success'])
+        extracted = [result for result in results if result['status'] == 'success']
+        X = vectorize(self.analyzer.vectorizer, [result['features'] for result in extracted])
+        for row, result in enumerate(extracted):
+            self.assertEqual(result['features'].text, result['text'])
+            np.testing.assert_allclose(result['vector'].toarray(), X[row].toarray())
+        self.assertNotIn('features', results[3])
+
+
+class CompactVectorizerTests(SimpleTestCase):
+    """Vectoriseur compact: mêmes vecteurs que le TfidfVectorizer entraîné, en float32"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vectorizer = trained_analyzer().vectorizer
+        cls.texts = [cv * 3 for cv in TRAINING_CVS.values()] + ["Python accountant, inconnu", ""]
+
+    def test_transform_matches_the_trained_vectorizer(self):
+        compact = compact_vectorizer(self.vectorizer)
+        self.assertIsInstance(compact, CompactTfidfVectorizer)
+        self.assertEqual(compact.vocabulary_, self.vectorizer.vocabulary_)
+        self.assertEqual(list(compact.get_feature_names_out()), list(self.vectorizer.get_feature_names_out()))
+
+        X = compact.transform(self.texts)
+        self.assertEqual(X.dtype, np.float32)
+        np.testing.assert_allclose(X.toarray(), self.vectorizer.transform(self.texts).toarray(), rtol=1e-6, atol=1e-7)
+        np.testing.assert_array_equal(
+            vectorize(compact, [featurize(text) for text in self.texts]).toarray(), X.toarray()
+        )
+
+    def test_pickle_keeps_only_the_term_table(self):
+        compact = compact_vectorizer(self.vectorizer)
+        self.assertNotIn('vocabulary_', compact.__getstate__())
+        restored = pickle.loads(pickle.dumps(compact))
+        self.assertEqual(restored.vocabulary_, compact.vocabulary_)
+        self.assertLess(len(pickle.dumps(compact)), len(pickle.dumps(self.vectorizer)))
+
+    def test_other_vectorizers_are_kept_without_their_stop_words(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_features=5).fit(self.texts[:2])
+        vectorizer.stop_words_ = {'ecarte'}
+        self.assertIs(compact_vectorizer(vectorizer), vectorizer)
+        self.assertIsNone(vectorizer.stop_words_)
+
+
+class RankingTests(SimpleTestCase):
+    """Similarité cosinus creuse et sélection des k meilleurs"""
+
+    def test_top_k_orders_best_first(self):
+        self.assertEqual(list(top_k([0.2, 0.9, 0.5, 0.7], 3)), [1, 3, 2])
+
+    def test_top_k_keeps_input_order_on_ties(self):
+        self.assertEqual(list(top_k([1.0, 3.0, 3.0, 2.0, 3.0], None)), [1, 2, 4, 3, 0])
+
+    def test_top_k_bounds(self):
+        self.assertEqual(list(top_k([1.0, 2.0], 5)), [1, 0])
+        self.assertEqual(list(top_k([1.0, 2.0], 0)), [])
+
+    def test_cosine_similarities(self):
+        X = sp.csr_matrix(np.array([[1.0, 0, 0], [1.0, 1.0, 0], [0, 0, 0], [0, 0, 2.0]]))
+        Q = sp.csr_matrix(np.array([[2.0, 0, 0]]))
+        np.testing.assert_allclose(cosine_similarities(X, Q)[:, 0], [1.0, np.sqrt(0.5), 0.0, 0.0])
+
+    def test_similarity_ranks_the_closest_cv_first(self):
+        analyzer = trained_analyzer()
+        texts = [TRAINING_CVS['accountant'] * 2, TRAINING_CVS['information_technology'] * 2]
+        job = featurize(job_document('Python developer', 'Django and SQL', 'python, docker'))
+        similarities = cosine_similarities(
+            vectorize(analyzer.vectorizer, [featurize(text) for text in texts]), vectorize(analyzer.vectorizer, [job])
+        )[:, 0]
+        self.assertEqual(list(top_k(similarities, 1)), [1])
+        self.assertEqual(job_document('Description', None, 'python'), 'Description\npython')
+
+
+class JobProfileCacheTests(TestCase):
+    """Profils de poste compilés une fois par révision de l'offre"""
+
+    def setUp(self):
+        self.profiles = JobProfileCache(max_entries=2)
+        self.job = create_job()
+
+    def test_profile_is_reused_until_the_job_changes(self):
+        profile = self.profiles.for_job(self.job.pk)
+        self.assertEqual(profile.skills_keywords, ['python', 'django'])
+        self.assertIs(self.profiles.for_job(str(self.job.pk)), profile)
+
+        self.job.skills_required = 'Python, Django, Docker'
+        self.job.save()
+        updated = self.profiles.for_job(self.job.pk)
+        self.assertIsNot(updated, profile)
+        self.assertEqual(updated.skills_keywords, ['python', 'django', 'docker'])
+        self.assertEqual((self.profiles.hits, self.profiles.misses), (1, 2))
+
+    def test_unknown_jobs(self):
+        self.assertIsNone(self.profiles.for_job(self.job.pk + 1))
+        self.assertIsNone(self.profiles.for_job('abc'))
+
+    def test_profiles_from_request_fields_are_keyed_on_content(self):
+        profile = self.profiles.for_fields('Description', 'Exigences', 'python', '1-3')
+        self.assertIs(self.profiles.for_fields('Description', 'Exigences', 'python', '1-3'), profile)
+        self.assertIsNot(self.profiles.for_fields('Description', 'Exigences', 'java', '1-3'), profile)
+
+    def test_least_recently_used_profiles_are_dropped(self):
+        first = self.profiles.for_fields('a', '', '', '')
+        self.profiles.for_fields('b', '', '', '')
+        self.profiles.for_fields('c', '', '', '')
+        self.assertEqual(self.profiles.stats()['entries'], 2)
+        self.assertIsNot(self.profiles.for_fields('a', '', '', ''), first)
+
+    def test_job_vector_is_computed_once_per_model_version(self):
+        analyzer = trained_analyzer()
+        profile = self.profiles.for_job(self.job.pk)
+        vector = profile.vector(analyzer)
+        self.assertIs(profile.vector(analyzer), vector)
+        np.testing.assert_allclose(
+            vector.toarray(), vectorize(analyzer.vectorizer, [featurize(profile.document)]).toarray()
+        )
+
+
+class VectorPackingTests(SimpleTestCase):
+    """Encodage binaire des vecteurs creux des candidatures"""
+
+    def test_round_trip(self):
+        rows = [
+            sp.csr_matrix(np.array([[0, 0.5, 0, 1.25, 0, 0]], dtype=np.float32)),
+            sp.csr_matrix((1, 6), dtype=np.float32),
+            sp.csr_matrix(np.array([[2.0, 0, 0, 0, 0, -0.75]], dtype=np.float64)),
+        ]
+        blobs = [pack_vector(row) for row in rows]
+        self.assertEqual([len(blob) for blob in blobs], [16, 0, 16])
+
+        matrix = unpack_vectors(blobs, 6)
+        self.assertEqual(matrix.shape, (3, 6))
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_array_equal(matrix.toarray(), sp.vstack(rows).toarray().astype(np.float32))
+
+    def test_unsorted_indices_are_sorted(self):
+        row = sp.csr_matrix((np.array([1.0, 2.0]), np.array([4, 1]), np.array([0, 2])), shape=(1, 5))
+        matrix = unpack_vectors([pack_vector(row)], 5)
+        np.testing.assert_array_equal(matrix.indices, [1, 4])
+        np.testing.assert_array_equal(matrix.toarray(), row.toarray())
+
+    def test_index_ranks_and_excludes_the_query_application(self):
+        index = CandidateIndex([7, 8, 9], np.array([[1.0, 0], [1.0, 1.0], [0, 3.0]]))
+        self.assertEqual([application_id for application_id, _ in index.rank(np.array([[1.0, 0]]), 2)], [7, 8])
+        self.assertEqual([application_id for application_id, _ in index.similar_to(8, None)], [7, 9])
+        self.assertNotIn(10, index)
+
+
+class CandidateIndexTests(TestCase):
+    """Vecteurs persistés des candidatures et index de similarité par offre"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analyzer = trained_analyzer()
+        cls.model = LoadedModel(analyzer, CVWorkerPool(analyzer, max_workers=1), ('test',))
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.job = create_job()
+        self.applications = [
+            create_application(self.job, 'alice', TRAINING_CVS['information_technology'] * 3),
+            create_application(self.job, 'bruno', TRAINING_CVS['accountant'] * 3),
+            create_application(self.job, 'chloe', ''),
+        ]
+
+    def test_indexing_stores_the_analysis_vectors(self):
+        successes, errors = index_applications(self.model, self.applications)
+
+        self.assertEqual([result['application_id'] for result in successes], [a.pk for a in self.applications[:2]])
+        self.assertEqual([error['application_id'] for error in errors], [self.applications[2].pk])
+        stored = ApplicationVector.objects.get(application=self.applications[0])
+        self.assertEqual((stored.model_version, stored.domain), (self.model.model_version, 'information_technology'))
+        np.testing.assert_allclose(
+            unpack_vectors([stored.data], stored.n_features).toarray(), successes[0]['vector'].toarray(), rtol=1e-6
+        )
+
+        # Nouvelle indexation: le vecteur existant est remplacé
+        index_applications(self.model, self.applications[:1])
+        self.assertEqual(ApplicationVector.objects.count(), 2)
+
+    def test_job_index_is_reloaded_when_vectors_change(self):
+        indexes = CandidateIndexCache()
+        index_applications(self.model, self.applications[:1])
+        self.assertEqual(len(indexes.for_job(self.job.pk, self.model.model_version)), 1)
+        self.assertIs(indexes.for_job(self.job.pk, self.model.model_version),
+                      indexes.for_job(self.job.pk, self.model.model_version))
+
+        index_applications(self.model, self.applications[1:2])
+        index = indexes.for_job(self.job.pk, self.model.model_version)
+        self.assertEqual(len(index), 2)
+        profile = JobMatchProfile.from_job(self.job)
+        ranked = index.rank(profile.vector(self.model.analyzer), 2)
+        self.assertEqual(ranked[0][0], self.applications[0].pk)
+        self.assertEqual(len(indexes.for_domain('accountant', self.model.model_version)), 1)
+        self.assertEqual(len(indexes.for_job(self.job.pk, 'autre-version')), 0)
+
+
+class WorkQueueTests(TestCase):
+    """Réservation exclusive et nouvelles tentatives (table AnalysisBatchFile)"""
+
+    def setUp(self):
+        batch = AnalysisBatch.objects.create(kind='bulk', total_files=4)
+        AnalysisBatchFile.objects.bulk_create([
+            AnalysisBatchFile(batch=batch, position=position, filename=f'cv{position}.pdf', priority=priority)
+            for position, priority in enumerate([3, 1, 3, 2])
+        ])
+
+    def claim(self, worker, limit):
+        return claim_items(worker, limit, AnalysisBatchFile, ('batch',))
+
+    def test_claims_are_exclusive_and_ordered_by_priority(self):
+        first = self.claim('worker-a', 2)
+        second = self.claim('worker-b', 10)
+
+        self.assertEqual([item.filename for item in first], ['cv1.pdf', 'cv3.pdf'])
+        self.assertEqual({item.filename for item in second}, {'cv0.pdf', 'cv2.pdf'})
+        self.assertEqual(self.claim('worker-c', 10), [])
+        self.assertEqual(
+            AnalysisBatchFile.objects.filter(status='processing', worker='worker-a').count(), 2
+        )
+        self.assertTrue(all(item.attempts == 1 for item in first + second))
+
+    def test_retry_delay_doubles_up_to_maximum(self):
+        self.assertEqual([retry_delay(attempts, 30, 100) for attempts in (1, 2, 3, 4)], [30, 60, 100, 100])
+
+    def test_failed_item_is_retried_after_backoff(self):
+        item = self.claim('worker-a', 1)[0]
+        before = timezone.now()
+        status = fail_item(item, 'erreur', 0.1, max_attempts=3, backoff=30, backoff_max=3600)
+
+        item.refresh_from_db()
+        self.assertEqual(status, 'retrying')
+        self.assertEqual(item.status, 'retrying')
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=30))
+        # Pas de nouvelle réservation avant la fin du délai
+        self.assertNotIn(item.pk, [claimed.pk for claimed in self.claim('worker-b', 10)])
+
+    def test_item_fails_after_max_attempts(self):
+        item = self.claim('worker-a', 1)[0]
+        AnalysisBatchFile.objects.filter(pk=item.pk).update(attempts=3)
+        status = fail_item(item, 'erreur', 0.1, max_attempts=3, backoff=30, backoff_max=3600)
+
+        item.refresh_from_db()
+        self.assertEqual(status, 'failed')
+        self.assertEqual(item.status, 'failed')
+        self.assertIsNotNone(item.completed_at)
+
+    def test_fail_is_ignored_once_another_worker_owns_the_item(self):
+        item = self.claim('worker-a', 1)[0]
+        AnalysisBatchFile.objects.filter(pk=item.pk).update(worker='worker-b')
+        fail_item(item, 'erreur', 0.1, max_attempts=3, backoff=30, backoff_max=3600)
+
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'processing')
+
+    def test_expired_leases_are_released(self):
+        items = self.claim('worker-a', 2)
+        AnalysisBatchFile.objects.filter(pk=items[0].pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(release_expired(600, [AnalysisBatchFile]), 1)
+        self.assertEqual([item.pk for item in self.claim('worker-b', 1)], [items[0].pk])
+
+    def test_queue_sources_must_process_items(self):
+        with self.assertRaises(TypeError):
+            QueueSource()
+
+
+class QueueWorkerTests(TestCase):
+    """Processus de traitement: lots de candidatures analysés avec le modèle actif"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analyzer = trained_analyzer()
+        cls.model = LoadedModel(analyzer, CVWorkerPool(analyzer, max_workers=1), ('test',))
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        job = create_job()
+        self.applications = [
+            create_application(job, 'alice', "Python Django developer\n2 years of experience"),
+            create_application(job, 'bruno', ''),
+        ]
+        self.items = [ProcessingQueue.objects.create(application=application) for application in self.applications]
+        self.worker = CVQueueWorker(StaticRegistry(self.model), name='worker-test', batch_size=10, backoff=60)
+
+    def test_batch_is_analyzed_and_failures_are_retried(self):
+        self.assertEqual(self.worker.run_once(), 2)
+        self.assertEqual((self.worker.processed, self.worker.failed), (1, 1))
+
+        done, failed = (ProcessingQueue.objects.get(pk=item.pk) for item in self.items)
+        self.assertEqual(done.status, 'completed')
+        self.assertEqual(failed.status, 'retrying')
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+        application = Application.objects.get(pk=self.applications[0].pk)
+        self.assertEqual(application.ai_analysis['domain'], 'information_technology')
+        self.assertEqual(application.ai_analysis['matched_skills'], ['python', 'django'])
+        self.assertEqual(application.ai_score, application.ai_analysis['job_match_score'])
+        self.assertTrue(ApplicationVector.objects.filter(application=application).exists())
+
+        # Plus rien de prêt avant la fin du délai
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_full_analysis_is_stored_and_recruiter_notified(self):
+        self.worker.run_once()
+
+        application = Application.objects.get(pk=self.applications[0].pk)
+        cv_analysis = CVAnalysis.objects.get(application=application)
+        self.assertEqual(cv_analysis.overall_score, application.ai_score)
+        self.assertEqual(cv_analysis.keywords_found, ['python', 'django'])
+        self.assertEqual(
+            set(SkillExtraction.objects.filter(application=application).values_list('skill_name', flat=True)),
+            set(application.ai_analysis['skills'])
+        )
+        notification = Notification.objects.get(related_application=application, notification_type='success')
+        self.assertEqual(notification.recipient, application.job.posted_by)
+        # CV vide: ni analyse ni notification
+        self.assertFalse(CVAnalysis.objects.filter(application=self.applications[1]).exists())
+
+    def test_recruiter_preferences_disable_the_notification(self):
+        NotificationPreference.objects.create(user=self.applications[0].job.posted_by, inapp_ai_analysis_complete=False)
+        self.worker.run_once()
+
+        self.assertTrue(CVAnalysis.objects.filter(application=self.applications[0]).exists())
+        self.assertFalse(Notification.objects.filter(notification_type='success').exists())
+
+    def test_no_model_no_claim(self):
+        worker = CVQueueWorker(StaticRegistry(None), name='worker-test')
+        self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(ProcessingQueue.objects.filter(status='pending').count(), 2)
+
+    def test_enqueue_reuses_pending_item(self):
+        application = self.applications[0]
+        ProcessingQueue.objects.filter(pk=self.items[0].pk).update(priority=3)
+        item = enqueue_application(application, priority=5)
+        self.assertEqual((item.pk, item.priority), (self.items[0].pk, 3))
+
+        item = enqueue_application(application, priority=2)
+        self.assertEqual(item.pk, self.items[0].pk)
+        self.assertEqual(ProcessingQueue.objects.get(pk=item.pk).priority, 2)
+        self.assertEqual(ProcessingQueue.objects.filter(application=application).count(), 1)
+
+
+class AnalysisBatchTests(TestCase):
+    """Lots asynchrones: fichiers enregistrés, traités par le processus de file, synthèse lue en base"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analyzer = trained_analyzer()
+        cls.model = LoadedModel(analyzer, CVWorkerPool(analyzer, max_workers=1), ('test',))
+
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.worker = CVQueueWorker(StaticRegistry(self.model), name='worker-test', batch_size=10,
+                                    sources=[BatchFileQueue(job_profiles=JobProfileCache())])
+
+    def uploads(self):
+        return [
+            SimpleUploadedFile('dev.txt', (TRAINING_CVS['information_technology'] + "2 years of experience").encode()),
+            SimpleUploadedFile('compta.txt', (TRAINING_CVS['accountant'] + "2 years of experience").encode()),
+            SimpleUploadedFile('photo.png', b'image'),
+        ]
+
+    def test_unsupported_files_are_failed_at_upload(self):
+        batch = create_batch('bulk', [SimpleUploadedFile('photo.png', b'image')], {}, ['.txt'])
+
+        self.assertEqual(batch.status, 'completed')
+        row = batch.files.get()
+        self.assertEqual((row.status, row.file.name), ('failed', ''))
+        self.assertEqual(batch_progress(batch)['percent'], 100.0)
+
+    def test_bulk_batch_is_summarized_by_domain(self):
+        batch = create_batch('bulk', self.uploads(), {'top_n': 10}, ['.txt'])
+        self.assertEqual(batch_progress(batch)['pending'], 2)
+
+        self.assertEqual(self.worker.run_once(), 2)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'completed')
+        progress = batch_progress(batch)
+        self.assertEqual((progress['completed'], progress['failed'], progress['eta_seconds']), (2, 1, 0))
+        # Fichiers traités: plus rien de stocké
+        self.assertFalse(batch.files.exclude(file='').exists())
+
+        summary = batch_summary(batch)['summary']
+        self.assertEqual(sorted(summary), ['accountant', 'information_technology'])
+        self.assertEqual(summary['accountant']['top_candidates'][0]['filename'], 'compta.txt')
+
+    def test_job_batch_applies_the_job_filters(self):
+        profile = JobMatchProfile('python developer', '', 'Python, Django', '1-3')
+        batch = create_batch('job', self.uploads(), {
+            'job': profile.fields, 'min_skills_match': 1, 'ranking': 'match', 'top_n': 5
+        }, ['.txt'])
+
+        self.worker.run_once()
+
+        rejected = batch.files.get(filename='compta.txt')
+        self.assertEqual((rejected.result['status'], rejected.result['rejected']), ('rejected', 'skills'))
+        self.assertIsNone(rejected.score)
+
+        ranked = batch_summary(batch)['ranked_candidates']
+        self.assertEqual([candidate['filename'] for candidate in ranked], ['dev.txt'])
+        self.assertEqual(ranked[0]['matched_skills'], ['python', 'django'])
+        self.assertEqual(batch.files.get(filename='dev.txt').score, ranked[0]['job_match_score'])
+
+
+class StreamingTests(SimpleTestCase):
+    """Analyses en lot envoyées en flux (SSE ou NDJSON), classement tenu au fil des résultats"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analyzer = trained_analyzer()
+        cls.model = LoadedModel(analyzer, CVWorkerPool(analyzer, max_workers=1), ('test',))
+
+    def test_event_formats(self):
+        self.assertEqual(format_event('sse', 'progress', {'processed': 1}), b'event: progress\ndata: {"processed": 1}\n\n')
+        self.assertEqual(format_event('ndjson', 'done', {'status': 'réussi'}),
+                         '{"event": "done", "data": {"status": "réussi"}}\n'.encode('utf-8'))
+
+    def test_first_chunk_holds_a_single_file(self):
+        self.assertEqual(list(stream_chunks(list(range(6)), 2)), [[0], [1, 2], [3, 4], [5]])
+        self.assertEqual(list(stream_chunks([], 4)), [])
+
+    def test_streaming_response_is_not_buffered(self):
+        response = streaming_response('ndjson', [('start', {}), ('done', {})])
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), 2)
+
+    def test_running_top_n_matches_top_k(self):
+        scores = [3, 1, 4, 0, 5, 9, 2, 6, 8, 7]
+        ranking = RunningTopN(4, key=lambda item: item['score'])
+        for position, score in enumerate(scores):
+            ranking.push({'position': position, 'score': score})
+        self.assertEqual([item['position'] for item in ranking.items()], list(top_k(scores, 4)))
+
+    def test_running_top_n_keeps_first_on_ties(self):
+        ranking = RunningTopN(2, key=lambda item: item['score'])
+        self.assertTrue(ranking.push({'name': 'a', 'score': 1}))
+        self.assertTrue(ranking.push({'name': 'b', 'score': 1}))
+        self.assertFalse(ranking.push({'name': 'c', 'score': 1}))
+        self.assertTrue(ranking.push({'name': 'd', 'score': 2}))
+        self.assertEqual([item['name'] for item in ranking.items()], ['d', 'a'])
+
+    def test_bulk_events_follow_the_chunks(self):
+        cv_files = [
+            SimpleUploadedFile(f'cv{index}.txt', (TRAINING_CVS[domain] + "2 years of experience").encode())
+            for index, domain in enumerate(['information_technology', 'accountant', 'information_technology'])
+        ]
+        with mock.patch.object(views, 'model_registry', StaticRegistry(self.model)), \
+                self.settings(AI_MODEL_CONFIG=dict(settings.AI_MODEL_CONFIG, STREAM_CHUNK_SIZE=2)):
+            events = list(bulk_analysis_events(cv_files))
+
+        names = [event for event, _ in events]
+        self.assertEqual(names, ['start', 'result', 'top', 'progress', 'result', 'result', 'top', 'progress', 'done'])
+        # Le premier résultat est envoyé après l'analyse d'un seul CV
+        self.assertEqual(events[3][1], {'processed': 1, 'total_files': 3})
+        self.assertEqual(events[6][1]['summary']['information_technology']['count'], 2)
+        self.assertEqual(events[-1][1]['processed_files'], 3)
+
+    def test_bulk_events_without_model(self):
+        with mock.patch.object(views, 'model_registry', StaticRegistry(None)):
+            self.assertEqual([event for event, _ in bulk_analysis_events([])], ['failed'])
+
+
+class RecordingSource(QueueSource):
+    """File de test (AnalysisBatchFile): garde la taille de chaque lot traité"""
+
+    name = 'test'
+    queue_model = AnalysisBatchFile
+
+    def __init__(self):
+        self.batches = []
+
+    def process(self, model, items):
+        self.batches.append(len(items))
+        return {item.pk: None for item in items}
+
+
+class MicroBatchTests(TestCase):
+    """Micro-lots: un lot incomplet est complété pendant au plus max_wait secondes"""
+
+    def setUp(self):
+        self.batch = AnalysisBatch.objects.create(kind='bulk', total_files=3)
+        self.add_file(0)
+        self.source = RecordingSource()
+
+    def add_file(self, position):
+        AnalysisBatchFile.objects.create(batch=self.batch, position=position, filename=f'cv{position}.pdf')
+
+    def worker(self, **options):
+        return CVQueueWorker(StaticRegistry(object()), name='worker-test', batch_size=3, sources=[self.source], **options)
+
+    def arriving_after_first_claim(self):
+        """claim_items réel; deux fichiers arrivent juste après la première réservation"""
+        claim = work_queue.claim_items
+
+        def claim_items(*args, **kwargs):
+            claimed = claim(*args, **kwargs)
+            if not AnalysisBatchFile.objects.filter(position__gt=0).exists():
+                self.add_file(1)
+                self.add_file(2)
+            return claimed
+        return mock.patch.object(work_queue, 'claim_items', side_effect=claim_items)
+
+    def test_batch_is_filled_with_new_arrivals(self):
+        worker = self.worker(max_wait=5)
+        with self.arriving_after_first_claim():
+            self.assertEqual(worker.run_once(), 3)
+
+        self.assertEqual(self.source.batches, [3])
+        self.assertEqual(AnalysisBatchFile.objects.filter(status='completed').count(), 3)
+        stats = worker.metrics.snapshot()
+        self.assertEqual((stats['batches'], stats['items'], stats['mean_batch_size']), (1, 3, 3.0))
+        # Lot complet: pas d'attente jusqu'à max_wait
+        self.assertLess(stats['mean_fill_wait'], 5)
+
+    def test_no_wait_processes_the_batch_at_once(self):
+        worker = self.worker()
+        with self.arriving_after_first_claim():
+            self.assertEqual(worker.run_once(), 1)
+
+        self.assertEqual(self.source.batches, [1])
+        self.assertEqual(AnalysisBatchFile.objects.filter(status='pending').count(), 2)
+
+    def test_metrics_summarize_the_window(self):
+        metrics = BatchMetrics(window=2)
+        self.assertIsNone(metrics.snapshot()['mean_batch_size'])
+        metrics.record(4, 0.5, 2.0, [1.0, 2.0, 3.0, 4.0])
+        metrics.record(2, 0.1, 1.0, [5.0, 6.0])
+        metrics.record(6, 0.3, 3.0, [7.0])
+
+        stats = metrics.snapshot()
+        self.assertEqual((stats['batches'], stats['items']), (3, 12))
+        # Seuls les deux derniers lots sont dans la fenêtre
+        self.assertEqual(stats['mean_batch_size'], 4.0)
+        self.assertEqual(stats['mean_batch_seconds'], 2.0)
+        self.assertEqual(stats['items_per_second'], 2.0)
+        self.assertEqual(stats['latency_max'], 7.0)
+        self.assertEqual(stats['latency_p50'], 4.0)
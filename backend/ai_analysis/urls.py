@@ -16,6 +16,13 @@ urlpatterns = [
     # Analyse de CV spécifique pour un poste
     path('analyze-job-cvs/', views.analyze_job_cvs, name='analyze-job-cvs'),
     
+    # Classement des candidatures d'une offre et candidats similaires (vecteurs persistés)
+    path('jobs/<int:job_id>/ranked-applicants/', views.rank_job_applicants, name='rank-job-applicants'),
+    path('applications/<int:application_id>/similar/', views.similar_candidates, name='similar-candidates'),
+    
+    # Statut d'un lot d'analyse asynchrone (réponse 202 des endpoints d'analyse)
+    path('batches/<uuid:batch_id>/', views.batch_status, name='batch-status'),
+    
     # Statut de l'IA
     path('status/', views.ai_status, name='ai-status'),
 ]
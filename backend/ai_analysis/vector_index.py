@@ -0,0 +1,235 @@
+"""
+Vecteurs TF-IDF persistés des candidatures et index de similarité en mémoire
+Chaque candidature analysée garde son vecteur creux (table ApplicationVector), encodé
+en binaire compact: indices int32 puis valeurs float32 (8 octets par terme présent).
+Les vecteurs d'une offre ou d'un domaine sont chargés une fois dans une matrice creuse
+normalisée; classer les candidats ou chercher des profils similaires se fait alors
+par un seul produit creux, sans relire les fichiers.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from django.db.models import Count, Max
+from sklearn.preprocessing import normalize
+
+from .models import ApplicationVector
+from .ranking import top_k
+
+logger = logging.getLogger(__name__)
+
+# Portées d'un index de similarité
+INDEX_SCOPES = ('job', 'domain')
+
+_INDEX_DTYPE = np.dtype('<i4')
+_VALUE_DTYPE = np.dtype('<f4')
+
+
+def pack_vector(row) -> bytes:
+    """Encode une ligne creuse (1 x n) en indices int32 suivis des valeurs float32"""
+    row = sp.csr_matrix(row)
+    row.sort_indices()
+    return row.indices.astype(_INDEX_DTYPE).tobytes() + row.data.astype(_VALUE_DTYPE).tobytes()
+
+
+def unpack_vectors(blobs: Sequence[bytes], n_features: int) -> sp.csr_matrix:
+    """Matrice creuse float32 (une ligne par vecteur encodé) construite en un seul passage"""
+    blobs = [bytes(blob) for blob in blobs]
+    nnz = np.array([len(blob) // 8 for blob in blobs], dtype=np.int64)
+    indptr = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum(nnz, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    data = np.empty(indptr[-1], dtype=np.float32)
+    for position, (blob, count) in enumerate(zip(blobs, nnz)):
+        start, end = indptr[position], indptr[position + 1]
+        indices[start:end] = np.frombuffer(blob, dtype=_INDEX_DTYPE, count=count)
+        data[start:end] = np.frombuffer(blob, dtype=_VALUE_DTYPE, count=count, offset=count * 4)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(blobs), n_features))
+
+
+def store_application_vectors(model, entries: Iterable[Tuple[int, object, str]]) -> int:
+    """
+    Enregistre un lot de (id de candidature, ligne TF-IDF 1 x n, domaine) calculés par le modèle donné
+    Le vecteur existant d'une candidature est remplacé; retourne le nombre de vecteurs écrits
+    """
+    entries = list(entries)
+    if not entries:
+        return 0
+
+    # Une seule requête d'insertion; le vecteur existant d'une candidature est mis à jour (upsert)
+    ApplicationVector.objects.bulk_create(
+        [
+            ApplicationVector(
+                application_id=application_id,
+                model_version=model.model_version,
+                domain=domain or '',
+                n_features=vector.shape[1],
+                data=pack_vector(vector),
+            )
+            for application_id, vector, domain in entries
+        ],
+        update_conflicts=True,
+        unique_fields=['application'],
+        update_fields=['model_version', 'domain', 'n_features', 'data', 'updated_at']
+    )
+    return len(entries)
+
+
+def _application_source(application):
+    """Chemin du CV d'une candidature, ou son contenu si le stockage n'a pas de chemin local"""
+    try:
+        return application.cv_file.path
+    except NotImplementedError:
+        with application.cv_file.open('rb') as cv_file:
+            return cv_file.read()
+
+
+def index_applications(model, applications: Sequence) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Extrait, analyse et indexe les CV d'une liste de candidatures avec le pool du modèle
+    Retourne (résultats réussis avec 'application_id', 'features' et 'vector', erreurs par candidature)
+    Jetons et ligne TF-IDF sont ceux de l'analyse: ni nouvelle tokenisation ni nouvelle vectorisation
+    """
+    items = [(_application_source(application), application.cv_file.name) for application in applications]
+    processed = model.pool.process_files(items, keep_features=True)
+
+    successes = []
+    errors = []
+    for application, result in zip(applications, processed):
+        result['application_id'] = application.id
+        if result['status'] == 'success':
+            successes.append(result)
+        else:
+            errors.append({'application_id': application.id, 'filename': result['filename'], 'error': result['error']})
+
+    store_application_vectors(model, [
+        (result['application_id'], result['vector'], result['analysis']['domain'])
+        for result in successes
+    ])
+    return successes, errors
+
+
+class CandidateIndex:
+    """
+    Vecteurs normalisés d'un ensemble de candidatures (une ligne par candidature)
+    Similarité cosinus = produit scalaire des lignes normalisées
+    """
+
+    def __init__(self, application_ids: Sequence[int], matrix, revision=None):
+        self.application_ids = np.asarray(application_ids, dtype=np.int64)
+        self.matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        # Offre ou domaine sans candidature indexée: index vide, rien à normaliser
+        if self.matrix.shape[0]:
+            self.matrix = normalize(self.matrix, norm='l2', copy=False)
+        self.revision = revision
+        self._positions = {int(application_id): row for row, application_id in enumerate(self.application_ids)}
+
+    def __len__(self):
+        return len(self.application_ids)
+
+    def __contains__(self, application_id) -> bool:
+        return int(application_id) in self._positions
+
+    @property
+    def nbytes(self) -> int:
+        matrix = self.matrix
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + self.application_ids.nbytes
+
+    def rank(self, query, top_n: Optional[int] = 10, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """[(id de candidature, similarité)] des top_n lignes les plus proches d'un vecteur requête"""
+        if not len(self):
+            return []
+        query = normalize(sp.csr_matrix(query, dtype=np.float32), norm='l2', copy=False)
+        scores = np.asarray((self.matrix @ query.T).toarray()[:, 0], dtype=np.float64)
+        if exclude is not None and exclude in self:
+            scores[self._positions[int(exclude)]] = -np.inf
+            top_n = min(top_n, len(self) - 1) if top_n is not None else len(self) - 1
+        return [
+            (int(self.application_ids[row]), float(scores[row]))
+            for row in top_k(scores, top_n)
+        ]
+
+    def similar_to(self, application_id: int, top_n: Optional[int] = 10) -> List[Tuple[int, float]]:
+        """Candidatures les plus proches d'une candidature de l'index (elle-même exclue)"""
+        row = self._positions[int(application_id)]
+        return self.rank(self.matrix[row], top_n, exclude=application_id)
+
+
+class CandidateIndexCache:
+    """
+    Index de similarité en mémoire du processus, par (portée, clé, version du modèle)
+    Révision d'un index: nombre de vecteurs et dernière modification, vérifiés par une
+    seule agrégation à chaque demande; l'index est rechargé dès qu'elle change
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple, CandidateIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _queryset(scope: str, key, model_version: str):
+        vectors = ApplicationVector.objects.filter(model_version=model_version)
+        if scope == 'job':
+            return vectors.filter(application__job_id=key)
+        if scope == 'domain':
+            return vectors.filter(domain=key)
+        raise ValueError(f"Portée d'index inconnue: {scope} (choix: {', '.join(INDEX_SCOPES)})")
+
+    def get(self, scope: str, key, model_version: str) -> CandidateIndex:
+        """Index des vecteurs d'une offre (scope='job') ou d'un domaine (scope='domain')"""
+        queryset = self._queryset(scope, key, model_version)
+        revision = tuple(queryset.aggregate(count=Count('id'), updated_at=Max('updated_at')).values())
+        cache_key = (scope, key, model_version)
+
+        with self._lock:
+            index = self._entries.get(cache_key)
+            if index is not None and index.revision == revision:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        rows = list(queryset.order_by('application_id').values_list('application_id', 'n_features', 'data'))
+        n_features = rows[0][1] if rows else 0
+        index = CandidateIndex(
+            [row[0] for row in rows],
+            unpack_vectors([row[2] for row in rows], n_features),
+            revision=revision
+        )
+        with self._lock:
+            self._entries[cache_key] = index
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"Index de similarité {scope}={key} chargé ({len(index)} candidatures)")
+        return index
+
+    def for_job(self, job_id: int, model_version: str) -> CandidateIndex:
+        return self.get('job', int(job_id), model_version)
+
+    def for_domain(self, domain: str, model_version: str) -> CandidateIndex:
+        return self.get('domain', domain, model_version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = list(self._entries.values())
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'entries': len(entries),
+            'vectors': sum(len(index) for index in entries),
+            'bytes': sum(index.nbytes for index in entries),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None
+        }
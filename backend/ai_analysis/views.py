@@ -1,5 +1,3 @@
-from django.shortcuts import render
-
 """
 API Views pour l'analyse IA des CV
 Endpoints pour upload et filtrage automatique des CV
@@ -8,29 +6,433 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FileUploadParser
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
 from rest_framework import status
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.conf import settings
+from django.urls import reverse
 import os
-import tempfile
-from .cv_processor import CVAnalyzer
+import time
+import scipy.sparse as sp
+from .cv_processor import upload_source
+from .cache import hash_uploaded_file
+from .featurizer import featurize, vectorize
+from .ranking import RANKING_MODES, cosine_similarities, top_k
+from .vector_index import INDEX_SCOPES
+from .services import (
+    candidate_indexes, cv_cache, cv_processor, extraction_sandbox, job_profiles, model_registry
+)
+from .batches import batch_progress, batch_summary, create_batch, file_result
+from .streaming import STREAM_FORMATS, RunningTopN, stream_chunks, streaming_response
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Instance globale de l'analyseur
-analyzer = CVAnalyzer()
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt']
+
+
+def wants_async(request, file_count):
+    """
+    Traitement en arrière-plan demandé (async=true ou en-tête Prefer: respond-async),
+    ou imposé au-delà de ASYNC_MIN_FILES fichiers (0 = seulement sur demande)
+    """
+    if str(request.data.get('async', '')).lower() in ('1', 'true', 'yes'):
+        return True
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    min_files = settings.AI_MODEL_CONFIG.get('ASYNC_MIN_FILES', 0)
+    return bool(min_files) and file_count >= min_files
+
+
+def batch_accepted(request, batch):
+    """Réponse 202 d'un lot mis en file, avec l'adresse de son statut"""
+    status_url = request.build_absolute_uri(reverse('ai_analysis:batch-status', args=[batch.id]))
+    return Response({
+        'batch_id': str(batch.id),
+        'status': batch.status,
+        'total_files': batch.total_files,
+        'status_url': status_url
+    }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+
+
+def _lookup_uploaded_files(cv_files, cache_version):
+    """
+    Vérifie le format et l'empreinte de chaque fichier uploadé puis interroge le cache
+    Retourne (résultats par position, empreintes, positions restant à traiter)
+    """
+    results = [None] * len(cv_files)
+    file_hashes = {}
+
+    for index, cv_file in enumerate(cv_files):
+        file_extension = os.path.splitext(cv_file.name)[1].lower()
+        if file_extension not in SUPPORTED_EXTENSIONS:
+            results[index] = {
+                'filename': cv_file.name,
+                'status': 'error',
+                'error': 'Format de fichier non supporté'
+            }
+            continue
+        file_hashes[index] = hash_uploaded_file(cv_file)
+
+    cached = cv_cache.get_many(file_hashes.values(), cache_version)
+
+    pending_indexes = []
+    for index, file_hash in file_hashes.items():
+        cv_file = cv_files[index]
+        if file_hash in cached:
+            entry = cached[file_hash]
+            analysis = dict(entry['analysis'], filename=cv_file.name)
+            results[index] = {
+                'filename': cv_file.name,
+                'status': 'success',
+                'text': entry['text'],
+                'analysis': analysis,
+                'cached': True
+            }
+            continue
+        pending_indexes.append(index)
+
+    return results, file_hashes, pending_indexes
+
+
+def _split_results(results):
+    """Sépare les résultats réussis des erreurs par fichier"""
+    successes = []
+    errors = []
+    for result in results:
+        if result['status'] == 'success':
+            successes.append(result)
+        else:
+            errors.append({'filename': result['filename'], 'error': result['error']})
+    return successes, errors
+
+
+def analyze_uploaded_files(model, cv_files):
+    """
+    Extrait et analyse une liste de fichiers uploadés avec le pool de processus du modèle
+    Les fichiers déjà analysés avec la même version du modèle sont servis par le cache
+    Retourne (résultats réussis, erreurs par fichier) dans l'ordre d'upload
+    """
+    cache_version = model.cache_version
+    results, file_hashes, pending_indexes = _lookup_uploaded_files(cv_files, cache_version)
+
+    # Lecture directe depuis la mémoire ou le fichier temporaire de Django
+    items = [(upload_source(cv_files[index]), cv_files[index].name) for index in pending_indexes]
+    processed = model.pool.process_files(items)
+
+    new_entries = []
+    for index, result in zip(pending_indexes, processed):
+        results[index] = result
+        if result['status'] == 'success':
+            analysis = {key: value for key, value in result['analysis'].items() if key != 'filename'}
+            new_entries.append((file_hashes[index], result['text'], analysis))
+    cv_cache.set_many(new_entries, cache_version)
+
+    return _split_results(results)
+
+
+def extract_uploaded_files(model, cv_files):
+    """
+    Extrait seulement le texte des fichiers uploadés, sans classification
+    Les résultats du cache conservent leur analyse; les autres portent l'empreinte
+    du fichier pour que classify_extracted_files puisse alimenter le cache
+    Retourne (résultats réussis, erreurs par fichier) dans l'ordre d'upload
+    """
+    results, file_hashes, pending_indexes = _lookup_uploaded_files(cv_files, model.cache_version)
+
+    items = [(upload_source(cv_files[index]), cv_files[index].name) for index in pending_indexes]
+    extracted = model.pool.extract_files(items)
+
+    for index, result in zip(pending_indexes, extracted):
+        if result['status'] == 'success':
+            result['file_hash'] = file_hashes[index]
+        results[index] = result
+
+    return _split_results(results)
+
+
+def classify_extracted_files(model, extracted):
+    """
+    Classifie les CV extraits qui n'ont pas encore d'analyse et enregistre le cache
+    Les jetons du préfiltre ('features') sont envoyés au pool, qui renvoie la ligne TF-IDF
+    de chaque CV ('vector') avec son analyse
+    Retourne (résultats analysés, erreurs par fichier) dans l'ordre fourni
+    """
+    cache_version = model.cache_version
+    pending = [result for result in extracted if 'analysis' not in result]
+    outcomes = model.pool.analyze_features([result['features'] for result in pending])
+
+    failed = set()
+    errors = []
+    new_entries = []
+    for result, outcome in zip(pending, outcomes):
+        if outcome['status'] == 'error':
+            failed.add(id(result))
+            errors.append({'filename': result['filename'], 'error': outcome['error']})
+            continue
+        new_entries.append((result.pop('file_hash'), result['text'], outcome['analysis']))
+        result['analysis'] = dict(outcome['analysis'], filename=result['filename'])
+        result['vector'] = outcome['vector']
+    cv_cache.set_many(new_entries, cache_version)
+
+    return [result for result in extracted if id(result) not in failed], errors
+
+
+def score_job_files(model, profile, cv_files, min_skills_match):
+    """
+    Pipeline en cascade d'analyse pour un poste sur une liste de fichiers uploadés:
+    extraction, filtres d'expérience et de compétences requises, classification des seuls
+    candidats retenus, puis score de correspondance et similarité avec le poste
+    Retourne (analyses, similarités, erreurs par fichier, statistiques des étapes)
+    """
+    pipeline = []
+
+    # Étape 1: extraction du texte (le cache fournit aussi les analyses déjà connues)
+    stage_start = time.perf_counter()
+    extracted, errors = extract_uploaded_files(model, cv_files)
+    pipeline.append({
+        'stage': 'extraction',
+        'input': len(cv_files),
+        'output': len(extracted),
+        'rejected': len(cv_files) - len(extracted),
+        'seconds': round(time.perf_counter() - stage_start, 4)
+    })
+
+    # Étape 2: filtres peu coûteux (expérience par expressions régulières, compétences requises)
+    stage_start = time.perf_counter()
+    rejected_experience = 0
+    rejected_skills = 0
+    candidates = []
+
+    for result in extracted:
+        # Tokenisation unique, partagée par les filtres et le score de correspondance
+        features = featurize(result['text'])
+        if 'analysis' in result:
+            candidate_experience = result['analysis']['experience_years']
+        else:
+            candidate_experience = int(
+                cv_processor.extract_profile(result['text'], features.text_lower)['experience_years']
+            )
+
+        if not profile.accepts_experience(candidate_experience):
+            rejected_experience += 1
+            continue
+
+        matched_skills = profile.match_skills(features)
+        if not profile.accepts_skills(matched_skills, min_skills_match):
+            rejected_skills += 1
+            continue
+
+        result['matched_skills'] = matched_skills
+        result['features'] = features
+        candidates.append(result)
+
+    pipeline.append({
+        'stage': 'prefilter',
+        'input': len(extracted),
+        'output': len(candidates),
+        'rejected_experience': rejected_experience,
+        'rejected_skills': rejected_skills,
+        'seconds': round(time.perf_counter() - stage_start, 4)
+    })
+
+    # Étape 3: classification par les modèles, seulement pour les candidats retenus
+    stage_start = time.perf_counter()
+    classified, classification_errors = classify_extracted_files(model, candidates)
+    errors.extend(classification_errors)
+    pipeline.append({
+        'stage': 'classification',
+        'input': len(candidates),
+        'output': len(classified),
+        'cached': sum(1 for result in candidates if result.get('cached')),
+        'seconds': round(time.perf_counter() - stage_start, 4)
+    })
+
+    # Étape 4: score de correspondance avec le poste
+    stage_start = time.perf_counter()
+    # Similarité textuelle: un produit creux entre les CV retenus et le vecteur du poste
+    # Lignes TF-IDF issues de la classification; seuls les CV servis par le cache sont vectorisés ici
+    similarities = []
+    if classified:
+        from_cache = [result for result in classified if 'vector' not in result]
+        if from_cache:
+            cached_vectors = sp.csr_matrix(vectorize(model.analyzer.vectorizer, [result['features'] for result in from_cache]))
+            for row, result in enumerate(from_cache):
+                result['vector'] = cached_vectors[row]
+        cv_vectors = sp.vstack([result['vector'] for result in classified], format='csr')
+        similarities = cosine_similarities(cv_vectors, profile.vector(model.analyzer))[:, 0]
+    
+    analyses = []
+    for result, similarity in zip(classified, similarities):
+        analysis = result['analysis']
+        analysis['matched_skills'] = result['matched_skills']
+        analysis['job_match_score'] = profile.score(
+            result['features'], analysis['experience_years'], result['matched_skills']
+        )
+        analysis['similarity_score'] = round(float(similarity) * 100, 2)
+        analyses.append(analysis)
+    pipeline.append({
+        'stage': 'scoring',
+        'input': len(classified),
+        'output': len(analyses),
+        'job_profile_cache': job_profiles.stats(),
+        'seconds': round(time.perf_counter() - stage_start, 4)
+    })
+    return analyses, similarities, errors, pipeline
+
+
+def bulk_candidate(analysis):
+    """Candidat au format attendu par le frontend pour l'analyse en lot"""
+    return {
+        'status': 'success',
+        'filename': analysis['filename'],
+        'domain': analysis['domain'],
+        'confidence': analysis['domain_confidence'],
+        'quality_score': analysis['quality_score'],
+        'skills': analysis['skills'],
+        'experience_years': analysis['experience_years']
+    }
+
+
+def requested_stream(request):
+    """Format de flux demandé (paramètre stream), ou None pour une réponse JSON unique"""
+    stream_format = request.data.get('stream') or request.query_params.get('stream')
+    return stream_format.lower() if stream_format else None
+
+
+def stream_chunk_size(model):
+    """Fichiers analysés par tranche en flux (STREAM_CHUNK_SIZE, 0 = un fichier par processus du pool)"""
+    chunk_size = settings.AI_MODEL_CONFIG.get('STREAM_CHUNK_SIZE', 0)
+    return chunk_size or max(model.pool.max_workers, model.pool.min_parallel_files)
+
+
+def merge_pipeline(total, pipeline):
+    """Cumule les statistiques des étapes d'une tranche dans celles de tout le flux"""
+    for totals, stage in zip(total, pipeline):
+        for key, value in stage.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = round(totals.get(key, 0) + value, 4)
+            else:
+                totals[key] = value
+    total.extend(dict(stage) for stage in pipeline[len(total):])
+    return total
+
+
+def bulk_analysis_events(cv_files):
+    """
+    Événements du flux de l'analyse en lot
+    start, puis par tranche: result (par CV), file_error (par fichier), top (domaines dont
+    le classement a changé), progress; done à la fin, failed si l'analyse est interrompue
+    """
+    start = time.perf_counter()
+    try:
+        with model_registry.acquire() as model:
+            if model is None:
+                yield 'failed', {'error': 'L\'IA n\'est pas encore entraînée.'}
+                return
+            yield 'start', {'total_files': len(cv_files), 'model_version': model.model_version}
+
+            counts = {}
+            rankings = {}
+            processed = 0
+            analyzed = 0
+            failed = 0
+            for chunk in stream_chunks(cv_files, stream_chunk_size(model)):
+                results, errors = analyze_uploaded_files(model, chunk)
+                changed = set()
+                for result in results:
+                    candidate = bulk_candidate(result['analysis'])
+                    yield 'result', candidate
+                    domain_name = candidate['domain']
+                    counts[domain_name] = counts.get(domain_name, 0) + 1
+                    ranking = rankings.setdefault(domain_name, RunningTopN(10, key=lambda c: c['quality_score']))
+                    ranking.push(candidate)
+                    changed.add(domain_name)
+                for error in errors:
+                    yield 'file_error', error
+
+                processed += len(chunk)
+                analyzed += len(results)
+                failed += len(errors)
+                if changed:
+                    yield 'top', {'summary': {
+                        domain_name: {'count': counts[domain_name], 'top_candidates': rankings[domain_name].items()}
+                        for domain_name in sorted(changed)
+                    }}
+                yield 'progress', {'processed': processed, 'total_files': len(cv_files)}
+
+            yield 'done', {
+                'status': 'success',
+                'total_files': len(cv_files),
+                'processed_files': analyzed,
+                'failed_files': failed,
+                'seconds': round(time.perf_counter() - start, 4)
+            }
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse en lot (flux): {e}")
+        yield 'failed', {'error': f'Erreur lors de l\'analyse: {str(e)}'}
+
+
+def job_analysis_events(cv_files, profile, min_skills_match, ranking, top_n):
+    """
+    Événements du flux de l'analyse pour un poste
+    start, puis par tranche: result (par CV retenu et classé), file_error (par fichier),
+    top (top_n courant, s'il a changé), progress; done avec les statistiques des étapes
+    """
+    start = time.perf_counter()
+    score_key = 'similarity_score' if ranking == 'similarity' else 'job_match_score'
+    try:
+        with model_registry.acquire() as model:
+            if model is None:
+                yield 'failed', {'error': 'L\'IA n\'est pas encore entraînée.'}
+                return
+            yield 'start', {
+                'total_files': len(cv_files),
+                'model_version': model.model_version,
+                'job_info': {
+                    'title': profile.title,
+                    'company': profile.company,
+                    'required_skills': profile.skills_keywords
+                },
+                'ranking': ranking,
+                'top_n': top_n
+            }
+
+            ranked = RunningTopN(top_n, key=lambda analysis: analysis[score_key])
+            pipeline = []
+            processed = 0
+            analyzed = 0
+            failed = 0
+            for chunk in stream_chunks(cv_files, stream_chunk_size(model)):
+                analyses, _, errors, chunk_pipeline = score_job_files(model, profile, chunk, min_skills_match)
+                merge_pipeline(pipeline, chunk_pipeline)
+                changed = False
+                for analysis in analyses:
+                    yield 'result', analysis
+                    changed = ranked.push(analysis) or changed
+                for error in errors:
+                    yield 'file_error', error
+
+                processed += len(chunk)
+                analyzed += len(analyses)
+                failed += len(errors)
+                if changed:
+                    yield 'top', {'ranked_candidates': ranked.items()}
+                yield 'progress', {'processed': processed, 'total_files': len(cv_files), 'analyzed': analyzed}
+
+            yield 'done', {
+                'total_files': len(cv_files),
+                'processed_files': analyzed,
+                'failed_files': failed,
+                'pipeline': pipeline,
+                'seconds': round(time.perf_counter() - start, 4)
+            }
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse des CV pour le poste (flux): {e}")
+        yield 'failed', {'error': f'Erreur lors de l\'analyse: {str(e)}'}
 
-# Charger les modèles pré-entraînés au démarrage
-try:
-    models_path = "C:/Users/Me/Desktop/RH/ai-model"
-    if os.path.exists(models_path):
-        analyzer.load_models(models_path)
-        logger.info("✅ Modèles IA chargés avec succès")
-    else:
-        logger.warning("⚠️ Modèles IA non trouvés, utilisez l'entraînement d'abord")
-except Exception as e:
-    logger.error(f"❌ Erreur lors du chargement des modèles: {e}")
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -62,52 +464,60 @@ def upload_and_analyze_cv(request):
                 'message': f'Formats acceptés: {", ".join(allowed_extensions)}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Sauvegarder temporairement le fichier
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            for chunk in cv_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-        
-        try:
-            # Extraire le texte du CV
-            text = analyzer.processor.extract_text(temp_file_path)
-            
-            if not text:
-                return Response({
-                    'status': 'error',
-                    'filename': cv_file.name,
-                    'error': 'Impossible d\'extraire le texte du CV',
-                    'message': 'Le fichier semble être vide ou corrompu'
-                }, status=status.HTTP_400_BAD_REQUEST)
+        # Version du modèle prise pour toute la requête (un remplacement à chaud ne l'affecte pas)
+        with model_registry.acquire() as model:
+            # Servir depuis le cache si ce fichier a déjà été analysé avec ce modèle
+            file_hash = hash_uploaded_file(cv_file)
+            cached = cv_cache.get(file_hash, model.cache_version) if model is not None else None
             
-            # Analyser le CV avec l'IA
-            if analyzer.is_trained:
-                analysis = analyzer.analyze_cv(text)
-                
-                return Response({
-                    'status': 'success',
-                    'filename': cv_file.name,
-                    'domain': analysis['domain'],
-                    'confidence': analysis['domain_confidence'],
-                    'quality_score': analysis['quality_score'],
-                    'skills': analysis['skills'],
-                    'skills_count': analysis['skills_count'],
-                    'experience_years': analysis['experience_years'],
-                    'word_count': analysis['word_count'],
-                    'text_preview': text[:500] + '...' if len(text) > 500 else text
-                })
+            if cached:
+                text = cached['text']
+                analysis = cached['analysis']
             else:
-                return Response({
-                    'status': 'error',
-                    'filename': cv_file.name,
-                    'error': 'L\'IA n\'est pas encore entraînée. Veuillez entraîner les modèles d\'abord.',
-                    'message': 'Les modèles d\'IA doivent être entraînés avant l\'analyse'
-                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                # Extraire le texte du CV directement depuis l'upload (isolé si le bac à sable est actif)
+                extraction_error = 'Impossible d\'extraire le texte du CV'
+                if extraction_sandbox is not None:
+                    extracted = extraction_sandbox.extract_files([(upload_source(cv_file), cv_file.name)])[0]
+                    text = extracted.get('text')
+                    extraction_error = extracted.get('error', extraction_error)
+                else:
+                    text = cv_processor.extract_text_from_upload(cv_file)
+                
+                if not text:
+                    return Response({
+                        'status': 'error',
+                        'filename': cv_file.name,
+                        'error': extraction_error,
+                        'message': 'Le fichier semble être vide ou corrompu'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                if model is None:
+                    return Response({
+                        'status': 'error',
+                        'filename': cv_file.name,
+                        'error': 'L\'IA n\'est pas encore entraînée. Veuillez entraîner les modèles d\'abord.',
+                        'message': 'Les modèles d\'IA doivent être entraînés avant l\'analyse'
+                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
                 
-        finally:
-            # Nettoyer le fichier temporaire
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+                # Analyser le CV avec l'IA
+                analysis = model.analyzer.analyze_cv(text)
+                cv_cache.set(file_hash, text, analysis, model.cache_version)
+        
+        return Response({
+            'status': 'success',
+            'filename': cv_file.name,
+            'domain': analysis['domain'],
+            'confidence': analysis['domain_confidence'],
+            'quality_score': analysis['quality_score'],
+            'skills': analysis['skills'],
+            'skills_count': analysis['skills_count'],
+            'experience_years': analysis['experience_years'],
+            'extracted_experience': analysis['extracted_experience'],
+            'extracted_education': analysis['extracted_education'],
+            'word_count': analysis['word_count'],
+            'model_version': analysis['model_version'],
+            'text_preview': text[:500] + '...' if len(text) > 500 else text
+        })
         
     except Exception as e:
         logger.error(f"Erreur lors de l'analyse du CV: {e}")
@@ -123,112 +533,92 @@ def upload_and_analyze_cv(request):
 def bulk_cv_analysis(request):
     """
     Analyse en lot de plusieurs CV et filtrage par domaine
+    stream=sse ou stream=ndjson: chaque CV est envoyé dès son analyse (bulk_analysis_events)
     """
     try:
-        if not analyzer.is_trained:
-            return Response({
-                'error': 'L\'IA n\'est pas encore entraînée.'
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # Version du modèle prise pour toute la requête (un remplacement à chaud ne l'affecte pas)
+        with model_registry.acquire() as model:
+            if model is None:
+                return Response({
+                    'error': 'L\'IA n\'est pas encore entraînée.'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
-        # Récupérer les paramètres
-        domain = request.data.get('domain', 'information_technology')
-        top_n = int(request.data.get('top_n', 10))
+            # Récupérer les paramètres
+            domain = request.data.get('domain', 'information_technology')
+            top_n = int(request.data.get('top_n', 10))
         
-        if 'cv_files' not in request.FILES:
-            return Response({
-                'error': 'Aucun fichier CV fourni'
-            }, status=status.HTTP_400_BAD_REQUEST)
+            if 'cv_files' not in request.FILES:
+                return Response({
+                    'error': 'Aucun fichier CV fourni'
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        cv_files = request.FILES.getlist('cv_files')
+            cv_files = request.FILES.getlist('cv_files')
         
-        if len(cv_files) == 0:
-            return Response({
-                'error': 'Liste de fichiers vide'
-            }, status=status.HTTP_400_BAD_REQUEST)
+            if len(cv_files) == 0:
+                return Response({
+                    'error': 'Liste de fichiers vide'
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        analyses = []
+            # Résultats envoyés au fil de l'analyse (stream=sse ou stream=ndjson)
+            stream_format = requested_stream(request)
+            if stream_format not in (None, *STREAM_FORMATS):
+                return Response({
+                    'error': f'Format de flux inconnu: {stream_format} (choix: {", ".join(STREAM_FORMATS)})'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if stream_format:
+                return streaming_response(stream_format, bulk_analysis_events(cv_files))
+
+            # Gros lots: fichiers enregistrés et analysés par run_cv_workers, réponse 202
+            if wants_async(request, len(cv_files)):
+                batch = create_batch(
+                    'bulk', cv_files, {'domain': domain, 'top_n': top_n}, SUPPORTED_EXTENSIONS, user=request.user
+                )
+                return batch_accepted(request, batch)
+
+            # Extraction et analyse parallèles, dans l'ordre d'upload
+            results, errors = analyze_uploaded_files(model, cv_files)
+            analyses = [result['analysis'] for result in results]
+
+            if not analyses:
+                return Response({
+                    'error': 'Aucun CV n\'a pu être analysé',
+                    'errors': errors
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        for cv_file in cv_files:
-            try:
-                # Vérifier le format
-                file_extension = os.path.splitext(cv_file.name)[1].lower()
-                if file_extension not in ['.pdf', '.docx', '.doc', '.txt']:
-                    continue
-                
-                # Traiter le fichier
-                with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-                    for chunk in cv_file.chunks():
-                        temp_file.write(chunk)
-                    temp_file_path = temp_file.name
-                
-                try:
-                    text = analyzer.processor.extract_text(temp_file_path)
-                    if text:
-                        analysis = analyzer.analyze_cv(text)
-                        analysis['filename'] = cv_file.name
-                        analyses.append(analysis)
-                finally:
-                    if os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-                        
-            except Exception as e:
-                logger.error(f"Erreur avec le fichier {cv_file.name}: {e}")
-                continue
+            # Candidats au format attendu par le frontend, envoyés une seule fois dans results
+            candidates = [bulk_candidate(analysis) for analysis in analyses]
+
+            # Organiser les résultats par domaine: les meilleurs candidats sont désignés
+            # par leur position dans results
+            domain_summary = {}
+            for index, candidate in enumerate(candidates):
+                domain_name = candidate['domain']
+                if domain_name not in domain_summary:
+                    domain_summary[domain_name] = {
+                        'count': 0,
+                        'top_results': []
+                    }
+                domain_summary[domain_name]['count'] += 1
+                domain_summary[domain_name]['top_results'].append(index)
         
-        if not analyses:
-            return Response({
-                'error': 'Aucun CV n\'a pu être analysé'
-            }, status=status.HTTP_400_BAD_REQUEST)
+            # Trier les candidats par score de qualité pour chaque domaine
+            for domain_name in domain_summary:
+                domain_summary[domain_name]['top_results'].sort(
+                    key=lambda index: candidates[index]['quality_score'],
+                    reverse=True
+                )
+                # Garder seulement les top 10
+                domain_summary[domain_name]['top_results'] = domain_summary[domain_name]['top_results'][:10]
         
-        # Organiser les résultats par domaine
-        domain_summary = {}
-        for analysis in analyses:
-            domain_name = analysis['domain']
-            if domain_name not in domain_summary:
-                domain_summary[domain_name] = {
-                    'count': 0,
-                    'top_candidates': []
-                }
-            domain_summary[domain_name]['count'] += 1
-            
-            # Ajouter le candidat avec le format attendu par le frontend
-            candidate = {
+            return Response({
                 'status': 'success',
-                'filename': analysis['filename'],
-                'domain': analysis['domain'],
-                'confidence': analysis['domain_confidence'],
-                'quality_score': analysis['quality_score'],
-                'skills': analysis['skills'],
-                'experience_years': analysis['experience_years']
-            }
-            domain_summary[domain_name]['top_candidates'].append(candidate)
-        
-        # Trier les candidats par score de qualité pour chaque domaine
-        for domain_name in domain_summary:
-            domain_summary[domain_name]['top_candidates'].sort(
-                key=lambda x: x['quality_score'], 
-                reverse=True
-            )
-            # Garder seulement les top 10
-            domain_summary[domain_name]['top_candidates'] = domain_summary[domain_name]['top_candidates'][:10]
-        
-        return Response({
-            'status': 'success',
-            'total_files': len(cv_files),
-            'processed_files': len(analyses),
-            'results': [
-                {
-                    'status': 'success',
-                    'filename': analysis['filename'],
-                    'domain': analysis['domain'],
-                    'confidence': analysis['domain_confidence'],
-                    'quality_score': analysis['quality_score'],
-                    'skills': analysis['skills'],
-                    'experience_years': analysis['experience_years']
-                } for analysis in analyses
-            ],
-            'summary': domain_summary
-        })
+                'total_files': len(cv_files),
+                'processed_files': len(analyses),
+                'model_version': model.model_version,
+                'results': candidates,
+                'errors': errors,
+                'summary': domain_summary
+            })
         
     except Exception as e:
         logger.error(f"Erreur lors de l'analyse en lot: {e}")
@@ -249,11 +639,17 @@ def ai_status(request):
             'marketing', 'hr', 'consultant', 'designer', 'chef'
         ]
         
+        # Le statut ne déclenche pas le chargement: il indique seulement si les modèles sont prêts
+        model = model_registry.current
         return Response({
-            'ai_trained': analyzer.is_trained,
+            'ai_trained': model is not None,
+            'models_ready': model_registry.ready,
+            'models': model_registry.status(),
             'available_domains': domains_available,
             'supported_formats': ['.pdf', '.docx', '.doc', '.txt'],
-            'status': 'IA opérationnelle' if analyzer.is_trained else 'IA non entraînée'
+            'model_version': model.model_version if model else None,
+            'cache': cv_cache.stats(),
+            'status': 'IA opérationnelle' if model is not None else 'IA non entraînée'
         })
         
     except Exception as e:
@@ -268,102 +664,113 @@ def ai_status(request):
 def analyze_job_cvs(request):
     """
     Analyse de CV spécifiquement pour un poste donné
+    Pipeline en cascade: extraction, filtres d'expérience et de compétences requises,
+    classification des seuls candidats retenus, puis score de correspondance
+    ranking: 'score' (score de correspondance, par défaut) ou 'similarity' (similarité
+    cosinus TF-IDF entre le CV et le poste); top_n: nombre de candidats classés
+    Avec un job_id existant, le profil compilé de l'offre (JobMatchProfile) est utilisé;
+    sinon il est construit à partir des champs du poste envoyés
+    stream=sse ou stream=ndjson: chaque CV est envoyé dès son score, avec le top_n courant
     """
     try:
-        if not analyzer.is_trained:
-            return Response({
-                'error': 'L\'IA n\'est pas encore entraînée.'
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # Version du modèle prise pour toute la requête (un remplacement à chaud ne l'affecte pas)
+        with model_registry.acquire() as model:
+            if model is None:
+                return Response({
+                    'error': 'L\'IA n\'est pas encore entraînée.'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         
-        # Récupérer les informations du poste
-        job_id = request.data.get('job_id')
-        job_title = request.data.get('job_title', '')
-        job_description = request.data.get('job_description', '')
-        job_requirements = request.data.get('job_requirements', '')
-        required_skills = request.data.get('required_skills', '')
-        experience_required = request.data.get('experience_required', '')
+            # Récupérer les informations du poste
+            job_id = request.data.get('job_id')
+            job_title = request.data.get('job_title', '')
+            job_description = request.data.get('job_description', '')
+            job_requirements = request.data.get('job_requirements', '')
+            required_skills = request.data.get('required_skills', '')
+            experience_required = request.data.get('experience_required', '')
         
-        if 'files' not in request.FILES:
-            return Response({
-                'error': 'Aucun fichier CV fourni'
-            }, status=status.HTTP_400_BAD_REQUEST)
+            if 'files' not in request.FILES:
+                return Response({
+                    'error': 'Aucun fichier CV fourni'
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        cv_files = request.FILES.getlist('files')
+            cv_files = request.FILES.getlist('files')
         
-        if len(cv_files) == 0:
-            return Response({
-                'error': 'Liste de fichiers vide'
-            }, status=status.HTTP_400_BAD_REQUEST)
+            if len(cv_files) == 0:
+                return Response({
+                    'error': 'Liste de fichiers vide'
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        analyses = []
-        skills_keywords = [skill.strip().lower() for skill in required_skills.split(',') if skill.strip()]
-
-        def process_batch(batch_files):
-            batch_analyses = []
-            for cv_file in batch_files:
-                try:
-                    file_extension = os.path.splitext(cv_file.name)[1].lower()
-                    if file_extension not in ['.pdf', '.docx', '.doc', '.txt']:
-                        continue
-
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-                        for chunk in cv_file.chunks():
-                            temp_file.write(chunk)
-                        temp_file_path = temp_file.name
-
-                    try:
-                        text = analyzer.processor.extract_text(temp_file_path)
-                        if text:
-                            analysis = analyzer.analyze_cv(text)
-                            analysis['filename'] = cv_file.name
-
-                            candidate_experience = analysis.get('experience_years', 0)
-                            required_min, required_max = parse_experience_range(experience_required)
-                            if required_max >= 10:
-                                if candidate_experience < 10:
-                                    continue
-                            else:
-                                if candidate_experience < required_min or candidate_experience > required_max:
-                                    continue
-
-                            job_match_score = calculate_job_match_score(
-                                text.lower(), 
-                                skills_keywords, 
-                                job_description.lower(),
-                                job_requirements.lower(),
-                                experience_required,
-                                candidate_experience
-                            )
-                            analysis['job_match_score'] = job_match_score
-
-                            batch_analyses.append(analysis)
-                    finally:
-                        if os.path.exists(temp_file_path):
-                            os.unlink(temp_file_path)
-
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'analyse de {cv_file.name}: {e}")
-                    continue
-            return batch_analyses
-
-        batch_size = 50
-        for i in range(0, len(cv_files), batch_size):
-            batch_files = cv_files[i:i+batch_size]
-            analyses.extend(process_batch(batch_files))
-
-        ranked_candidates = sorted(analyses, key=lambda x: x.get('job_match_score', 0), reverse=True)
+            # Partie « poste » du score: compilée une fois par révision de l'offre
+            profile = job_profiles.for_job(job_id) if job_id else None
+            if profile is None:
+                profile = job_profiles.for_fields(
+                    job_description, job_requirements, required_skills, experience_required,
+                    job_title, request.data.get('company_name', '')
+                )
+            min_skills_match = int(request.data.get(
+                'min_skills_match',
+                settings.AI_MODEL_CONFIG.get('MIN_REQUIRED_SKILLS_MATCH', 0)
+            ))
+            ranking = request.data.get('ranking', 'score')
+            if ranking not in RANKING_MODES:
+                return Response({
+                    'error': f'Mode de classement inconnu: {ranking} (choix: {", ".join(RANKING_MODES)})'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            top_n = int(request.data.get('top_n', 10))
 
-        return Response({
-            'total_files': len(cv_files),
-            'processed_files': len(analyses),
-            'job_info': {
-                'title': job_title,
-                'company': request.data.get('company_name', ''),
-                'required_skills': skills_keywords
-            },
-            'results': analyses,
-            'ranked_candidates': ranked_candidates[:10]  # Top 10 candidats
-        })
+            # Résultats envoyés au fil de l'analyse (stream=sse ou stream=ndjson)
+            stream_format = requested_stream(request)
+            if stream_format not in (None, *STREAM_FORMATS):
+                return Response({
+                    'error': f'Format de flux inconnu: {stream_format} (choix: {", ".join(STREAM_FORMATS)})'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if stream_format:
+                return streaming_response(stream_format, job_analysis_events(
+                    cv_files, profile, min_skills_match, ranking, top_n
+                ))
+
+            # Gros lots: fichiers enregistrés et analysés par run_cv_workers, réponse 202
+            # (le profil du poste est figé dans les paramètres du lot)
+            if wants_async(request, len(cv_files)):
+                batch = create_batch('job', cv_files, {
+                    'job_id': job_id,
+                    'job': profile.fields,
+                    'min_skills_match': min_skills_match,
+                    'ranking': ranking,
+                    'top_n': top_n
+                }, SUPPORTED_EXTENSIONS, user=request.user)
+                return batch_accepted(request, batch)
+
+            analyses, similarities, errors, pipeline = score_job_files(model, profile, cv_files, min_skills_match)
+
+            # Seuls les top_n meilleurs sont triés
+            stage_start = time.perf_counter()
+            ranking_scores = similarities if ranking == 'similarity' else [
+                analysis['job_match_score'] for analysis in analyses
+            ]
+            ranked_candidates = [analyses[index] for index in top_k(ranking_scores, top_n)]
+            pipeline.append({
+                'stage': 'ranking',
+                'input': len(analyses),
+                'output': len(ranked_candidates),
+                'ranking': ranking,
+                'seconds': round(time.perf_counter() - stage_start, 4)
+            })
+
+            return Response({
+                'total_files': len(cv_files),
+                'processed_files': len(analyses),
+                'model_version': model.model_version,
+                'job_info': {
+                    'title': profile.title,
+                    'company': profile.company,
+                    'required_skills': profile.skills_keywords
+                },
+                'results': analyses,
+                'errors': errors,
+                'pipeline': pipeline,
+                'ranked_candidates': ranked_candidates  # Top N candidats
+            })
         
     except Exception as e:
         import traceback
@@ -375,99 +782,179 @@ def analyze_job_cvs(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def calculate_job_match_score(cv_text, required_skills, job_description, job_requirements, experience_required, candidate_experience):
+def _ranked_applications(ranked):
+    """Candidatures classées [(id, similarité)] avec les informations du candidat"""
+    from candidates.models import Application
+
+    applications = Application.objects.select_related('candidate').in_bulk([application_id for application_id, _ in ranked])
+    return [
+        {
+            'application_id': application_id,
+            'candidate_name': applications[application_id].candidate.full_name,
+            'job_id': applications[application_id].job_id,
+            'status': applications[application_id].status,
+            'ai_score': applications[application_id].ai_score,
+            'similarity_score': round(similarity * 100, 2)
+        }
+        for application_id, similarity in ranked if application_id in applications
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def rank_job_applicants(request, job_id):
     """
-    Calcule un score de correspondance entre un CV et un poste
+    Classe toutes les candidatures d'une offre par similarité avec le poste
+    Utilise les vecteurs persistés des candidatures (aucun fichier n'est relu);
+    les candidatures pas encore indexées sont comptées dans not_indexed
     """
-    total_score = 0
-    
-    # 1. Score basé sur les compétences requises (50% du score total)
-    skills_score = 0
-    if required_skills:
-        found_skills = 0
-        for skill in required_skills:
-            if skill in cv_text:
-                found_skills += 1
-        skills_score = (found_skills / len(required_skills)) * 50 if required_skills else 0
-    
-    # 2. Score basé sur l'expérience (30% du score total)
-    experience_score = calculate_experience_match(experience_required, candidate_experience)
-    
-    # 3. Score basé sur les mots-clés de la description (20% du score total)
-    description_keywords = ['python', 'java', 'javascript', 'react', 'django', 'machine learning', 
-                          'data', 'sql', 'git', 'agile', 'scrum', 'docker', 'kubernetes', 'api',
-                          'frontend', 'backend', 'database', 'cloud', 'aws', 'azure']
-    description_score = 0
-    found_keywords = 0
-    combined_text = f"{cv_text} {job_description} {job_requirements}"
-    for keyword in description_keywords:
-        if keyword in combined_text:
-            found_keywords += 1
-    description_score = min((found_keywords / len(description_keywords)) * 20, 20)
-    
-    total_score = skills_score + experience_score + description_score
-    return min(total_score, 100)
+    from candidates.models import Application
+
+    try:
+        start = time.perf_counter()
+        top_n = int(request.query_params.get('top_n', 10))
+        profile = job_profiles.for_job(job_id)
+        if profile is None:
+            return Response({
+                'error': 'Offre d\'emploi introuvable'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        with model_registry.acquire() as model:
+            if model is None:
+                return Response({
+                    'error': 'L\'IA n\'est pas encore entraînée.'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            index = candidate_indexes.for_job(job_id, model.model_version)
+            ranked = index.rank(profile.vector(model.analyzer), top_n)
+            total_applications = Application.objects.filter(job_id=job_id).count()
+
+            return Response({
+                'job_id': job_id,
+                'model_version': model.model_version,
+                'total_applications': total_applications,
+                'indexed': len(index),
+                'not_indexed': total_applications - len(index),
+                'ranked_candidates': _ranked_applications(ranked),
+                'seconds': round(time.perf_counter() - start, 4)
+            })
 
+    except Exception as e:
+        logger.error(f"Erreur lors du classement des candidatures de l'offre {job_id}: {e}")
+        return Response({
+            'error': f'Erreur lors du classement: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-def calculate_experience_match(experience_required, candidate_experience):
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def similar_candidates(request, application_id):
     """
-    Calcule le score de correspondance d'expérience (sur 30 points)
+    Candidatures les plus proches d'une candidature indexée
+    scope: 'job' (candidatures de la même offre, par défaut) ou 'domain' (même domaine prédit)
     """
-    if not experience_required:
-        return 30  # Si pas d'exigence, score maximum
+    from .models import ApplicationVector
+
+    try:
+        start = time.perf_counter()
+        top_n = int(request.query_params.get('top_n', 10))
+        scope = request.query_params.get('scope', 'job')
+        if scope not in INDEX_SCOPES:
+            return Response({
+                'error': f'Portée inconnue: {scope} (choix: {", ".join(INDEX_SCOPES)})'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Parser l'expérience requise
-    required_min, required_max = parse_experience_range(experience_required)
+        with model_registry.acquire() as model:
+            if model is None:
+                return Response({
+                    'error': 'L\'IA n\'est pas encore entraînée.'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-    # Hard filter: if candidate experience is below required minimum, score is 0 (except for entry-level)
-    if required_min >= 1 and candidate_experience < required_min:
-        return 0
+            vector = (
+                ApplicationVector.objects.filter(application_id=application_id, model_version=model.model_version)
+                .values('domain', 'application__job_id')
+                .first()
+            )
+            if vector is None:
+                return Response({
+                    'error': 'Candidature non indexée avec le modèle actuel'
+                }, status=status.HTTP_404_NOT_FOUND)
 
-    # Si le candidat n'a pas d'expérience et que c'est requis
-    if candidate_experience == 0 and required_min > 0:
-        return 0
+            key = vector['application__job_id'] if scope == 'job' else vector['domain']
+            index = candidate_indexes.get(scope, key, model.model_version)
+            ranked = index.similar_to(application_id, top_n) if application_id in index else []
 
-    # Si le candidat a l'expérience exacte requise
-    if required_min <= candidate_experience <= required_max:
-        return 30  # Score maximum
+            return Response({
+                'application_id': application_id,
+                'scope': scope,
+                scope: key,
+                'model_version': model.model_version,
+                'indexed': len(index),
+                'similar_candidates': _ranked_applications(ranked),
+                'seconds': round(time.perf_counter() - start, 4)
+            })
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la recherche de candidats similaires à {application_id}: {e}")
+        return Response({
+            'error': f'Erreur lors de la recherche: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    # Si le candidat a plus d'expérience que requis (sur-qualification)
-    if candidate_experience > required_max:
-        # Légère pénalité pour sur-qualification
-        excess = candidate_experience - required_max
-        penalty = min(excess * 2, 10)  # Maximum 10 points de pénalité
-        return max(30 - penalty, 20)
 
-    return 15  # Score moyen par défaut
+class BatchResultsPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
 
 
-def parse_experience_range(experience_str):
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def batch_status(request, batch_id):
     """
-    Parse une string d'expérience comme '1-3' ou '5-10' ou '10+'
-    Retourne (min_years, max_years)
+    Statut d'un lot d'analyse asynchrone
+    Progression (comptes, pourcentage, temps restant estimé), résultats partiels paginés
+    dans l'ordre d'upload, et synthèse des résultats déjà disponibles
     """
-    experience_str = experience_str.lower().strip()
-    
-    if '+' in experience_str:
-        # Format '10+'
-        min_years = int(experience_str.replace('+', ''))
-        max_years = min_years + 10  # Assume max 10 ans de plus
-        return min_years, max_years
-    
-    if '-' in experience_str:
-        # Format '1-3'
-        parts = experience_str.split('-')
-        if len(parts) == 2:
-            try:
-                min_years = int(parts[0])
-                max_years = int(parts[1])
-                return min_years, max_years
-            except ValueError:
-                pass
-    
-    # Format '0' ou autre
+    from .models import AnalysisBatch
+
     try:
-        years = int(experience_str)
-        return years, years
-    except ValueError:
-        return 0, 0  # Défaut si impossible à parser
+        batch = AnalysisBatch.objects.filter(pk=batch_id).first()
+        # Un lot créé par un utilisateur connecté n'est visible que par lui (et l'équipe)
+        if batch is None or (
+            batch.created_by_id is not None
+            and batch.created_by_id != getattr(request.user, 'id', None)
+            and not getattr(request.user, 'is_staff', False)
+        ):
+            return Response({
+                'error': 'Lot d\'analyse introuvable'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        paginator = BatchResultsPagination()
+        rows = batch.files.filter(status__in=('completed', 'failed')).order_by('position').values(
+            'filename', 'status', 'error_message', 'result'
+        )
+        page = paginator.paginate_queryset(rows, request)
+
+        return Response({
+            'batch_id': str(batch.id),
+            'kind': batch.kind,
+            'status': batch.status,
+            'created_at': batch.created_at,
+            'started_at': batch.started_at,
+            'completed_at': batch.completed_at,
+            'progress': batch_progress(batch),
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': [file_result(row) for row in page],
+            **batch_summary(batch)
+        })
+
+    except NotFound:
+        # Page hors limites: 404 de la pagination
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture du lot {batch_id}: {e}")
+        return Response({
+            'error': f'Erreur: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
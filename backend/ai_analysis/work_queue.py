@@ -0,0 +1,519 @@
+"""
+Files de traitement (table ProcessingQueue des candidatures, fichiers des lots d'analyse)
+Les éléments sont réservés par lots, dans l'ordre des priorités, avec SELECT ... FOR UPDATE
+SKIP LOCKED: plusieurs processus de traitement, sur un ou plusieurs serveurs partageant la
+base PostgreSQL, se répartissent la file sans s'attendre. La réservation est confirmée par
+une mise à jour conditionnelle, ce qui la garde exclusive sur les bases sans verrou de ligne.
+
+Un échec est retenté après un délai exponentiel (backoff); un élément réservé par un
+processus disparu est libéré à l'expiration de sa réservation (lease). Pendant le
+traitement d'un lot, la réservation est prolongée régulièrement: un lot lent n'est pas
+repris (et notifié deux fois) par un autre processus.
+Chaque table de file est décrite par une QueueSource; un processus les sert à tour de rôle.
+
+Micro-lots: un lot réservé incomplet est complété pendant au plus max_wait secondes avant
+l'analyse, pour qu'une seule vectorisation et une seule prédiction par modèle servent
+plusieurs CV. batch_size et max_wait règlent le compromis latence / débit, mesuré par
+BatchMetrics (journalisé périodiquement par chaque processus).
+"""
+import os
+import time
+import socket
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from candidates.models import CVAnalysis
+from notifications.models import Notification, NotificationPreference
+
+from .featurizer import featurize
+from .matching import JobMatchProfile
+from .models import ProcessingQueue, SkillExtraction
+from .skill_matcher import skill_category
+from .vector_index import index_applications
+
+logger = logging.getLogger(__name__)
+
+# Éléments pouvant être réservés
+CLAIMABLE_STATUSES = ('pending', 'retrying')
+
+# Priorité par défaut (1 = haute priorité, 5 = basse priorité)
+DEFAULT_PRIORITY = 3
+
+# Intervalle des nouvelles réservations pendant le remplissage d'un micro-lot (secondes)
+FILL_CHECK_INTERVAL = 0.05
+
+
+def worker_name(index: int = 0) -> str:
+    """Identifiant d'un processus de traitement: machine, pid et numéro"""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"[:100]
+
+
+def enqueue_application(application, priority: int = DEFAULT_PRIORITY) -> ProcessingQueue:
+    """Ajoute une candidature à la file (l'élément en attente existant est réutilisé)"""
+    item = ProcessingQueue.objects.filter(
+        application=application, status__in=CLAIMABLE_STATUSES
+    ).order_by('priority').first()
+    if item is not None:
+        if priority < item.priority:
+            ProcessingQueue.objects.filter(pk=item.pk).update(priority=priority)
+            item.priority = priority
+        return item
+    return ProcessingQueue.objects.create(application=application, priority=priority)
+
+
+class PermanentFailure(str):
+    """
+    Message d'erreur d'un échec déterministe (PDF illisible ou sans texte): l'élément est
+    marqué en échec dès la première tentative, sans nouvelle tentative différée
+    """
+
+
+def retry_delay(attempts: int, base: float, maximum: float) -> float:
+    """Délai avant la tentative suivante: base, 2 x base, 4 x base... plafonné"""
+    return min(base * 2 ** max(attempts - 1, 0), maximum)
+
+
+def release_expired(lease_seconds: float, queue_models: Iterable = (ProcessingQueue,)) -> int:
+    """Remet en file les éléments réservés depuis plus de lease_seconds (processus disparu)"""
+    now = timezone.now()
+    released = 0
+    for queue_model in queue_models:
+        released += queue_model.objects.filter(
+            status='processing', started_at__lt=now - timedelta(seconds=lease_seconds)
+        ).update(status='retrying', worker='', next_attempt_at=now, error_message='Réservation expirée')
+    if released:
+        logger.warning(f"{released} éléments de la file libérés (réservation expirée)")
+    return released
+
+
+def claim_items(worker: str, limit: int, queue_model=ProcessingQueue, select_related: Sequence[str] = ('application',)) -> List:
+    """
+    Réserve jusqu'à limit éléments prêts d'une table de file, par priorité puis ancienneté
+    Les lignes verrouillées par un autre processus sont sautées (SKIP LOCKED)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ready = queue_model.objects.filter(
+            status__in=CLAIMABLE_STATUSES, next_attempt_at__lte=now
+        ).order_by('priority', 'created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        ids = list(ready.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Mise à jour conditionnelle: un élément réservé entre-temps n'est pas repris
+        queue_model.objects.filter(id__in=ids, status__in=CLAIMABLE_STATUSES).update(
+            status='processing',
+            worker=worker,
+            started_at=now,
+            completed_at=None,
+            attempts=F('attempts') + 1
+        )
+
+    return list(
+        queue_model.objects.filter(id__in=ids, status='processing', worker=worker, started_at=now)
+        .select_related(*select_related)
+        .order_by('priority', 'created_at')
+    )
+
+
+def renew_items(items: List) -> int:
+    """Prolonge la réservation des éléments encore en traitement par leur processus"""
+    if not items:
+        return 0
+    return type(items[0]).objects.filter(
+        pk__in=[item.pk for item in items], status='processing', worker=items[0].worker
+    ).update(started_at=timezone.now())
+
+
+def complete_item(item, processing_time: float, **fields):
+    """Élément traité (fields: champs propres à la table, renseignés en même temps)"""
+    type(item).objects.filter(pk=item.pk, worker=item.worker).update(
+        status='completed',
+        processing_time=processing_time,
+        completed_at=timezone.now(),
+        error_message=None,
+        **fields
+    )
+
+
+def fail_item(item, error: str, processing_time: float, max_attempts: int,
+              backoff: float, backoff_max: float) -> str:
+    """Échec d'une tentative: nouvelle tentative différée, ou échec définitif; retourne le statut"""
+    now = timezone.now()
+    queue_model = type(item)
+    attempts = queue_model.objects.filter(pk=item.pk).values_list('attempts', flat=True).first() or item.attempts
+    if attempts >= max_attempts:
+        status, next_attempt_at = 'failed', now
+    else:
+        status, next_attempt_at = 'retrying', now + timedelta(seconds=retry_delay(attempts, backoff, backoff_max))
+    queue_model.objects.filter(pk=item.pk, worker=item.worker).update(
+        status=status,
+        error_message=error[:2000],
+        processing_time=processing_time,
+        completed_at=now if status == 'failed' else None,
+        next_attempt_at=next_attempt_at
+    )
+    return status
+
+
+def notify_analysis_complete(application, score: float) -> Optional[Notification]:
+    """Notification « Analyse IA terminée » au recruteur de l'offre, selon ses préférences"""
+    job = application.job
+    recruiter = getattr(job, 'posted_by', None)
+    if recruiter is None:
+        return None
+    preferences = NotificationPreference.objects.filter(user=recruiter).first()
+    if preferences is not None and not preferences.inapp_ai_analysis_complete:
+        return None
+    return Notification.objects.create(
+        recipient=recruiter,
+        title=f"Analyse IA terminée pour {job.title}",
+        message=f"Le CV de {application.candidate.get_full_name()} a été analysé: score de correspondance {score:.1f}%.",
+        notification_type='success',
+        priority='normal',
+        related_application=application,
+        related_job=job
+    )
+
+
+def store_application_analysis(application, result: Dict, job_profiles=None):
+    """
+    Enregistre l'analyse d'une candidature traitée par la file: analyse et score IA
+    (correspondance avec l'offre), CVAnalysis et compétences détectées (SkillExtraction),
+    puis notifie le recruteur; tout ou rien, un échec est retenté par la file
+    """
+    analysis = dict(result['analysis'])
+    analysis.pop('filename', None)
+    features = result.get('features') or featurize(result['text'])
+
+    # Profil compilé de l'offre (JobProfileCache), sinon construit depuis l'offre
+    profile = job_profiles.for_job(application.job_id) if job_profiles is not None else None
+    if profile is None:
+        profile = JobMatchProfile.from_job(application.job)
+    match = profile.breakdown(features, analysis['experience_years'], profile.match_skills(features))
+    analysis['matched_skills'] = match['matched_skills']
+    analysis['job_match_score'] = match['overall_score']
+
+    with transaction.atomic():
+        application.ai_analysis = analysis
+        application.ai_score = match['overall_score']
+        application.save(update_fields=['ai_analysis', 'ai_score', 'updated_at'])
+
+        CVAnalysis.objects.update_or_create(application=application, defaults={
+            'extracted_text': result['text'],
+            'extracted_skills': analysis['skills'],
+            'extracted_experience': analysis['extracted_experience'],
+            'extracted_education': analysis['extracted_education'],
+            'skill_match_score': match['skill_match_score'],
+            'experience_match_score': match['experience_match_score'],
+            'overall_score': match['overall_score'],
+            'ai_recommendation': (
+                f"Domaine {analysis['domain']} ({analysis['domain_confidence']:.0%}), qualité {analysis['quality']}, "
+                f"{len(match['matched_skills'])}/{len(profile.skills_keywords)} compétences requises"
+            ),
+            'keywords_found': match['matched_skills'],
+            'missing_keywords': match['missing_skills'],
+        })
+
+        SkillExtraction.objects.filter(application=application).delete()
+        SkillExtraction.objects.bulk_create([
+            SkillExtraction(application=application, skill_name=skill, category=skill_category(skill), confidence_score=1.0)
+            for skill in analysis['skills']
+        ])
+
+        notify_analysis_complete(application, match['overall_score'])
+
+
+def process_items(model, items: List[ProcessingQueue], job_profiles=None) -> Dict[int, Optional[str]]:
+    """
+    Extrait, analyse et indexe les CV d'un lot d'éléments, puis enregistre les analyses
+    job_profiles: cache des profils d'offres (JobProfileCache) pour le score de correspondance
+    Retourne {id de l'élément: None si réussi, sinon message d'erreur}
+    """
+    applications = [item.application for item in items]
+    successes, errors = index_applications(model, applications)
+
+    outcomes = {}
+    by_application = {item.application_id: item for item in items}
+    for error in errors:
+        outcomes[by_application[error['application_id']].pk] = error['error']
+    for result in successes:
+        item = by_application[result['application_id']]
+        try:
+            store_application_analysis(item.application, result, job_profiles)
+            outcomes[item.pk] = None
+        except Exception as e:
+            logger.error(f"Erreur d'enregistrement de l'analyse de la candidature {item.application_id}: {e}")
+            outcomes[item.pk] = str(e)
+    return outcomes
+
+
+class QueueSource(ABC):
+    """
+    Table de file servie par CVQueueWorker (mêmes champs de file que ProcessingQueue)
+    process() traite un lot réservé; finish() suit l'enregistrement des statuts du lot
+    """
+
+    name = 'file'
+    queue_model = None
+    select_related: Sequence[str] = ()
+
+    @abstractmethod
+    def process(self, model, items: List) -> Dict[int, Optional[str]]:
+        """{id de l'élément: None si réussi, sinon message d'erreur (PermanentFailure: pas de nouvelle tentative)}"""
+
+    def completed_fields(self, model) -> Dict:
+        """Champs renseignés avec le statut 'completed'"""
+        return {}
+
+    def finish(self, items: List):
+        pass
+
+    def describe(self, item) -> str:
+        return f"{self.name} {item.pk}"
+
+
+class ApplicationQueue(QueueSource):
+    """Candidatures à analyser (ProcessingQueue)"""
+
+    name = 'candidatures'
+    queue_model = ProcessingQueue
+    select_related = ('application__job__posted_by', 'application__candidate')
+
+    def __init__(self, job_profiles=None):
+        self.job_profiles = job_profiles
+
+    def process(self, model, items):
+        return process_items(model, items, self.job_profiles)
+
+    def completed_fields(self, model):
+        return {'ai_model_id': model.record_id}
+
+    def describe(self, item):
+        return f"Candidature {item.application_id}"
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BatchMetrics:
+    """
+    Mesures des micro-lots d'un processus de traitement (fenêtre des window derniers lots)
+    Taille des lots, attente de remplissage, durée de l'analyse, débit, et latence des
+    éléments (de la mise en file à la fin du traitement)
+    """
+
+    def __init__(self, window: int = 500):
+        self.batches = 0
+        self.items = 0
+        self._batches = deque(maxlen=window)
+        self._latencies = deque(maxlen=window * 4)
+        self._started = time.monotonic()
+
+    def record(self, size: int, fill_wait: float, seconds: float, latencies: Iterable[float]):
+        self.batches += 1
+        self.items += size
+        self._batches.append((size, fill_wait, seconds))
+        self._latencies.extend(latencies)
+
+    def snapshot(self) -> Dict:
+        batches = list(self._batches)
+        latencies = list(self._latencies)
+        items = sum(size for size, _, _ in batches)
+        busy = sum(seconds for _, _, seconds in batches)
+        elapsed = time.monotonic() - self._started
+
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(items / len(batches), 2) if batches else None,
+            'mean_fill_wait': rounded(sum(wait for _, wait, _ in batches) / len(batches)) if batches else None,
+            'mean_batch_seconds': rounded(busy / len(batches)) if batches else None,
+            # Débit pendant l'analyse, et débit moyen depuis le démarrage (attentes comprises)
+            'items_per_second': round(items / busy, 2) if busy > 0 else None,
+            'overall_items_per_second': round(self.items / elapsed, 2) if elapsed > 0 else None,
+            'latency_p50': rounded(_percentile(latencies, 0.5)),
+            'latency_p95': rounded(_percentile(latencies, 0.95)),
+            'latency_max': rounded(max(latencies)) if latencies else None,
+        }
+
+    def describe(self) -> str:
+        stats = self.snapshot()
+        if not stats['batches']:
+            return 'aucun lot traité'
+        return (
+            f"{stats['batches']} lots, {stats['items']} éléments, taille moyenne {stats['mean_batch_size']}, "
+            f"remplissage {stats['mean_fill_wait']}s, analyse {stats['mean_batch_seconds']}s/lot, "
+            f"{stats['items_per_second']} éléments/s, latence p50 {stats['latency_p50']}s "
+            f"p95 {stats['latency_p95']}s"
+        )
+
+
+class CVQueueWorker:
+    """
+    Boucle de traitement d'un processus: réserve un lot, l'analyse avec le modèle actif
+    du registre, enregistre les résultats, recommence; attend poll_interval quand les files
+    sont vides. Les files (sources) sont servies à tour de rôle.
+    Un lot incomplet est complété pendant au plus max_wait secondes (0 = analysé aussitôt);
+    les mesures des lots sont journalisées toutes les metrics_interval secondes
+    stop() termine la boucle après le lot en cours
+    """
+
+    def __init__(self, registry, name: Optional[str] = None, batch_size: int = 16, poll_interval: float = 2.0,
+                 max_attempts: int = 3, backoff: float = 30.0, backoff_max: float = 3600.0,
+                 lease_seconds: float = 600.0, sources: Optional[Sequence[QueueSource]] = None,
+                 max_wait: float = 0.0, metrics_interval: float = 60.0):
+        self.registry = registry
+        self.sources = list(sources) if sources else [ApplicationQueue()]
+        self.name = name or worker_name()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.metrics_interval = metrics_interval
+        self.metrics = BatchMetrics()
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._released_at = float('-inf')
+        self._next_source = 0
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def run_once(self) -> int:
+        """Traite au plus un lot; retourne le nombre d'éléments réservés"""
+        if time.monotonic() - self._released_at >= self.lease_seconds / 2:
+            self._released_at = time.monotonic()
+            release_expired(self.lease_seconds, [source.queue_model for source in self.sources])
+
+        with self.registry.acquire() as model:
+            if model is None:
+                return 0
+            for offset in range(len(self.sources)):
+                position = (self._next_source + offset) % len(self.sources)
+                source = self.sources[position]
+                items = claim_items(self.name, self.batch_size, source.queue_model, source.select_related)
+                if items:
+                    self._next_source = (position + 1) % len(self.sources)
+                    with self._renewing(items):
+                        fill_start = time.perf_counter()
+                        items = self._fill(source, items)
+                        return self._process(source, model, items, time.perf_counter() - fill_start)
+            return 0
+
+    @contextmanager
+    def _renewing(self, items: List):
+        """
+        Prolonge la réservation du lot (items, complété en place) toutes les lease_seconds / 3
+        secondes jusqu'à la fin du bloc, depuis un thread avec sa propre connexion
+        """
+        done = threading.Event()
+
+        def renew():
+            try:
+                while not done.wait(self.lease_seconds / 3):
+                    try:
+                        renew_items(items)
+                    except Exception as e:
+                        logger.warning(f"{self.name}: prolongation de la réservation impossible: {e}")
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=renew, name=f'{self.name}-lease', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _fill(self, source: QueueSource, items: List) -> List:
+        """Complète un lot incomplet avec les éléments arrivés pendant au plus max_wait secondes"""
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._stop.wait(min(remaining, FILL_CHECK_INTERVAL))
+            items.extend(claim_items(
+                self.name, self.batch_size - len(items), source.queue_model, source.select_related
+            ))
+        return items
+
+    def _process(self, source: QueueSource, model, items: List, fill_wait: float = 0.0) -> int:
+        start = time.perf_counter()
+        try:
+            outcomes = source.process(model, items)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement d'un lot de la file {source.name}: {e}")
+            outcomes = {item.pk: str(e) for item in items}
+        # Temps du lot réparti entre ses éléments (analyse vectorisée commune)
+        batch_seconds = time.perf_counter() - start
+        processing_time = batch_seconds / len(items)
+
+        for item in items:
+            error = outcomes.get(item.pk, 'Aucun résultat')
+            if error is None:
+                complete_item(item, processing_time, **source.completed_fields(model))
+                self.processed += 1
+            else:
+                max_attempts = 1 if isinstance(error, PermanentFailure) else self.max_attempts
+                status = fail_item(item, error, processing_time, max_attempts, self.backoff, self.backoff_max)
+                self.failed += 1
+                logger.warning(f"{source.describe(item)}: {error} ({status})")
+        source.finish(items)
+
+        now = timezone.now()
+        self.metrics.record(len(items), fill_wait, batch_seconds, [
+            (now - item.created_at).total_seconds() for item in items
+        ])
+        logger.info(
+            f"{self.name}: lot de {len(items)} éléments ({source.name}) traité en {batch_seconds:.2f}s "
+            f"(remplissage {fill_wait:.2f}s)"
+        )
+        return len(items)
+
+    def run(self):
+        """Boucle jusqu'à stop()"""
+        logger.info(f"Processus de traitement {self.name} démarré")
+        reported_at = time.monotonic()
+        while not self._stop.is_set():
+            if self.metrics_interval and time.monotonic() - reported_at >= self.metrics_interval:
+                reported_at = time.monotonic()
+                logger.info(f"{self.name}: {self.metrics.describe()}")
+            # Connexions expirées ou coupées: le processus tourne pendant des jours
+            close_old_connections()
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                logger.error(f"{self.name}: erreur de la boucle de traitement: {e}")
+                claimed = 0
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+        logger.info(f"Processus de traitement {self.name} arrêté ({self.processed} traités, {self.failed} échecs)")
+        logger.info(f"{self.name}: {self.metrics.describe()}")
@@ -1,3 +1,62 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ai_analysis.models import ProcessingQueue
+from jobs.models import Job, JobCategory
+from notifications.models import Notification
+
+from .models import Application
+
+
+class ApplicationCreateTests(TestCase):
+    """Dépôt d'une candidature: analyse IA mise en file après l'enregistrement"""
+
+    def setUp(self):
+        # CV uploadés écrits dans un dossier temporaire
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User = get_user_model()
+        recruiter = User.objects.create_user(
+            username='recruteur', email='recruteur@example.com', password='secret',
+            first_name='Rita', last_name='Recruteur', role='recruteur'
+        )
+        self.candidate = User.objects.create_user(
+            username='candidat', email='candidat@example.com', password='secret',
+            first_name='Carla', last_name='Candidat', role='candidat'
+        )
+        self.job = Job.objects.create(
+            title='Développeur Python',
+            category=JobCategory.objects.create(name='Information Technology'),
+            company_name='Acme',
+            description='Backend developer',
+            requirements='Django API',
+            location='Paris',
+            skills_required='Python, Django',
+            experience_required='1-3',
+            posted_by=recruiter
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.candidate)
+
+    def test_application_is_enqueued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(reverse('candidates:application-create'), {
+                'job': self.job.pk,
+                'cv_file': SimpleUploadedFile('cv.pdf', b'%PDF-1.4'),
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(callbacks), 1)
+        application = Application.objects.get(pk=response.data['id'])
+        item = ProcessingQueue.objects.get(application=application)
+        self.assertEqual(item.status, 'pending')
+        self.assertTrue(Notification.objects.filter(related_application=application, notification_type='info').exists())
@@ -53,6 +53,7 @@ class ApplicationStatsView(APIView):
 			'jobs_scores': list(jobs_scores),
 		})
 from rest_framework import generics, permissions
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
 from .models import Application
 from .serializers import ApplicationSerializer
@@ -63,6 +64,9 @@ class ApplicationCreateView(generics.CreateAPIView):
 
 	def perform_create(self, serializer):
 		application = serializer.save(candidate=self.request.user)
+		# Analyse IA en arrière-plan (run_cv_workers), une fois la candidature enregistrée
+		from ai_analysis.work_queue import enqueue_application
+		transaction.on_commit(lambda: enqueue_application(application))
 		# Create notification for recruiter
 		from notifications.models import Notification
 		job = application.job
@@ -0,0 +1,19 @@
+"""
+Configuration gunicorn
+Usage: gunicorn -c gunicorn.conf.py rh_management.wsgi
+
+Les modèles IA sont chargés une seule fois dans le maître (preload_app) puis
+partagés en copie à l'écriture par tous les workers
+"""
+import multiprocessing
+
+from decouple import config
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+timeout = config('GUNICORN_TIMEOUT', default=120, cast=int)
+
+# Importer l'application (et charger les modèles) avant le fork des workers
+preload_app = True
+# Le budget de processus d'analyse (AI_WORKERS) est réparti entre les workers
+raw_env = ['AI_MODELS_PRELOAD=True', f'AI_WEB_WORKERS={workers}']
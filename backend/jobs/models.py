@@ -233,6 +233,10 @@ class JobSkill(models.Model):
         _('Date de création'),
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        _('Dernière modification'),
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = _('Compétence')
@@ -209,8 +209,68 @@ AI_MODEL_CONFIG = {
     'OPENAI_API_KEY': config('OPENAI_API_KEY', default=''),
     'HUGGINGFACE_API_KEY': config('HUGGINGFACE_API_KEY', default=''),
     'MODEL_NAME': 'distilbert-base-multilingual-cased',
-    'MAX_TEXT_LENGTH': 5000,
+    # Bundles de modèles versionnés (voir ai_analysis/artifacts.py)
+    'MODELS_DIR': config('AI_MODELS_DIR', default=str(BASE_DIR.parent / 'ai-model')),
+    # Chargement des modèles en arrière-plan au démarrage du serveur WSGI
+    'MODELS_WARMUP': config('AI_MODELS_WARMUP', default=True, cast=bool),
+    # Chargement unique dans le maître avant le fork des workers (gunicorn --preload, voir gunicorn.conf.py)
+    'MODELS_PRELOAD': config('AI_MODELS_PRELOAD', default=False, cast=bool),
+    # Intervalle (s) de vérification du modèle actif (table AIModel) pour le remplacement à chaud
+    'MODEL_REGISTRY_CHECK_INTERVAL': config('AI_MODEL_REGISTRY_CHECK_INTERVAL', default=30, cast=float),
+    'MAX_TEXT_LENGTH': 5000,  # Budget de caractères extraits par CV
+    'PDF_MAX_PAGES': 20,  # Budget de pages lues par PDF
     'SIMILARITY_THRESHOLD': 0.7,
+    # Processus d'analyse en lot pour tout le serveur (0 = nombre de coeurs), répartis entre
+    # les WEB_WORKERS processus web; une part de 1 analyse dans le processus web, sans pool
+    'WORKERS': config('AI_WORKERS', default=0, cast=int),
+    'WEB_WORKERS': config('AI_WEB_WORKERS', default=1, cast=int),  # Fixé par gunicorn.conf.py
+    'PARALLEL_MIN_FILES': 4,
+    'BATCH_SIZE': 32,  # CV analysés ensemble (vectorisation et prédiction par lot)
+    # Extraction dans des sous-processus isolés et recyclés, en plus du pool (désactivée par défaut)
+    'EXTRACTION_SANDBOX': config('AI_EXTRACTION_SANDBOX', default=False, cast=bool),
+    'EXTRACTION_TIMEOUT': 30,  # Secondes par fichier
+    'EXTRACTION_MEMORY_MB': 512,  # Mémoire supplémentaire autorisée par processus
+    'EXTRACTION_MAX_DOCUMENTS': 100,  # Recyclage du processus après N fichiers
+    # Cache des analyses par empreinte de fichier et version du modèle
+    'CACHE_ENABLED': config('AI_CACHE_ENABLED', default=True, cast=bool),
+    'CACHE_MAX_BYTES': 200 * 1024 * 1024,
+    'CACHE_EVICT_INTERVAL': 60,  # Secondes entre deux recalculs de la taille du cache
+    'CACHE_TOUCH_INTERVAL': 300,  # Précision de l'ordre LRU (date d'accès mise à jour au plus une fois)
+    # Dataset d'entraînement (un dossier par domaine) et CSV des données d'entraînement préparées
+    'TRAINING_DATASET_DIR': config('AI_TRAINING_DATASET_DIR', default=str(BASE_DIR.parent / 'dataset')),
+    'TRAINING_DATA_PATH': config(
+        'AI_TRAINING_DATA_PATH', default=str(BASE_DIR.parent / 'data' / 'training_data.csv')
+    ),
+    # Échantillonnage du dataset d'entraînement (0 = tous les CV de chaque domaine)
+    'TRAINING_MAX_CV_PER_DOMAIN': 50,
+    'TRAINING_SAMPLING': 'first',  # 'first' ou 'random'
+    'TRAINING_BATCH_SIZE': 256,  # CV par mini-lot en entraînement incrémental
+    # --from-db: part maximale d'analyses dont la catégorie n'a pas de domaine connu du modèle
+    'TRAINING_MAX_UNMAPPED_SHARE': 0.05,
+    # Modèle de qualité: 'auto' (benchmark) ou svc_rbf / linear_svc / logistic
+    'QUALITY_BACKEND': 'auto',
+    'QUALITY_LATENCY_BUDGET_MS': 1.0,  # Latence p99 maximale par CV en sélection automatique
+    # Nombre minimum de compétences requises présentes pour passer le préfiltre
+    # (0 = aucun filtre: un CV sans compétence requise est classé, avec un score plus bas)
+    'MIN_REQUIRED_SKILLS_MATCH': 0,
+    # Profils de poste compilés gardés en mémoire (recompilés quand Job.updated_at change)
+    'JOB_PROFILE_CACHE_SIZE': 256,
+    # Index de similarité des candidatures gardés en mémoire (par offre ou par domaine)
+    'CANDIDATE_INDEX_CACHE_SIZE': 64,
+    # File de traitement des candidatures (manage.py run_cv_workers)
+    'QUEUE_WORKERS': config('AI_QUEUE_WORKERS', default=2, cast=int),  # Processus par serveur
+    'QUEUE_BATCH_SIZE': 16,  # Éléments réservés par lot
+    'QUEUE_BATCH_MAX_WAIT': 0.5,  # Secondes d'attente pour compléter un lot incomplet (0 = aucune)
+    'QUEUE_POLL_INTERVAL': 2.0,  # Secondes d'attente quand la file est vide
+    'QUEUE_MAX_ATTEMPTS': 3,
+    'QUEUE_RETRY_BACKOFF': 30,  # Secondes avant la 2e tentative, doublées ensuite
+    'QUEUE_RETRY_BACKOFF_MAX': 3600,
+    'QUEUE_LEASE_SECONDS': 600,  # Réservation libérée au-delà (processus disparu)
+    'QUEUE_METRICS_INTERVAL': 60,  # Secondes entre deux journalisations des mesures des lots
+    # Analyses en arrière-plan (réponse 202) à partir de N fichiers; 0 = seulement sur demande
+    'ASYNC_MIN_FILES': config('AI_ASYNC_MIN_FILES', default=0, cast=int),
+    # Analyses en flux (stream=sse|ndjson): fichiers par tranche après le premier (0 = taille du pool)
+    'STREAM_CHUNK_SIZE': 0,
 }
 
 # Logging configuration
@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rh_management.settings')
 
 application = get_wsgi_application()
+
+# Modèles IA (les commandes manage.py ne les chargent pas):
+# - préchargement synchrone, partagé par les workers forkés (gunicorn --preload)
+# - sinon préchauffage en arrière-plan dans chaque worker
+if settings.AI_MODEL_CONFIG.get('MODELS_PRELOAD'):
+    from ai_analysis.sharing import preload_shared_models
+    from ai_analysis.services import model_registry
+    preload_shared_models(model_registry)
+elif settings.AI_MODEL_CONFIG.get('MODELS_WARMUP'):
+    from ai_analysis.services import model_registry
+    model_registry.warm_up_in_background()
@@ -1,6 +1,7 @@
 """
 Script d'entraînement pour l'IA de filtrage de CV
 Utilise votre dataset existant pour entraîner les modèles
+Usage: python train_ai.py [/path/to/your/cv/dataset]
 """
 import os
 import sys
@@ -12,7 +13,9 @@ sys.path.append(str(Path(__file__).parent.parent))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rh_management.settings')
 django.setup()
 
-from ai_analysis.cv_processor import CVAnalyzer
+from django.conf import settings
+from ai_analysis.registry import register_model_bundle
+from ai_analysis.services import create_analyzer
 import logging
 
 # Configuration du logging
@@ -37,12 +40,21 @@ def train_ai_models(dataset_path: str):
     logger.info("🚀 Début de l'entraînement des modèles IA pour le filtrage de CV")
     logger.info(f"📁 Dataset: {dataset_path}")
     
-    # Initialiser l'analyseur
-    analyzer = CVAnalyzer()
+    # Initialiser l'analyseur (modèle de qualité choisi par benchmark selon la configuration,
+    # budgets d'extraction du service)
+    analyzer = create_analyzer(
+        quality_backend=settings.AI_MODEL_CONFIG.get('QUALITY_BACKEND', 'auto'),
+        quality_latency_budget_ms=settings.AI_MODEL_CONFIG.get('QUALITY_LATENCY_BUDGET_MS')
+    )
     
-    # Traitement du dataset
+    # Traitement du dataset (seuls les PDF nouveaux ou modifiés sont ré-extraits)
     logger.info("📄 Traitement des CV du dataset...")
-    cv_dataframe = analyzer.process_cv_dataset(dataset_path)
+    cv_dataframe = analyzer.process_cv_dataset(
+        dataset_path,
+        max_per_domain=settings.AI_MODEL_CONFIG.get('TRAINING_MAX_CV_PER_DOMAIN', 50) or None,
+        sampling=settings.AI_MODEL_CONFIG.get('TRAINING_SAMPLING', 'first'),
+        manifest_path=os.path.join(dataset_path, '.extraction_manifest.json')
+    )
     
     if cv_dataframe.empty:
         logger.error("Aucun CV trouvé dans le dataset!")
@@ -70,12 +82,14 @@ def train_ai_models(dataset_path: str):
     trained_df = analyzer.train_models(cv_dataframe)
     
     # Sauvegarder les modèles
-    models_path = "C:/Users/Me/Desktop/RH/ai-model"
-    analyzer.save_models(models_path)
+    models_path = str(settings.AI_MODEL_CONFIG['MODELS_DIR'])
+    bundle_dir = analyzer.save_models(models_path)
+    register_model_bundle(bundle_dir, analyzer.model_version, accuracy=analyzer.domain_accuracy,
+                          description=f'{len(cv_dataframe)} CV du dataset {dataset_path}')
     
     # Sauvegarder les données d'entraînement
-    data_path = "C:/Users/Me/Desktop/RH/data/training_data.csv"
-    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    data_path = settings.AI_MODEL_CONFIG['TRAINING_DATA_PATH']
+    os.makedirs(os.path.dirname(os.path.abspath(data_path)), exist_ok=True)
     trained_df.to_csv(data_path, index=False, encoding='utf-8')
     logger.info(f"💾 Données d'entraînement sauvegardées: {data_path}")
     
@@ -100,11 +114,9 @@ def test_filtering(analyzer, cv_dataframe, domain="informatique", top_n=10):
     logger.info(f"\n🔍 Test du filtrage - Top {top_n} candidats en {domain}")
     
     # Analyser tous les CV
-    cv_analyses = []
-    for idx, row in cv_dataframe.iterrows():
-        analysis = analyzer.analyze_cv(row['raw_text'])
-        analysis['filename'] = row['filename']
-        cv_analyses.append(analysis)
+    cv_analyses = analyzer.analyze_cvs(cv_dataframe['raw_text'].tolist())
+    for analysis, filename in zip(cv_analyses, cv_dataframe['filename']):
+        analysis['filename'] = filename
     
     # Filtrer les top candidats
     top_candidates = analyzer.filter_top_candidates(cv_analyses, domain, top_n)
@@ -116,8 +128,8 @@ def test_filtering(analyzer, cv_dataframe, domain="informatique", top_n=10):
     return top_candidates
 
 if __name__ == "__main__":
-    # Utiliser votre dataset organisé par domaines
-    dataset_path = "C:/Users/Me/Desktop/RH/dataset"
+    # Utiliser votre dataset organisé par domaines (argument, sinon AI_TRAINING_DATASET_DIR)
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else settings.AI_MODEL_CONFIG['TRAINING_DATASET_DIR']
     
     # Vérifier que le dataset existe
     if not os.path.exists(dataset_path):
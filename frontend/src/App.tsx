@@ -28,7 +28,7 @@ interface BulkAnalysisResult {
   summary: {
     [domain: string]: {
       count: number;
-      top_candidates: CVAnalysisResult[];
+      top_results: number[];
     };
   };
 }